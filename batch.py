@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Batch runner: tailor the resume and cover letter for many job descriptions.
+
+Input is either a directory of job description .txt files, or a CSV/JSONL
+file whose rows have a `url` or `job_description` column (plus optional `id`
+and `company_name`). All jobs share one process, so the vector store and LLM
+clients are loaded once and stay warm; up to --concurrency jobs run at a time
+on a single event loop via resume_agent.ainvoke.
+
+Usage:
+    python batch.py jobs/ --concurrency 4
+    python batch.py postings.csv --context-mode prefetch
+"""
+import argparse
+import asyncio
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from settings import CONTEXT_MODES, DEFAULT_CONTEXT_MODE, DEFAULT_OUTPUT_DIR
+from model_routing import get_model_profile, get_model_profiles, set_model_profile
+
+DEFAULT_CONCURRENCY = 4
+# Seconds between checks while a job waits for the near-duplicate it copies to finish
+DUPLICATE_POLL_INTERVAL = 2.0
+
+
+def load_jobs(path: str) -> list:
+    """
+    Load batch jobs from a directory of .txt files or a CSV/JSONL file.
+
+    Args:
+        path: Directory, .csv or .jsonl file
+
+    Returns:
+        List of job dicts with id and url or job_description (and optionally
+        company_name)
+    """
+    if os.path.isdir(path):
+        jobs = []
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith(".txt"):
+                with open(os.path.join(path, filename), encoding="utf-8") as f:
+                    jobs.append({
+                        "id": os.path.splitext(filename)[0],
+                        "job_description": f.read().strip()
+                    })
+        return jobs
+
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    elif path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        raise ValueError(f"Unsupported batch input: {path} (expected a directory, .csv or .jsonl)")
+
+    jobs = []
+    for i, row in enumerate(rows, start=1):
+        if not (row.get("url") or row.get("job_description")):
+            raise ValueError(f"Row {i} of {path} has neither a url nor a job_description")
+        jobs.append({
+            "id": row.get("id") or f"job_{i:04d}",
+            "url": row.get("url") or None,
+            "job_description": row.get("job_description") or None,
+            "company_name": row.get("company_name") or None
+        })
+    return jobs
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(results: list, wall_seconds: float) -> dict:
+    """Throughput and per-job latency statistics for a finished batch."""
+    latencies = [r["seconds"] for r in results if r["status"] == "ok"]
+    succeeded = len(latencies)
+    return {
+        "jobs": len(results),
+        "succeeded": succeeded,
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "wall_seconds": round(wall_seconds, 2),
+        "jobs_per_minute": round(succeeded / wall_seconds * 60, 2) if wall_seconds else 0.0,
+        "latency_seconds": {
+            "min": round(min(latencies), 2) if latencies else 0.0,
+            "mean": round(sum(latencies) / succeeded, 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.5), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "max": round(max(latencies), 2) if latencies else 0.0
+        }
+    }
+
+
+async def run_job(job: dict, output_dir: str, context_mode: str,
+                  allow_duplicates: bool = False, checkpoint_path: str = None) -> dict:
+    """
+    Run the agent for one job; failures are returned, not raised.
+
+    Unless allow_duplicates is set, a job whose description is a near-duplicate
+    of one already processed is skipped before any LLM call, with status
+    "duplicate" and the original's id and output files. A near-duplicate of a
+    posting that is still running waits for it: it becomes a duplicate once
+    the original completes, and runs itself if the original fails or its
+    claim expires.
+
+    With checkpoint_path, the run is checkpointed in that database under the
+    job id, and a job with an unfinished checkpoint (a retry after a failure
+    or crash) resumes from it instead of repeating the finished nodes.
+    """
+    from main import (
+        aget_checkpointed_agent,
+        configure_caches,
+        create_initial_state,
+        get_resume_agent,
+        run_config
+    )
+    from dedup import get_duplicate_index
+    from telemetry import RunTelemetry, use_telemetry
+    from web_operations import fetch_job_description_from_url, sanitize_filename
+
+    # The duplicate index is needed before the graph (which also configures the caches)
+    configure_caches()
+
+    start = time.perf_counter()
+    result = {"id": job["id"], "url": job.get("url")}
+    telemetry = RunTelemetry(run_id=job["id"])
+    duplicates = None if allow_duplicates else get_duplicate_index()
+    claimed = False
+    try:
+        with use_telemetry(telemetry):
+            agent, config, resume = None, {"callbacks": [telemetry]}, False
+            if checkpoint_path is not None:
+                agent = await aget_checkpointed_agent(checkpoint_path)
+                config = run_config(job["id"], callbacks=[telemetry])
+                saved = await agent.aget_state(config)
+                resume = bool(saved.next)
+
+            job_description = saved.values["job_description"] if resume else job.get("job_description")
+            input_method = "text"
+            if not job_description:
+                job_description = await asyncio.to_thread(fetch_job_description_from_url, job["url"])
+                input_method = "url"
+
+            match = duplicates.claim(job["id"], job_description) if duplicates is not None else None
+            while match is not None and not match["completed"]:
+                await asyncio.sleep(DUPLICATE_POLL_INTERVAL)
+                match = duplicates.claim(job["id"], job_description)
+            if match is None:
+                claimed = duplicates is not None
+                # A None input continues from the last checkpoint
+                graph_input = None if resume else create_initial_state(
+                    job_description,
+                    input_method=input_method,
+                    job_url=job.get("url"),
+                    company_name=job.get("company_name"),
+                    context_mode=context_mode,
+                    output_dir=output_dir
+                )
+                final_state = await (agent or get_resume_agent()).ainvoke(graph_input, config=config)
+
+        if match is not None:
+            result.update({
+                "status": "duplicate",
+                "duplicate_of": match["key"],
+                "company_name": match["company_name"],
+                "output_files": match["output_files"]
+            })
+        else:
+            result.update({
+                "status": "ok",
+                "company_name": final_state.get("company_name"),
+                "output_files": final_state.get("output_files")
+            })
+            if claimed:
+                duplicates.complete(job["id"], result["company_name"], result["output_files"])
+    except asyncio.CancelledError:
+        if claimed:
+            duplicates.release(job["id"])
+        raise
+    except Exception as e:
+        if claimed:
+            duplicates.release(job["id"])
+        result.update({"status": "failed", "error": f"{type(e).__name__}: {e}"})
+
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    report_path = os.path.join(output_dir, "telemetry", f"{sanitize_filename(job['id'])}.json")
+    result["telemetry"] = telemetry.write_report(report_path)
+    return result
+
+
+async def run_batch(jobs: list, output_dir: str, concurrency: int = DEFAULT_CONCURRENCY,
+                    context_mode: str = DEFAULT_CONTEXT_MODE, progress=print,
+                    allow_duplicates: bool = False) -> dict:
+    """
+    Run the agent over many jobs with bounded concurrency.
+
+    Each job writes its files to its own subdirectory, <id>/, so postings for
+    the same company and title finishing in the same second don't overwrite
+    each other. Each result is appended to results.jsonl in output_dir as soon
+    as its job finishes, with its telemetry report in <id>/telemetry/<id>.json;
+    the summary is written to summary.json and the summed metrics to
+    metrics.prom at the end.
+
+    Args:
+        jobs: Jobs from load_jobs
+        output_dir: Directory for per-job subdirectories, results.jsonl and summary.json
+        concurrency: Maximum number of jobs running at once
+        context_mode: "tools" or "prefetch"
+        progress: Function called with one progress line per finished job
+        allow_duplicates: Run near-duplicates of already processed postings
+            instead of skipping them
+
+    Returns:
+        Batch summary
+    """
+    from rate_limiter import rate_limiter_stats
+    from telemetry import aggregate_reports, prometheus_text
+    from web_operations import sanitize_filename
+
+    os.makedirs(output_dir, exist_ok=True)
+    results_path = os.path.join(output_dir, "results.jsonl")
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+    reports = []
+
+    async def bounded(job):
+        async with semaphore:
+            return await run_job(job, os.path.join(output_dir, sanitize_filename(job["id"])),
+                                 context_mode, allow_duplicates)
+
+    start = time.perf_counter()
+    with open(results_path, "a", encoding="utf-8") as results_file:
+        for finished in asyncio.as_completed([bounded(job) for job in jobs]):
+            result = await finished
+            reports.append(result.pop("telemetry"))
+            results.append(result)
+            results_file.write(json.dumps(result) + "\n")
+            results_file.flush()
+
+            status = {"ok": "✓", "duplicate": "≈"}.get(result["status"], "✗")
+            detail = result.get("error") or (result.get("output_files") or {}).get("text_file")
+            if result["status"] == "duplicate":
+                detail = f"duplicate of {result['duplicate_of']}: {detail}"
+            progress(f"[{len(results)}/{len(jobs)}] {status} {result['id']} "
+                     f"({result['seconds']:.1f}s) {detail}")
+
+    summary = summarize(results, time.perf_counter() - start)
+    summary["rate_limits"] = rate_limiter_stats()
+    summary["telemetry"] = aggregate_reports(reports)
+    summary["token_usage"] = summary["telemetry"]["totals"]
+    with open(os.path.join(output_dir, "metrics.prom"), "w", encoding="utf-8") as f:
+        f.write(prometheus_text(reports))
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(
+        description="Tailor your resume and cover letter for many job descriptions."
+    )
+    parser.add_argument(
+        "input",
+        help="Directory of job description .txt files, or a .csv/.jsonl file "
+             "with a url or job_description column"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Maximum number of jobs running at once (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Where to write outputs, results.jsonl and summary.json "
+             "(default: outputs/batch_<timestamp>)"
+    )
+    parser.add_argument(
+        "--context-mode",
+        choices=CONTEXT_MODES,
+        default=DEFAULT_CONTEXT_MODE,
+        help="How nodes get CV/guide content (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=get_model_profiles(),
+        default=get_model_profile(),
+        help="Model routing profile from model_routing.json (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--allow-duplicates",
+        action="store_true",
+        help="Run postings that are near-duplicates of ones already processed "
+             "(they are skipped by default)"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Show every step of every job instead of one line per finished job"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run a batch from the command line."""
+    from usage_tracking import format_usage
+
+    args = parse_args(argv)
+    set_model_profile(args.profile)
+    jobs = load_jobs(args.input)
+    if not jobs:
+        print(f"No jobs found in {args.input}")
+        sys.exit(1)
+
+    output_dir = args.output_dir or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+
+    print("="*80)
+    print(f"BATCH: {len(jobs)} jobs, concurrency {args.concurrency}, "
+          f"context mode {args.context_mode}, model profile {args.profile}")
+    print(f"Results: {os.path.join(output_dir, 'results.jsonl')}")
+    print("="*80)
+
+    # Interleaved step banners from concurrent jobs are unreadable, so they are
+    # suppressed unless --verbose; progress lines always go to the terminal
+    progress = lambda line: print(line, file=sys.__stdout__, flush=True)
+    with open(os.devnull, "w") as devnull, \
+            (contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)):
+        summary = asyncio.run(run_batch(
+            jobs, output_dir,
+            concurrency=args.concurrency,
+            context_mode=args.context_mode,
+            progress=progress,
+            allow_duplicates=args.allow_duplicates
+        ))
+
+    latency = summary["latency_seconds"]
+    print("\n" + "="*80)
+    print("BATCH COMPLETE")
+    print("="*80)
+    print(f"Jobs:        {summary['succeeded']} succeeded, {summary['failed']} failed, "
+          f"{summary['duplicates']} skipped as duplicates")
+    print(f"Wall time:   {summary['wall_seconds']:.1f}s")
+    print(f"Throughput:  {summary['jobs_per_minute']:.2f} jobs/minute")
+    print(f"Latency:     p50 {latency['p50']:.1f}s, p95 {latency['p95']:.1f}s, "
+          f"mean {latency['mean']:.1f}s, max {latency['max']:.1f}s")
+    throttled = sum(stats["throttled"] for stats in summary["rate_limits"].values())
+    print(f"Rate limits: {throttled} 429 responses")
+    print(f"Tokens:      {format_usage(summary['token_usage'])}")
+    print(f"Cost:        ~${summary['token_usage']['cost_usd']:.4f} (estimated)")
+    print(f"Summary:     {os.path.join(output_dir, 'summary.json')}")
+    print("="*80)
+
+    sys.exit(0 if summary["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
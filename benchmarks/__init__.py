@@ -0,0 +1,12 @@
+"""
+Offline benchmarks for the Resume Tailoring Agent.
+
+  - fakes.py: deterministic fake chat model and embeddings
+  - micro.py: non-LLM hot paths (HTML parsing, company extraction, JD
+    compression, chunking, PDF layout and generation)
+  - graph.py: full graph runs - orchestration overhead and concurrency scaling
+  - startup.py: cold-start time of main/cli/batch and first use of the lazy factories
+
+Run with `python -m benchmarks.micro`, `python -m benchmarks.graph` and
+`python -m benchmarks.startup`.
+"""
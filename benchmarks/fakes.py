@@ -0,0 +1,182 @@
+"""
+Deterministic stand-ins for the OpenAI chat model and embeddings.
+
+FakeChatModel answers each graph node with canned text after a configurable
+delay. When tools are bound (tools context mode), its first response to a
+node is a scripted set of tool calls, so the tool loop runs as it would
+against the API. FakeEmbeddings returns hash-based vectors.
+
+install_fakes() plugs both into model_routing and rag_setup; call it before
+the first run (the chat clients, vector store and retriever tools are
+created on first use).
+"""
+import asyncio
+import tempfile
+import time
+from typing import Any, Optional
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field
+
+import model_routing
+import rag_setup
+
+FAKE_COMPANY = "Acme Analytics"
+
+# Canned answers by graph node (the company extractor runs in
+# get_job_description, the condense calls in check_resume_length)
+DEFAULT_RESPONSES = {
+    "get_job_description": FAKE_COMPANY,
+    "analyze_keywords": (
+        "1. Technical skills: Python, SQL, Spark, Airflow, AWS, dbt\n"
+        "2. Soft skills: stakeholder communication, mentoring, ownership\n"
+        "3. Qualifications: 5+ years in data engineering, BSc in Computer Science\n"
+        "4. Role focus: batch and streaming data pipelines for analytics"
+    ),
+    "tailor_summary": (
+        "PARAGRAPH FORMAT:\nData engineer with seven years of experience building reliable "
+        "batch and streaming pipelines in Python, SQL and Spark on AWS.\n\n"
+        "BULLET POINT FORMAT:\n• 7 years building data platforms\n• Python, SQL, Spark, Airflow\n"
+        "• Streaming and batch pipelines on AWS\n• Mentor and cross-team partner"
+    ),
+    "tailor_skills": (
+        "Languages: Python, SQL, Scala\nData: Spark, Airflow, dbt, Kafka\n"
+        "Cloud: AWS (S3, Glue, EMR, Redshift)\nPractices: CI/CD, data quality, testing"
+    ),
+    "tailor_experience": "\n".join(
+        f"• Built and operated pipeline {i} processing 2TB/day with Spark and Airflow, "
+        f"cutting data latency by {10 + i}%" for i in range(1, 9)
+    ),
+    "tailor_name_desc": "Jane Doe\nSenior Data Engineer | Python, Spark & AWS",
+    "check_resume_length": "• Built Spark and Airflow pipelines processing 2TB/day",
+    "generate_cover_letter": "\n\n".join(
+        ["Dear Hiring Team,"]
+        + [f"Paragraph {i}: my experience with Python, Spark and AWS data platforms "
+           f"matches what {FAKE_COMPANY} is looking for. " * 4 for i in range(1, 5)]
+        + ["Kind regards,\nJane Doe"]
+    ),
+    "generate_interest_answer": (
+        f"I am interested in this position at {FAKE_COMPANY} because the team's focus on "
+        "reliable analytics pipelines matches the work I enjoy most."
+    ),
+}
+
+# Tool calls returned on a node's first round when tools are bound
+DEFAULT_TOOL_CALLS = {
+    "generate_cover_letter": [
+        ("retrieve_cv_content", "data engineering experience"),
+        ("retrieve_cover_letter_guide", "cover letter structure"),
+    ],
+}
+DEFAULT_NODE_TOOL_CALLS = [("retrieve_cv_content", "experience and skills")]
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with canned, per-node answers and scripted tool calls."""
+
+    latency: float = 0.0
+    responses: dict = Field(default_factory=lambda: dict(DEFAULT_RESPONSES))
+    tool_calls: dict = Field(default_factory=lambda: dict(DEFAULT_TOOL_CALLS))
+    model_name: str = "fake-chat"
+    # Bypass the global LLM response cache, so every call costs `latency`
+    cache: Optional[bool] = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools],
+                         tool_choice=tool_choice, **kwargs)
+
+    def _respond(self, messages, run_manager, tools=None, tool_choice=None) -> ChatResult:
+        node = ((run_manager.metadata if run_manager else None) or {}).get("langgraph_node", "")
+        tool_names = {tool["function"]["name"] for tool in tools or []}
+        first_round = not any(isinstance(message, ToolMessage) for message in messages)
+
+        if tool_names and tool_choice != "none" and first_round:
+            calls = [
+                {"name": name, "args": {"query": query}, "id": f"call_{node}_{i}"}
+                for i, (name, query) in enumerate(self.tool_calls.get(node, DEFAULT_NODE_TOOL_CALLS))
+                if name in tool_names
+            ]
+            if calls:
+                message = AIMessage(content="", tool_calls=calls)
+                return self._result(messages, message)
+
+        return self._result(messages, AIMessage(content=self.responses.get(node, f"Fake answer for {node}")))
+
+    def _result(self, messages, message: AIMessage) -> ChatResult:
+        input_tokens = sum(_estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = _estimate_tokens(str(message.content))
+        message.usage_metadata = {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                                  "total_tokens": input_tokens + output_tokens}
+        message.response_metadata = {"model_name": self.model_name}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages, run_manager, kwargs.get("tools"), kwargs.get("tool_choice"))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages, run_manager, kwargs.get("tools"), kwargs.get("tool_choice"))
+
+
+class FakeEmbeddings(DeterministicFakeEmbedding):
+    """Hash-based embeddings with a per-request delay."""
+
+    latency: float = 0.0
+
+    def embed_documents(self, texts: list) -> list:
+        if self.latency:
+            time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> list:
+        if self.latency:
+            time.sleep(self.latency)
+        return super().embed_query(text)
+
+    async def aembed_documents(self, texts: list) -> list:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return super().embed_query(text)
+
+
+def install_fakes(latency: float = 0.0, embedding_latency: float = 0.0,
+                  persist_directory: str = None) -> FakeChatModel:
+    """
+    Route every LLM step to a FakeChatModel and retrieval to FakeEmbeddings.
+
+    Args:
+        latency: Seconds each chat call takes
+        embedding_latency: Seconds each embedding request takes
+        persist_directory: Chroma directory for the fake-embedding vector
+            store (a new temporary directory by default)
+
+    Returns:
+        The shared FakeChatModel (its latency can be changed between runs)
+    """
+    chat_model = FakeChatModel(latency=latency)
+    model_routing.set_chat_model_factory(lambda settings: chat_model)
+    rag_setup.use_embeddings(
+        FakeEmbeddings(size=256, latency=embedding_latency),
+        persist_directory or tempfile.mkdtemp(prefix="bench_chroma_")
+    )
+    return chat_model
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Graph-level benchmarks on the fake chat model.
+
+    python -m benchmarks.graph [--runs 20] [--latency 0.2] [--concurrency 1 4 16]
+                               [--context-mode tools] [--json results.json]
+
+Two measurements:
+  - Orchestration overhead: runs with zero model latency, so the time is
+    LangGraph, prompt building, retrieval on fake embeddings, the layout
+    check and writing the outputs. Reported per run and per node.
+  - Concurrency scaling: the same number of runs at a fixed model latency,
+    on one event loop with different concurrency limits (as batch.py runs
+    them). Speedup is relative to concurrency 1; efficiency is speedup per
+    unit of concurrency.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.fakes import install_fakes
+from benchmarks.timing import print_table, write_json
+
+JOB_DESCRIPTION = """Senior Data Engineer
+Acme Analytics is hiring a Senior Data Engineer to build our batch and streaming pipelines.
+
+Responsibilities:
+- Design, build and operate pipelines processing terabytes per day
+- Partner with analysts and data scientists on data models
+- Mentor engineers and improve data quality practices
+
+Requirements:
+- 5+ years of Python and SQL
+- Apache Spark, Airflow and dbt
+- AWS (S3, Glue, EMR, Redshift)
+- Kafka or another streaming platform
+"""
+
+DEFAULT_CONCURRENCY_LEVELS = [1, 2, 4, 8, 16]
+
+
+def _initial_state(main, context_mode: str, output_dir: str) -> dict:
+    return main.create_initial_state(JOB_DESCRIPTION, company_name="Acme Analytics",
+                                     context_mode=context_mode, output_dir=output_dir)
+
+
+def measure_overhead(main, runs: int, context_mode: str, output_dir: str) -> dict:
+    """Sequential runs with zero model latency; returns per-run and per-node times."""
+    from telemetry import RunTelemetry, aggregate_reports
+
+    durations, reports = [], []
+    for _ in range(runs):
+        telemetry = RunTelemetry()
+        start = time.perf_counter()
+        main.resume_agent.invoke(_initial_state(main, context_mode, output_dir),
+                                 config={"callbacks": [telemetry]})
+        durations.append(time.perf_counter() - start)
+        reports.append(telemetry.report())
+
+    nodes = aggregate_reports(reports)["nodes"]
+    return {
+        "runs": runs,
+        "median_ms": round(statistics.median(durations) * 1000, 2),
+        "best_ms": round(min(durations) * 1000, 2),
+        "llm_calls_per_run": reports[-1]["totals"]["calls"],
+        "node_ms": {node: round(stats["seconds"] / runs * 1000, 2)
+                    for node, stats in sorted(nodes.items(), key=lambda item: -item[1]["seconds"])},
+    }
+
+
+async def _run_concurrently(main, runs: int, concurrency: int, context_mode: str, output_dir: str) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await main.resume_agent.ainvoke(_initial_state(main, context_mode, output_dir))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(runs)))
+    return time.perf_counter() - start
+
+
+def measure_scaling(main, runs: int, levels: list, context_mode: str, output_dir: str) -> list:
+    """Wall time of `runs` runs at each concurrency level."""
+    results = []
+    for concurrency in levels:
+        wall = asyncio.run(_run_concurrently(main, runs, concurrency, context_mode, output_dir))
+        results.append({"concurrency": concurrency, "wall_seconds": round(wall, 2),
+                        "runs_per_minute": round(runs / wall * 60, 1)})
+    baseline = results[0]["wall_seconds"]
+    for result in results:
+        speedup = baseline / result["wall_seconds"]
+        result["speedup"] = round(speedup, 2)
+        result["efficiency"] = round(speedup / result["concurrency"] * levels[0], 2)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Graph-level benchmarks on the fake chat model")
+    parser.add_argument("--runs", type=int, default=20, help="Runs per measurement (default: 20)")
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="Seconds per fake chat call for the scaling runs (default: 0.2)")
+    parser.add_argument("--embedding-latency", type=float, default=0.0,
+                        help="Seconds per fake embedding request (default: 0)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY_LEVELS,
+                        help="Concurrency levels for the scaling runs")
+    parser.add_argument("--context-mode", choices=["tools", "prefetch"], default="tools")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    fake = install_fakes(embedding_latency=args.embedding_latency)
+    import main as agent_main
+    agent_main.configure_caches()  # Environment defaults first; replaced below
+    from llm_cache import disable_llm_cache
+    from semantic_cache import disable_semantic_cache
+    disable_llm_cache()
+    disable_semantic_cache()
+
+    output_dir = tempfile.mkdtemp(prefix="bench_graph_")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # Warm-up run builds the fake-embedding vector store
+        agent_main.resume_agent.invoke(_initial_state(agent_main, args.context_mode, output_dir))
+        overhead = measure_overhead(agent_main, args.runs, args.context_mode, output_dir)
+        fake.latency = args.latency
+        scaling = measure_scaling(agent_main, args.runs, args.concurrency, args.context_mode, output_dir)
+
+    print_table(f"ORCHESTRATION OVERHEAD ({args.context_mode} mode, zero model latency, "
+                f"{overhead['llm_calls_per_run']} LLM calls per run)",
+                [{"node": "(whole run)", "ms_per_run": overhead["median_ms"]}]
+                + [{"node": node, "ms_per_run": ms} for node, ms in overhead["node_ms"].items()],
+                ["node", "ms_per_run"])
+    print_table(f"CONCURRENCY SCALING ({args.runs} runs, {args.latency}s per LLM call)",
+                scaling, ["concurrency", "wall_seconds", "runs_per_minute", "speedup", "efficiency"])
+
+    if args.json:
+        write_json(args.json, {"settings": vars(args), "overhead": overhead, "scaling": scaling})
+
+
+if __name__ == "__main__":
+    main()
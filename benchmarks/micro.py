@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the non-LLM hot paths.
+
+    python -m benchmarks.micro [--repeat 5] [--filter pdf] [--json results.json]
+
+Job pages come from the saved HTML fixtures in benchmarks/fixtures; LLM
+calls (the company extractor) go to the fake chat model with no latency, so
+only the local work is measured.
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+
+from benchmarks.fakes import DEFAULT_RESPONSES, install_fakes
+from benchmarks.timing import measure, print_table, write_json
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixtures() -> dict:
+    """Saved job pages by file name."""
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, "rb") as f:
+            fixtures[os.path.basename(path)] = f.read()
+    return fixtures
+
+
+def build_cases() -> list:
+    """(name, function) pairs to time."""
+    install_fakes()
+
+    from langchain_community.document_loaders import PyPDFLoader
+    from jd_compressor import compress_job_description
+    from pdf_operations import create_tailored_cv_pdf, measure_cv_layout
+    from rag_setup import COVER_LETTER_GUIDE_PATH, CV_PATH, chunk_pages
+    from web_operations import (
+        extract_company_name_from_text,
+        extract_company_name_with_patterns,
+        parse_job_description_html
+    )
+
+    cases = []
+    texts = {}
+    for name, html in load_fixtures().items():
+        texts[name] = parse_job_description_html(html)
+        cases.append((f"parse_job_description_html[{name}]",
+                      lambda html=html: parse_job_description_html(html)))
+
+    for name, text in texts.items():
+        cases.append((f"extract_company_name_with_patterns[{name}]",
+                      lambda text=text: extract_company_name_with_patterns(text)))
+    first_text = next(iter(texts.values()))
+    cases.append(("extract_company_name_from_text[fake LLM]",
+                  lambda: extract_company_name_from_text(first_text)))
+    # The memoized wrapper would only measure a cache lookup
+    cases.append(("compress_job_description[uncached]",
+                  lambda: compress_job_description.__wrapped__(first_text)))
+
+    cv_pages = PyPDFLoader(CV_PATH).load()
+    guide_pages = PyPDFLoader(COVER_LETTER_GUIDE_PATH).load()
+    cases.append(("load CV PDF", lambda: PyPDFLoader(CV_PATH).load()))
+    cases.append(("chunk_pages[CV]", lambda: chunk_pages(cv_pages, "cv")))
+    cases.append(("chunk_pages[guide]", lambda: chunk_pages(guide_pages, "cover_letter_guide")))
+
+    sections = [DEFAULT_RESPONSES[key] for key in
+                ("tailor_name_desc", "tailor_summary", "tailor_skills", "tailor_experience")]
+    output_dir = tempfile.mkdtemp(prefix="bench_pdf_")
+    cases.append(("measure_cv_layout", lambda: measure_cv_layout(*sections)))
+    cases.append(("create_tailored_cv_pdf",
+                  lambda: create_tailored_cv_pdf(output_dir, "Acme", "Data Engineer", *sections)))
+    return cases
+
+
+def run(repeat: int = 5, name_filter: str = None) -> list:
+    """Time every case (optionally only those whose name contains name_filter)."""
+    results = []
+    for name, fn in build_cases():
+        if name_filter and name_filter not in name:
+            continue
+        # Keep the functions' own progress output out of the results
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                timing = measure(fn, repeat=repeat)
+            finally:
+                sys.stdout = stdout
+        results.append({"case": name, **timing})
+        print(f"  {name}: {timing['median_ms']:.3f} ms")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the non-LLM hot paths")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per case (default: 5)")
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat, args.filter)
+    print_table("MICROBENCHMARKS (per call)", results, ["case", "median_ms", "best_ms", "calls_per_sample"])
+    if args.json:
+        write_json(args.json, {"micro": results})
+
+
+if __name__ == "__main__":
+    main()
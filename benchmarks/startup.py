@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark.
+
+    python -m benchmarks.startup [--repeat 5] [--json results.json]
+
+Cold start: each command runs in a fresh interpreter without OPENAI_API_KEY
+(nothing should need it before the first request). First use: the lazy
+factories - cache configuration, compiled graph, chat client, vector store
+build and reopen, on the fake embeddings - timed once each in this process.
+The caches are opened in a temporary directory, not .cache/.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.timing import print_table, write_json
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLD_START_COMMANDS = [
+    ("python -c 'import main'", [sys.executable, "-c", "import main"]),
+    ("import main; main.configure_caches()",
+     [sys.executable, "-c", "import main; main.configure_caches()"]),
+    ("python cli.py --help", [sys.executable, "cli.py", "--help"]),
+    ("python batch.py --help", [sys.executable, "batch.py", "--help"]),
+    ("python -c 'pass' (interpreter)", [sys.executable, "-c", "pass"]),
+]
+
+
+def cache_env(directory: str) -> dict:
+    """Environment variables placing the LLM, semantic, duplicate and embedding caches in a directory."""
+    return {
+        "LLM_CACHE_PATH": os.path.join(directory, "llm_cache.sqlite"),
+        "SEMANTIC_CACHE_PATH": os.path.join(directory, "semantic_cache.sqlite"),
+        "DEDUP_INDEX_PATH": os.path.join(directory, "duplicates.sqlite"),
+        "EMBEDDING_CACHE_DIR": os.path.join(directory, "embeddings"),
+    }
+
+
+def measure_cold_start(repeat: int) -> list:
+    """Median and best wall time of each command in a fresh process."""
+    env = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    env.update(cache_env(tempfile.mkdtemp(prefix="bench_startup_")))
+    results = []
+    for name, command in COLD_START_COMMANDS:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            completed = subprocess.run(command, cwd=REPO_DIR, env=env, capture_output=True)
+            samples.append(time.perf_counter() - start)
+        results.append({
+            "command": name,
+            "median_s": round(statistics.median(samples), 3),
+            "best_s": round(min(samples), 3),
+            "exit_code": completed.returncode,
+        })
+    return results
+
+
+def measure_first_use() -> list:
+    """Time each lazy factory's first call (with the fake chat model and embeddings)."""
+    # The chat client needs a key to be constructed; no request is sent
+    os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+    os.environ.update(cache_env(tempfile.mkdtemp(prefix="bench_startup_")))
+    from benchmarks.fakes import install_fakes
+
+    results = []
+
+    def timed(name, fn):
+        start = time.perf_counter()
+        fn()
+        results.append({"step": name, "seconds": round(time.perf_counter() - start, 3)})
+
+    timed("import main", lambda: __import__("main"))
+    import main
+    import model_routing
+    import rag_setup
+
+    timed("configure_caches() (open the LLM, semantic, duplicate and embedding caches)",
+          main.configure_caches)
+    timed("get_resume_agent() (build and compile graph)", main.get_resume_agent)
+    timed("get_llm() (OpenAI chat client)", lambda: model_routing.get_llm("tailor_summary"))
+    install_fakes()
+    timed("get_vectorstore() (build on fake embeddings)", rag_setup.get_vectorstore)
+    # Same embeddings and directory: the next call reopens the persisted store
+    rag_setup.use_embeddings(rag_setup.get_embeddings(), rag_setup.PERSIST_DIRECTORY)
+    timed("get_vectorstore() (open existing store)", rag_setup.get_vectorstore)
+    timed("get_retriever_tools()", rag_setup.get_retriever_tools)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup-time benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per command (default: 5)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    cold_start = measure_cold_start(args.repeat)
+    first_use = measure_first_use()
+
+    print_table(f"COLD START ({args.repeat} runs each, no OPENAI_API_KEY)", cold_start,
+                ["command", "median_s", "best_s", "exit_code"])
+    print_table("FIRST USE OF LAZY FACTORIES", first_use, ["step", "seconds"])
+
+    if args.json:
+        write_json(args.json, {"cold_start": cold_start, "first_use": first_use})
+
+
+if __name__ == "__main__":
+    main()
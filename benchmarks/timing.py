@@ -0,0 +1,58 @@
+"""
+Timing helpers shared by the benchmarks.
+"""
+import json
+import statistics
+import time
+
+# Each measurement repeats the function until at least this much time passed
+MIN_SAMPLE_SECONDS = 0.2
+
+
+def measure(fn, repeat: int = 5) -> dict:
+    """
+    Time a function like timeit: calls per sample are scaled so one sample
+    takes at least MIN_SAMPLE_SECONDS, and `repeat` samples are taken.
+
+    Returns:
+        Dictionary with per-call best_ms, median_ms and the number of calls per sample
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SAMPLE_SECONDS or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < MIN_SAMPLE_SECONDS / 10 else 2
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "best_ms": round(min(samples) * 1000, 4),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+        "calls_per_sample": number,
+    }
+
+
+def print_table(title: str, rows: list, columns: list):
+    """Print rows (dicts) as an aligned table with the given columns."""
+    print("\n" + "="*80)
+    print(title)
+    print("="*80)
+    widths = [max(len(column), *(len(str(row.get(column, ""))) for row in rows)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row.get(column, "")).ljust(width) for column, width in zip(columns, widths)))
+
+
+def write_json(path: str, results: dict):
+    """Write benchmark results as JSON (for comparing runs)."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {path}")
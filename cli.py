@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 """
 CLI interface for the Resume and Cover Letter Tailoring Agent.
+
+The agent modules (LangGraph, LangChain, the OpenAI client) are imported
+after the arguments are parsed, so --help and argument errors are instant.
 """
-from main import resume_agent
-from web_operations import fetch_job_description_from_url
+from settings import CONTEXT_MODES, DEFAULT_CONTEXT_MODE, DEFAULT_OUTPUT_DIR
+from model_routing import get_model_profile, get_model_profiles, set_model_profile
+import argparse
+import os
 import sys
 
 
@@ -27,8 +32,27 @@ def print_header():
     print("\n" + "="*80 + "\n")
 
 
-def get_job_description_input():
-    """Get job description from user via text or URL."""
+def get_job_description_input(speculate=None):
+    """
+    Get job description from user via text or URL.
+    
+    Args:
+        speculate: Optional callable(job_description, job_url) that starts
+            work on a job description as soon as it is available and returns
+            a handle with cancel(); called again if the user rejects it
+    
+    Returns:
+        Tuple of (job description, input method, URL or None, handle or None)
+    """
+    from web_operations import fetch_job_description_from_url
+    
+    def start(job_description, job_url=None):
+        return speculate(job_description, job_url) if speculate else None
+    
+    def discard(speculation):
+        if speculation is not None:
+            speculation.cancel()
+    
     print("How would you like to provide the job description?")
     print("  1. Paste the text directly")
     print("  2. Provide a URL to the job posting")
@@ -55,13 +79,15 @@ def get_job_description_input():
                 print("\n⚠ No job description provided. Please try again.\n")
                 continue
             
+            speculation = start(job_description)
             if len(job_description) < 100:
                 print(f"\n⚠ Job description seems very short ({len(job_description)} characters).")
                 confirm = input("Are you sure this is complete? (y/n): ").strip().lower()
                 if confirm != 'y':
+                    discard(speculation)
                     continue
             
-            return job_description, "text", None  # Return None for URL
+            return job_description, "text", None, speculation  # Return None for URL
         
         elif choice == "2":
             url = input("\nEnter the URL of the job posting: ").strip()
@@ -84,10 +110,12 @@ def get_job_description_input():
                 print(job_description[:500] + "...")
                 print("-"*80)
                 
+                speculation = start(job_description, url)
                 confirm = input("\nDoes this look correct? (y/n): ").strip().lower()
                 if confirm == 'y':
-                    return job_description, "url", url  # Return the URL
+                    return job_description, "url", url, speculation  # Return the URL
                 else:
+                    discard(speculation)
                     print("\nLet's try again...\n")
                     continue
                     
@@ -117,6 +145,16 @@ def get_company_name():
     return company if company else None
 
 
+def confirm_duplicate(match: dict) -> bool:
+    """Warn about a near-duplicate of an already processed posting; True to run anyway."""
+    from dedup import describe_duplicate
+    
+    print("\n" + "-"*80)
+    print(f"⚠ This posting looks like a {describe_duplicate(match)}")
+    print("-"*80)
+    return input("Tailor for it again anyway? (y/n): ").strip().lower() == 'y'
+
+
 def confirm_start():
     """Confirm before starting the processing."""
     print("\n" + "="*80)
@@ -129,41 +167,212 @@ def confirm_start():
     input("\nPress Enter to start...")
 
 
-def run_agent():
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(
+        description="Tailor your resume and cover letter to a job description."
+    )
+    parser.add_argument(
+        "--context-mode",
+        choices=CONTEXT_MODES,
+        default=DEFAULT_CONTEXT_MODE,
+        help="How nodes get CV/guide content: 'tools' lets the model call the "
+             "retriever tools in every node; 'prefetch' retrieves once per run "
+             "and inlines it, halving LLM calls (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=get_model_profiles(),
+        default=get_model_profile(),
+        help="Model routing profile from model_routing.json: 'quality' uses the "
+             "large model everywhere, 'fast' uses a small model on lightweight "
+             "steps (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't read or write the on-disk LLM response cache"
+    )
+    parser.add_argument(
+        "--no-semantic-cache",
+        action="store_true",
+        help="Always generate fresh outputs, even for a near-identical past posting"
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Resume a failed or interrupted run from its last checkpoint, "
+             "re-executing only the steps that didn't finish"
+    )
+    parser.add_argument(
+        "--allow-duplicates",
+        action="store_true",
+        help="Don't check whether the posting is a near-duplicate of one already processed"
+    )
+    parser.add_argument(
+        "--no-speculate",
+        action="store_true",
+        help="Don't start company extraction and keyword analysis in the "
+             "background while you confirm the inputs"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print each section as it is written and save drafts incrementally, "
+             "instead of waiting for the whole run"
+    )
+    return parser.parse_args(argv)
+
+
+def print_resume_hint(thread_id: str):
+    """Tell the user how to continue a run from its last checkpoint."""
+    print(f"\nProgress up to the last completed step was saved (run ID: {thread_id}).")
+    print(f"Resume with: python cli.py --resume {thread_id}\n")
+
+
+def print_cache_stats(usage):
+    """Print LLM response, embedding, retrieval and prompt cache statistics for this run."""
+    from embedding_cache import get_embedding_cache
+    from llm_cache import get_llm_cache
+    from retrieval_cache import retrieval_cache_stats
+    from usage_tracking import format_usage
+    
+    summary = usage.summary()
+    if summary["calls"]:
+        print(f"\n  Prompt cache: {format_usage(summary)}")
+    
+    cache = get_llm_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(f"\n  LLM cache:   {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['entries']} cached responses)")
+    
+    embedding_cache = get_embedding_cache()
+    if embedding_cache is not None and (embedding_cache.hits or embedding_cache.misses):
+        stats = embedding_cache.stats()
+        print(f"  Embeddings:  {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['entries']} cached vectors)")
+    
+    retrieval = retrieval_cache_stats()
+    for name, label in (("query_embeddings", "Query embeddings"), ("tool_results", "Retrieval results")):
+        stats = retrieval[name]
+        if stats["hits"] or stats["misses"]:
+            print(f"  {label}: {stats['hits']} of {stats['hits'] + stats['misses']} "
+                  f"served from memory ({stats['hit_rate']:.0%})")
+
+
+def write_telemetry(telemetry):
+    """Write the run's JSON telemetry report and Prometheus metrics file."""
+    from telemetry import print_telemetry, prometheus_text
+    
+    path = os.path.join(DEFAULT_OUTPUT_DIR, "telemetry", f"{telemetry.run_id}.json")
+    report = telemetry.write_report(path)
+    with open(path[:-len(".json")] + ".prom", "w", encoding="utf-8") as f:
+        f.write(prometheus_text([report]))
+    print_telemetry(report)
+    print(f"               Report: {path}")
+
+
+def run_agent(args=None):
     """Main function to run the CLI agent."""
-    print_header()
-    
-    # Get job description
-    job_description, input_method, job_url = get_job_description_input()
-    
-    # Optionally get company name
-    company_name = get_company_name()
-    
-    # Confirm start
-    confirm_start()
-    
-    # Prepare initial state
-    initial_state = {
-        "messages": [],
-        "job_description": job_description,
-        "input_method": input_method,
-        "job_url": job_url,  # Add the URL to state
-        "company_name": company_name,
-        "keywords_analysis": None,
-        "tailored_summary": None,
-        "tailored_skills": None,
-        "tailored_experience": None,
-        "tailored_name_desc": None,
-        "length_check_result": None,
-        "cover_letter": None,
-        "interest_answer": None,
-        "output_files": None
-    }
+    if args is None:
+        args = parse_args()
+    
+    from dedup import get_duplicate_index
+    from main import (
+        configure_caches,
+        create_initial_state,
+        get_checkpointed_agent,
+        get_pending_nodes,
+        new_thread_id,
+        run_config
+    )
+    from llm_cache import disable_llm_cache
+    from semantic_cache import disable_semantic_cache
+    from speculation import SpeculativeRun
+    from streaming import stream_run
+    from telemetry import RunTelemetry, use_telemetry
+    
+    # Cache defaults from the environment first, so the options below override them
+    configure_caches()
+    if args.no_cache:
+        disable_llm_cache()
+    set_model_profile(args.profile)
+    if args.no_semantic_cache:
+        disable_semantic_cache()
+    
+    agent = get_checkpointed_agent()
+    telemetry = RunTelemetry()
+    duplicates = None if args.allow_duplicates else get_duplicate_index()
+    job_description = None
+    
+    if args.resume:
+        thread_id = args.resume
+        pending = get_pending_nodes(agent, thread_id)
+        if not pending:
+            print(f"\n⚠ Nothing to resume for run {thread_id} (finished or unknown run ID).\n")
+            sys.exit(1)
+        
+        print(f"\nResuming run {thread_id} (remaining: {', '.join(pending)})")
+        # A None input continues from the last checkpoint; the posting is read
+        # back from it so the finished run is still added to the duplicate index
+        graph_input = None
+        job_description = agent.get_state(run_config(thread_id)).values.get("job_description")
+    else:
+        print_header()
+        
+        def speculate(job_description, job_url):
+            if duplicates is not None and duplicates.find(job_description):
+                # Don't spend tokens before the user decides on the duplicate
+                return None
+            # Company extraction and keyword analysis overlap the prompts below
+            return SpeculativeRun(job_description, job_url, args.context_mode,
+                                  callbacks=[telemetry]).start()
+        
+        # Get job description
+        with use_telemetry(telemetry):
+            job_description, input_method, job_url, speculation = get_job_description_input(
+                speculate=None if args.no_speculate else speculate
+            )
+        
+        match = duplicates.find(job_description) if duplicates is not None else None
+        if match is not None and not confirm_duplicate(match):
+            print("\nSkipped - no new outputs were written.\n")
+            return
+        
+        # Optionally get company name
+        company_name = get_company_name()
+        
+        # Confirm start
+        confirm_start()
+        
+        # Prepare initial state
+        graph_input = create_initial_state(
+            job_description,
+            input_method=input_method,
+            job_url=job_url,
+            company_name=company_name,
+            context_mode=args.context_mode
+        )
+        if speculation is not None:
+            speculation.adopt(graph_input)
+        thread_id = new_thread_id()
+        print(f"\nRun ID: {thread_id} (state is checkpointed after every step)")
+    
+    drafts_dir = os.path.join(DEFAULT_OUTPUT_DIR, "drafts", thread_id)
+    telemetry.run_id = thread_id
+    config = run_config(thread_id, callbacks=[telemetry])
     
     # Run the agent
     try:
         print("\n")
-        final_state = resume_agent.invoke(initial_state)
+        if args.stream:
+            print(f"Streaming sections as they are written (drafts: {drafts_dir})")
+            final_state, streamer = stream_run(agent, graph_input, config, drafts_dir)
+            if streamer.first_output_seconds is not None:
+                print(f"\n  First output after {streamer.first_output_seconds:.1f}s")
+        else:
+            final_state = agent.invoke(graph_input, config=config)
         
         # Print summary
         print("\n" + "="*80)
@@ -182,6 +391,13 @@ def run_agent():
             print(f"\n  Position:    {files.get('position', 'N/A')}")
             print(f"  Company:     {final_state.get('company_name', 'N/A')}")
         
+        if duplicates is not None and job_description and final_state.get("output_files"):
+            duplicates.add(thread_id, job_description, final_state.get("company_name"),
+                           final_state["output_files"])
+        
+        print_cache_stats(telemetry)
+        write_telemetry(telemetry)
+        
         print("\n" + "="*80)
         print("\nThank you for using the Resume Tailoring Agent!")
         print("Good luck with your application! 🎉")
@@ -189,7 +405,9 @@ def run_agent():
         
     except KeyboardInterrupt:
         print("\n\n⚠ Process interrupted by user.")
-        print("No files were saved.\n")
+        if args.stream:
+            print(f"Partial drafts are in {drafts_dir}")
+        print_resume_hint(thread_id)
         sys.exit(1)
         
     except Exception as e:
@@ -199,6 +417,7 @@ def run_agent():
         print("  - Your .env file contains a valid OPENAI_API_KEY")
         print("  - The CV and cover letter guide PDFs are in the literature/ folder")
         print("  - You have internet connectivity")
+        print_resume_hint(thread_id)
         sys.exit(1)
 
 
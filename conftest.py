@@ -0,0 +1,83 @@
+"""
+Shared pytest fixtures.
+"""
+import os
+import shutil
+import tempfile
+import pytest
+
+_saved_environment = {}
+_cache_directory = None
+
+
+def pytest_configure(config):
+    """
+    Point every cache, the checkpoints and the job queue at a temporary directory.
+
+    This runs before test modules are imported, so a module that runs the
+    agent at import (debug_test.py), a test on the real models
+    (test_agent.py) or a CLI run in a subprocess never opens the real
+    .cache/ files either.
+    """
+    global _cache_directory
+    from benchmarks.startup import cache_env
+
+    _cache_directory = tempfile.mkdtemp(prefix="resume_agent_tests_")
+    environment = {
+        **cache_env(_cache_directory),
+        "RESUME_AGENT_CHECKPOINT_PATH": os.path.join(_cache_directory, "checkpoints.sqlite"),
+        "RESUME_AGENT_QUEUE_PATH": os.path.join(_cache_directory, "job_queue.sqlite"),
+    }
+    for key, value in environment.items():
+        _saved_environment[key] = os.environ.get(key)
+        os.environ[key] = value
+
+
+def pytest_unconfigure(config):
+    for key, value in _saved_environment.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+    if _cache_directory is not None:
+        shutil.rmtree(_cache_directory, ignore_errors=True)
+
+
+@pytest.fixture(scope="module")
+def agent_main(tmp_path_factory):
+    """
+    The main module running on the fake chat model and embeddings.
+
+    The caches are set up in place of main.configure_caches(), so nothing
+    opens the real .cache/ files: the embedding cache and fake-embedding
+    vector store live in a temporary directory, and the LLM cache, semantic
+    cache and duplicate index are disabled so every run goes through the
+    graph (tests that need the duplicate index enable it on a tmp_path).
+    """
+    import dedup
+    import embedding_cache
+    import llm_cache
+    import main
+    import model_routing
+    import rag_setup
+    import semantic_cache
+    from benchmarks.fakes import install_fakes
+
+    saved_embeddings = rag_setup._embeddings, rag_setup.PERSIST_DIRECTORY
+    saved_caches = (main._caches_configured, llm_cache._llm_cache, semantic_cache._semantic_cache,
+                    dedup._duplicate_index, embedding_cache._embedding_cache)
+
+    directory = tmp_path_factory.mktemp("caches")
+    install_fakes(persist_directory=str(directory / "chroma"))
+    llm_cache.disable_llm_cache()
+    semantic_cache.disable_semantic_cache()
+    dedup.disable_duplicate_index()
+    embedding_cache.enable_embedding_cache(str(directory / "embeddings"))
+    # configure_caches() in the entry points and graph factories keeps these
+    main._caches_configured = True
+    yield main
+
+    (main._caches_configured, llm_cache._llm_cache, semantic_cache._semantic_cache,
+     dedup._duplicate_index, embedding_cache._embedding_cache) = saved_caches
+    model_routing.set_chat_model_factory(None)
+    rag_setup.use_embeddings(*saved_embeddings)
@@ -0,0 +1,337 @@
+"""
+Near-duplicate job posting detection with SimHash fingerprints.
+
+The same posting often arrives through several job boards and the company
+site with small formatting differences. Each job description is reduced to a
+64-bit SimHash of its normalized word shingles (after the boilerplate that
+differs between boards is removed by jd_compressor); postings whose
+fingerprints differ in at most max_distance bits are treated as the same.
+
+Lookups split the fingerprint into max_distance + 1 bands: two fingerprints
+within max_distance bits share at least one band exactly, so only postings
+in the matching band buckets are compared. Fingerprints are stored in SQLite
+and indexed in memory; the in-memory index is refreshed when another
+process (e.g. a job queue worker) has written to the database.
+
+Unlike the semantic cache this needs no embedding call, so it runs before
+any request is sent.
+"""
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+
+from jd_compressor import compress_job_description
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX_PATH = os.path.join(BASE_DIR, ".cache", "duplicates.sqlite")
+
+# Fingerprints at most this many bits apart (of 64) are the same posting
+DEFAULT_MAX_DISTANCE = 5
+
+# Seconds after which an unfinished claim is treated as abandoned (its
+# process crashed) and a near-duplicate may take it over
+DEFAULT_CLAIM_TTL = 1800
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+_URL_PATTERN = re.compile(r"https?://\S+|www\.\S+")
+_WORD_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+
+def normalize_text(job_description: str) -> list:
+    """Lowercased words of a job description, without boilerplate, URLs and punctuation."""
+    text = compress_job_description(job_description).text.lower()
+    return _WORD_PATTERN.findall(_URL_PATTERN.sub(" ", text))
+
+
+def simhash(job_description: str) -> int:
+    """
+    64-bit SimHash of a job description's word shingles.
+
+    Returns:
+        Unsigned 64-bit fingerprint (0 for text without words)
+    """
+    words = normalize_text(job_description)
+    if not words:
+        return 0
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE])
+                for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+         for shingle in shingles],
+        dtype=np.uint64
+    )
+    # One row of 64 bits per shingle; each bit votes +1 / -1
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(hashes)
+    return int(np.packbits(votes > 0, bitorder="little").view("<u8")[0])
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return (a ^ b).bit_count()
+
+
+def _to_signed(fingerprint: int) -> int:
+    """SQLite integers are signed 64-bit."""
+    return fingerprint - (1 << 64) if fingerprint >= (1 << 63) else fingerprint
+
+
+class DuplicateIndex:
+    """SQLite store of posting fingerprints with an in-memory banded index."""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, max_distance: int = DEFAULT_MAX_DISTANCE,
+                 claim_ttl: float = DEFAULT_CLAIM_TTL):
+        """
+        Args:
+            path: SQLite database file
+            max_distance: Maximum Hamming distance between near-duplicates
+            claim_ttl: Seconds before an unfinished claim counts as abandoned
+        """
+        self.path = path
+        self.max_distance = max_distance
+        self.claim_ttl = claim_ttl
+        self._bands = self._band_masks(max_distance + 1)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS postings (
+                key TEXT PRIMARY KEY,
+                fingerprint INTEGER NOT NULL,
+                company_name TEXT,
+                output_files TEXT,
+                completed INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL
+            )"""
+        )
+
+        # key -> fingerprint, and per band: band value -> keys
+        self._fingerprints = None
+        self._buckets = None
+        self._data_version = None
+
+    @staticmethod
+    def _band_masks(count: int) -> list:
+        """(shift, mask) pairs splitting 64 bits into `count` contiguous bands."""
+        edges = [round(64 * i / count) for i in range(count + 1)]
+        return [(start, (1 << (end - start)) - 1) for start, end in zip(edges, edges[1:])]
+
+    def _index(self, key: str, fingerprint: int):
+        self._fingerprints[key] = fingerprint
+        for band, (shift, mask) in enumerate(self._bands):
+            self._buckets[band].setdefault((fingerprint >> shift) & mask, set()).add(key)
+
+    def _unindex(self, key: str):
+        fingerprint = self._fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        for band, (shift, mask) in enumerate(self._bands):
+            self._buckets[band].get((fingerprint >> shift) & mask, set()).discard(key)
+
+    def _refresh(self):
+        """(Re)load the in-memory index if the database changed (lock held)."""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._fingerprints is not None and data_version == self._data_version:
+            return
+        self._fingerprints = {}
+        self._buckets = [{} for _ in self._bands]
+        for key, fingerprint in self._conn.execute("SELECT key, fingerprint FROM postings"):
+            self._index(key, fingerprint & ((1 << 64) - 1))
+        self._data_version = data_version
+
+    def _nearest(self, fingerprint: int):
+        """Closest indexed key within max_distance, with its distance (lock held)."""
+        best_key, best_distance = None, self.max_distance + 1
+        for band, (shift, mask) in enumerate(self._bands):
+            for key in self._buckets[band].get((fingerprint >> shift) & mask, ()):
+                distance = hamming_distance(fingerprint, self._fingerprints[key])
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+        return (best_key, best_distance) if best_key is not None else (None, None)
+
+    def _match(self, key: str, distance: int) -> dict:
+        company_name, output_files, completed, created_at = self._conn.execute(
+            "SELECT company_name, output_files, completed, created_at FROM postings WHERE key = ?", (key,)
+        ).fetchone()
+        return {
+            "key": key,
+            "distance": distance,
+            "company_name": company_name,
+            "output_files": json.loads(output_files) if output_files else None,
+            "completed": bool(completed),
+            "created_at": created_at,
+        }
+
+    def find(self, job_description: str, fingerprint: int = None) -> dict:
+        """
+        Find a stored near-duplicate of a job description.
+
+        Args:
+            job_description: The job description text
+            fingerprint: Its simhash, if already computed
+
+        Returns:
+            Dict with key, distance, company_name, output_files, completed
+            (False while the original is still running) and created_at, or
+            None if there is no near-duplicate
+        """
+        if fingerprint is None:
+            fingerprint = simhash(job_description)
+        with self._lock:
+            self._refresh()
+            key, distance = self._nearest(fingerprint)
+            return self._match(key, distance) if key is not None else None
+
+    def claim(self, key: str, job_description: str) -> dict:
+        """
+        Atomically find a near-duplicate or, if there is none, record this posting.
+
+        The record is marked incomplete until complete() is called, so copies
+        of a posting arriving while it is still running are caught too. An
+        incomplete record with the same key (a retry after a crash), or one
+        claimed more than claim_ttl seconds ago (its process crashed), is
+        taken over instead of counting as a duplicate.
+
+        Returns:
+            The near-duplicate's match dict, or None if the posting was claimed
+        """
+        fingerprint = simhash(job_description)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                while True:
+                    nearest, distance = self._nearest(fingerprint)
+                    match = self._match(nearest, distance) if nearest is not None else None
+                    if match is None or match["completed"] or not (
+                            nearest == key or self._abandoned(match)):
+                        break
+                    # This job's own claim from an attempt that crashed, or an
+                    # abandoned one: forget it and look again
+                    self._conn.execute("DELETE FROM postings WHERE key = ?", (nearest,))
+                    self._unindex(nearest)
+                if match is None:
+                    self._write(key, fingerprint)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return match
+
+    def _abandoned(self, match: dict) -> bool:
+        """Whether an unfinished claim is older than claim_ttl."""
+        return not match["completed"] and time.time() - match["created_at"] > self.claim_ttl
+
+    def get(self, key: str) -> dict:
+        """The record stored under a key as a match dict (distance 0), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM postings WHERE key = ?", (key,)).fetchone()
+            return self._match(key, 0) if row is not None else None
+
+    def add(self, key: str, job_description: str, company_name: str = None,
+            output_files: dict = None):
+        """Record a processed posting (replacing any record with the same key)."""
+        fingerprint = simhash(job_description)
+        with self._lock:
+            self._refresh()
+            self._write(key, fingerprint, company_name, output_files, completed=True)
+
+    def complete(self, key: str, company_name: str = None, output_files: dict = None):
+        """Store the outputs of a claimed posting once its run has finished."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE postings SET company_name = ?, output_files = ?, completed = 1 WHERE key = ?",
+                (company_name, json.dumps(output_files) if output_files else None, key)
+            )
+
+    def release(self, key: str):
+        """Forget a claimed posting whose run failed, so it can be submitted again."""
+        with self._lock:
+            self._refresh()
+            self._conn.execute("DELETE FROM postings WHERE key = ?", (key,))
+            self._unindex(key)
+
+    def _write(self, key: str, fingerprint: int, company_name: str = None,
+               output_files: dict = None, completed: bool = False):
+        """Insert or replace a record in the database and the index (lock held)."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO postings (key, fingerprint, company_name, output_files, completed, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, _to_signed(fingerprint), company_name,
+             json.dumps(output_files) if output_files else None, int(completed), time.time())
+        )
+        self._unindex(key)
+        self._index(key, fingerprint)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._fingerprints)
+
+
+def describe_duplicate(match: dict) -> str:
+    """One-line description of a near-duplicate match."""
+    when = time.strftime("%Y-%m-%d %H:%M", time.localtime(match["created_at"]))
+    state = "processed" if match["completed"] else "still running since"
+    detail = f"near-duplicate of {match['key']} ({state} {when}, {match['distance']} of 64 bits differ)"
+    text_file = (match.get("output_files") or {}).get("text_file")
+    return f"{detail}: {text_file}" if text_file else detail
+
+
+# Index used by the entry points (None when disabled)
+_duplicate_index = None
+
+
+def enable_duplicate_index(path: str = None, max_distance: int = None,
+                           claim_ttl: float = None) -> DuplicateIndex:
+    """
+    Enable near-duplicate detection.
+
+    Unset arguments fall back to DEDUP_INDEX_PATH, DEDUP_MAX_DISTANCE and
+    DEDUP_CLAIM_TTL, then to the module defaults.
+    """
+    global _duplicate_index
+    _duplicate_index = DuplicateIndex(
+        path=path or os.getenv("DEDUP_INDEX_PATH", DEFAULT_INDEX_PATH),
+        max_distance=max_distance if max_distance is not None
+        else int(os.getenv("DEDUP_MAX_DISTANCE", DEFAULT_MAX_DISTANCE)),
+        claim_ttl=claim_ttl if claim_ttl is not None
+        else float(os.getenv("DEDUP_CLAIM_TTL", DEFAULT_CLAIM_TTL))
+    )
+    return _duplicate_index
+
+
+def disable_duplicate_index():
+    """Stop checking for near-duplicate postings in this process."""
+    global _duplicate_index
+    _duplicate_index = None
+
+
+def configure_duplicate_index_from_env():
+    """Enable detection unless DEDUP_ENABLED is set to a false value."""
+    if os.getenv("DEDUP_ENABLED", "true").lower() in ("0", "false", "no"):
+        disable_duplicate_index()
+        return None
+    return enable_duplicate_index()
+
+
+def get_duplicate_index():
+    """Get the enabled index, or None if duplicate detection is disabled."""
+    return _duplicate_index
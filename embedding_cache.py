@@ -0,0 +1,268 @@
+"""
+Persistent on-disk cache for embeddings.
+
+Vectors are appended as float32 to a single file that is read through a
+memory map; a SQLite index maps (model, dimensions, SHA-256 of the text) to
+the vector's offset and length in that file. CachedEmbeddings wraps an
+embedding model so both document and query embeddings are served from the
+cache when the same text was embedded before - rebuilding the vector store,
+re-running the tests or trying another chunking then costs no API calls for
+text that was already seen.
+
+OpenAI returns the same vector for a text whether it is embedded as a
+document or as a query, so both share one key space.
+"""
+from dotenv import load_dotenv
+import hashlib
+import os
+import sqlite3
+import threading
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, ".cache", "embeddings")
+
+INDEX_FILE = "index.sqlite"
+VECTORS_FILE = "vectors.f32"
+
+# Texts looked up per SQLite query
+_LOOKUP_BATCH = 500
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def model_key(embedding_model) -> tuple:
+    """(model, dimensions) identifying the vectors an embedding model returns."""
+    model = getattr(embedding_model, "model", None) or type(embedding_model).__name__
+    dimensions = getattr(embedding_model, "dimensions", None) or getattr(embedding_model, "size", None)
+    return model, int(dimensions or 0)
+
+
+class EmbeddingStore:
+    """Float32 vectors in a memory-mapped file, indexed by model and text hash in SQLite."""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR):
+        """
+        Args:
+            directory: Holds index.sqlite and vectors.f32
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, VECTORS_FILE)
+        self.hits = 0
+        self.misses = 0
+
+        # Writers in several processes are serialized by the SQLite write lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, INDEX_FILE), timeout=30,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS vectors (
+                model TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                text_hash TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                PRIMARY KEY (model, dimensions, text_hash)
+            )"""
+        )
+        self._map = None
+
+    def _vectors(self, end: int) -> np.ndarray:
+        """Memory map covering at least the first `end` floats (lock held)."""
+        if self._map is None or len(self._map) < end:
+            self._map = np.memmap(self._vectors_path, dtype=np.float32, mode="r")
+        return self._map
+
+    def get(self, key: tuple, hashes: list) -> dict:
+        """
+        Look up stored vectors.
+
+        Args:
+            key: (model, dimensions) from model_key()
+            hashes: text_hash() of each text
+
+        Returns:
+            Dict of text hash -> vector (list of floats) for the hashes found
+        """
+        found = {}
+        with self._lock:
+            unique = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique), _LOOKUP_BATCH):
+                batch = unique[start:start + _LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, offset, length FROM vectors WHERE model = ? AND dimensions = ? "
+                    f"AND text_hash IN ({', '.join('?' * len(batch))})",
+                    (*key, *batch)
+                ).fetchall()
+                if rows:
+                    vectors = self._vectors(max(offset + length for _, offset, length in rows))
+                    for hash_, offset, length in rows:
+                        found[hash_] = vectors[offset:offset + length].tolist()
+            self.hits += sum(1 for hash_ in hashes if hash_ in found)
+            self.misses += sum(1 for hash_ in hashes if hash_ not in found)
+        return found
+
+    def put(self, key: tuple, vectors: dict):
+        """
+        Store vectors.
+
+        Args:
+            key: (model, dimensions) from model_key()
+            vectors: Dict of text hash -> vector
+        """
+        if not vectors:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                hashes = list(vectors)
+                stored = set()
+                for start in range(0, len(hashes), _LOOKUP_BATCH):
+                    batch = hashes[start:start + _LOOKUP_BATCH]
+                    stored.update(row[0] for row in self._conn.execute(
+                        f"SELECT text_hash FROM vectors WHERE model = ? AND dimensions = ? "
+                        f"AND text_hash IN ({', '.join('?' * len(batch))})",
+                        (*key, *batch)
+                    ))
+                new = {hash_: np.asarray(vector, dtype=np.float32)
+                       for hash_, vector in vectors.items() if hash_ not in stored}
+                with open(self._vectors_path, "ab") as f:
+                    offset = f.tell() // 4
+                    rows = []
+                    for hash_, vector in new.items():
+                        f.write(vector.tobytes())
+                        rows.append((*key, hash_, offset, len(vector)))
+                        offset += len(vector)
+                self._conn.executemany(
+                    "INSERT INTO vectors (model, dimensions, text_hash, offset, length) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                # Vectors appended without an index row are never read
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> dict:
+        """Hits and misses in this process, and the number of stored vectors."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+        size = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embedding model wrapper that checks the enabled EmbeddingStore first.
+
+    Only texts without a stored vector are sent to the wrapped model (once
+    each, in one request). When the cache is disabled every call goes
+    straight to the wrapped model.
+    """
+
+    def __init__(self, embeddings: Embeddings, store: EmbeddingStore = None):
+        """
+        Args:
+            embeddings: The embedding model to wrap
+            store: Store to use (defaults to the one enabled in this module)
+        """
+        self.embeddings = embeddings
+        self._store = store
+
+    @property
+    def store(self):
+        return self._store if self._store is not None else get_embedding_cache()
+
+    def __getattr__(self, name: str):
+        # model, dimensions, ... of the wrapped model
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def _lookup(self, store: EmbeddingStore, texts: list) -> tuple:
+        """Stored vectors by text hash, and the distinct texts still to embed."""
+        found = store.get(model_key(self.embeddings), [text_hash(text) for text in texts])
+        missing = list(dict.fromkeys(text for text in texts if text_hash(text) not in found))
+        return found, missing
+
+    def _merge(self, store: EmbeddingStore, texts: list, found: dict, missing: list, vectors: list) -> list:
+        """Store newly embedded vectors and return one vector per text, in order."""
+        # Returned as stored, so results don't depend on whether they were cached
+        new = {text_hash(text): np.asarray(vector, dtype=np.float32).tolist()
+               for text, vector in zip(missing, vectors)}
+        store.put(model_key(self.embeddings), new)
+        found.update(new)
+        return [found[text_hash(text)] for text in texts]
+
+    def embed_documents(self, texts: list) -> list:
+        store = self.store
+        if store is None:
+            return self.embeddings.embed_documents(texts)
+        found, missing = self._lookup(store, texts)
+        vectors = self.embeddings.embed_documents(missing) if missing else []
+        return self._merge(store, texts, found, missing, vectors)
+
+    async def aembed_documents(self, texts: list) -> list:
+        store = self.store
+        if store is None:
+            return await self.embeddings.aembed_documents(texts)
+        found, missing = self._lookup(store, texts)
+        vectors = await self.embeddings.aembed_documents(missing) if missing else []
+        return self._merge(store, texts, found, missing, vectors)
+
+    def embed_query(self, text: str) -> list:
+        store = self.store
+        if store is None:
+            return self.embeddings.embed_query(text)
+        found, missing = self._lookup(store, [text])
+        vectors = [self.embeddings.embed_query(text)] if missing else []
+        return self._merge(store, [text], found, missing, vectors)[0]
+
+    async def aembed_query(self, text: str) -> list:
+        store = self.store
+        if store is None:
+            return await self.embeddings.aembed_query(text)
+        found, missing = self._lookup(store, [text])
+        vectors = [await self.embeddings.aembed_query(text)] if missing else []
+        return self._merge(store, [text], found, missing, vectors)[0]
+
+
+# Store used by CachedEmbeddings (None when disabled)
+_embedding_cache = None
+
+
+def enable_embedding_cache(directory: str = None) -> EmbeddingStore:
+    """
+    Enable the embedding cache.
+
+    An unset directory falls back to EMBEDDING_CACHE_DIR, then to .cache/embeddings.
+    """
+    global _embedding_cache
+    _embedding_cache = EmbeddingStore(directory or os.getenv("EMBEDDING_CACHE_DIR", DEFAULT_CACHE_DIR))
+    return _embedding_cache
+
+
+def disable_embedding_cache():
+    """Send every embedding request to the model in this process."""
+    global _embedding_cache
+    _embedding_cache = None
+
+
+def configure_embedding_cache_from_env():
+    """Enable the cache unless EMBEDDING_CACHE_ENABLED is set to a false value."""
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        disable_embedding_cache()
+        return None
+    return enable_embedding_cache()
+
+
+def get_embedding_cache():
+    """Get the enabled store, or None if embedding caching is disabled."""
+    return _embedding_cache
@@ -0,0 +1,201 @@
+"""
+Job description compression.
+
+Job postings carry a lot of text that doesn't help tailor a resume: benefits
+and perks lists, salary and pay-transparency notes, equal opportunity and
+accommodation statements, privacy/legal disclaimers, and job-board page
+chrome ("Apply now", "Share this job"), often repeated. This module drops
+those sections and repeated lines with local heuristics before the job
+description is inlined into the prompts.
+
+Sections are found by their headings (short lines like "Benefits:" or
+"WHAT WE OFFER"); a dropped section runs until the next heading. Boilerplate
+statements outside those sections are caught by their typical phrases.
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+# Headings of sections that are dropped entirely. Each pattern must match the
+# whole heading, so job titles like "Privacy Engineer" or "Benefits
+# Specialist" are never mistaken for one
+DROP_HEADING_PATTERNS = [
+    r"(our |the )?(benefits?|perks)( (and|&) (benefits?|perks))?",
+    r"(compensation|salary|pay)( (and|&) benefits?)?( range| information| details)?",
+    r"pay transparency( statement| notice)?",
+    r"what we offer( you)?",
+    r"what you('ll| will) get",
+    r"why you('ll| will) love (it here|working (here|with us))",
+    r"equal (employment )?opportunit(y|ies)( employer| statement)?",
+    r"eeo( statement)?",
+    r"(reasonable )?accommodations?( statement| requests?)?",
+    r"(applicant |candidate )?privacy( notice| policy| statement)?",
+    r"(legal )?disclaimers?",
+    r"legal( notice| information)?",
+    r"e-?verify( statement| notice)?",
+    r"recruit(ment|ing) (fraud|scams?)( notice| warning| alert)?",
+    r"how to apply",
+    r"application process",
+]
+
+# Phrases that mark a boilerplate statement wherever it appears (only prose
+# lines are checked, so a requirement bullet is never dropped)
+BOILERPLATE_PARAGRAPH_PATTERNS = [
+    r"equal (employment )?opportunity employer",
+    r"without regard to (race|age|color|religion|sex)",
+    r"reasonable accommodations?",
+    r"(sexual orientation|gender identity|veteran status|national origin)",
+    r"e-?verify",
+    r"(applicant|candidate) privacy (notice|policy)",
+    r"pay transparency",
+    r"(fraudulent|scam) (job )?(offers?|emails?|recruit)",
+    r"this job description is not (designed|intended) to",
+]
+
+# Job-board page chrome, matched against whole lines
+PAGE_CHROME_PATTERNS = [
+    r"apply( now| for this job)?",
+    r"(save|share)( this)? job",
+    r"sign in( to apply)?",
+    r"back to (search|jobs)",
+    r"report (this )?job",
+    r"(show|see) (more|less)",
+    r"(posted|updated) \d+ (hours?|days?|weeks?|months?) ago",
+    r"\d+ applicants?",
+    r"(we use|this site uses) cookies.*",
+    r"accept( all)? cookies",
+]
+
+# A heading is a short line without sentence punctuation
+MAX_HEADING_LENGTH = 60
+
+# Lines at least this long that aren't bullets count as prose
+MIN_PROSE_LENGTH = 60
+
+# Never keep less than this fraction of the original text; below it the
+# heuristics have probably misfired and only the deduplication is applied
+MIN_KEPT_FRACTION = 0.25
+
+_DROP_HEADING_RE = re.compile(r"^(" + "|".join(DROP_HEADING_PATTERNS) + r")$", re.IGNORECASE)
+_BOILERPLATE_RE = re.compile("|".join(BOILERPLATE_PARAGRAPH_PATTERNS), re.IGNORECASE)
+_PAGE_CHROME_RE = re.compile(r"^(" + "|".join(PAGE_CHROME_PATTERNS) + r")[.!]?$", re.IGNORECASE)
+_HEADING_MARKUP_RE = re.compile(r"^[#*\s]+|[*:\s]+$")
+
+
+class CompressedJobDescription(NamedTuple):
+    """Result of compress_job_description."""
+    text: str
+    original_tokens: int
+    compressed_tokens: int
+    dropped_sections: tuple
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.compressed_tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)."""
+    return len(text) // 4
+
+
+def _normalize(line: str) -> str:
+    return re.sub(r"\s+", " ", line).strip().lower()
+
+
+def is_heading(line: str) -> bool:
+    """Whether a line looks like a section heading."""
+    stripped = _HEADING_MARKUP_RE.sub("", line.strip())
+    if not stripped or len(stripped) > MAX_HEADING_LENGTH:
+        return False
+    # Bullets, sentences and "Key: value" lines are content
+    if stripped[0] in "-•*" or stripped[-1] in ".,;!?" or ":" in stripped:
+        return False
+    return (line.strip().startswith("#") or line.rstrip().endswith(":")
+            or stripped.isupper() or len(stripped.split()) <= 6)
+
+
+def is_drop_heading(line: str) -> bool:
+    """Whether a heading line starts a section that is dropped (benefits, EEO, ...)."""
+    heading = _normalize(_HEADING_MARKUP_RE.sub("", line.strip()).replace("\u2019", "'"))
+    return bool(_DROP_HEADING_RE.match(heading))
+
+
+def _drop_sections(lines: list):
+    """
+    Drop lines under low-information headings; returns (kept lines, dropped headings).
+
+    Nothing is dropped before the first kept content line, so the title and
+    introduction at the top of a posting always survive.
+    """
+    kept, dropped = [], []
+    dropping = False
+    has_content = False
+    for line in lines:
+        if line.strip() and is_heading(line):
+            dropping = has_content and is_drop_heading(line)
+            if dropping:
+                dropped.append(_HEADING_MARKUP_RE.sub("", line.strip()))
+                continue
+        if not dropping:
+            kept.append(line)
+            has_content = has_content or bool(line.strip())
+    return kept, dropped
+
+
+def _is_boilerplate_statement(line: str) -> bool:
+    """Whether a prose line is an EEO, accommodation, privacy or similar statement."""
+    stripped = line.strip()
+    return (len(stripped) >= MIN_PROSE_LENGTH and stripped[0] not in "-•*"
+            and bool(_BOILERPLATE_RE.search(stripped)))
+
+
+def _dedupe_lines(lines: list) -> list:
+    """Drop repeated non-empty lines and page chrome, keeping first occurrences."""
+    seen = set()
+    kept = []
+    for line in lines:
+        normalized = _normalize(line)
+        if normalized:
+            if normalized in seen or _PAGE_CHROME_RE.match(normalized):
+                continue
+            seen.add(normalized)
+        kept.append(line)
+    return kept
+
+
+@lru_cache(maxsize=64)
+def compress_job_description(job_description: str) -> CompressedJobDescription:
+    """
+    Drop boilerplate sections, boilerplate statements and repeated lines.
+
+    Results are memoized, so the company extractor and the graph's compression
+    step share one pass over the same job description.
+
+    Args:
+        job_description: Raw job description text
+
+    Returns:
+        CompressedJobDescription with the text, token estimates before and
+        after, and the headings of the dropped sections
+    """
+    lines = _dedupe_lines(job_description.split("\n"))
+    deduped = "\n".join(lines)
+
+    kept_lines, dropped = _drop_sections(lines)
+    statements = [line for line in kept_lines if _is_boilerplate_statement(line)]
+    kept_lines = [line for line in kept_lines if not _is_boilerplate_statement(line)]
+    if statements:
+        dropped.append(f"{len(statements)} boilerplate statement(s)")
+    # Collapse the blank lines left behind by dropped text
+    compressed = re.sub(r"\n\s*\n(\s*\n)+", "\n\n", "\n".join(kept_lines)).strip()
+
+    if len(compressed) < MIN_KEPT_FRACTION * len(deduped.strip()):
+        compressed, dropped = deduped.strip(), []
+
+    return CompressedJobDescription(
+        text=compressed,
+        original_tokens=estimate_tokens(job_description),
+        compressed_tokens=estimate_tokens(compressed),
+        dropped_sections=tuple(dropped)
+    )
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Durable local job queue: SQLite-backed enqueue/lease/ack with visibility timeouts.
+
+A leased job is invisible to other workers until its lease expires. Workers
+extend the lease while a job runs and ack it when done, so a job held by a
+crashed worker becomes visible again and is re-leased by another one. Jobs
+that fail (or whose lease keeps expiring) are retried up to max_attempts
+times, then marked failed. Each job's run is checkpointed under its id, so a
+retry resumes after the last finished node instead of starting over. The table doubles as an index of every posting
+processed: its status, attempts, output files and error.
+
+Usage:
+    python job_queue.py enqueue postings.csv      # same inputs as batch.py
+    python job_queue.py work --processes 4 --concurrency 2
+    python job_queue.py status
+    python job_queue.py requeue                   # retry failed jobs
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+from settings import BASE_DIR, CONTEXT_MODES, DEFAULT_CONTEXT_MODE, DEFAULT_OUTPUT_DIR
+from model_routing import get_model_profile, get_model_profiles, set_model_profile
+
+DEFAULT_QUEUE_PATH = os.getenv(
+    "RESUME_AGENT_QUEUE_PATH",
+    os.path.join(BASE_DIR, ".cache", "job_queue.sqlite")
+)
+DEFAULT_VISIBILITY_TIMEOUT = 600  # Seconds a lease lasts without a heartbeat
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY = 30  # Seconds before a failed job is visible again
+DEFAULT_POLL_INTERVAL = 2.0
+
+JOB_STATUSES = ("queued", "leased", "done", "failed")
+
+
+class JobQueue:
+    """SQLite job table with SQS-style leases; safe to share between processes."""
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """
+        Args:
+            path: SQLite database file
+            max_attempts: Leases per job before it is marked failed
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Autocommit; writes that read first take the database lock with BEGIN
+        # IMMEDIATE. Worker slots share one connection, guarded by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                visible_at REAL NOT NULL,
+                lease_owner TEXT,
+                enqueued_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                result TEXT,
+                error TEXT
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_visible ON jobs (status, visible_at)")
+
+    def enqueue(self, jobs: list) -> int:
+        """
+        Add jobs; a job whose id is already in the queue is skipped.
+
+        Args:
+            jobs: Job dicts from batch.load_jobs (id plus url or job_description)
+
+        Returns:
+            Number of jobs added
+        """
+        now = time.time()
+        with self._lock, self._transaction():
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO jobs (id, payload, status, visible_at, enqueued_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?)",
+                [(job["id"], json.dumps(job), now, now, now) for job in jobs]
+            )
+            return self._conn.total_changes - before
+
+    def lease(self, worker: str, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> dict:
+        """
+        Lease the oldest visible job: queued, or leased with an expired lease.
+
+        Args:
+            worker: Lease owner, checked by extend/ack/fail
+            visibility_timeout: Seconds until the job is visible to other workers again
+
+        Returns:
+            Job dict (payload plus id and attempts), or None if nothing is visible
+        """
+        while True:
+            now = time.time()
+            with self._lock, self._transaction():
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status IN ('queued', 'leased') AND visible_at <= ? "
+                    "ORDER BY seq LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                if row["attempts"] >= self.max_attempts:
+                    # Every lease so far expired or failed - stop retrying
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'failed', lease_owner = NULL, updated_at = ?, "
+                        "error = COALESCE(error, ?) WHERE id = ?",
+                        (now, f"Lease expired after {row['attempts']} attempts", row["id"])
+                    )
+                    continue
+
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'leased', lease_owner = ?, attempts = attempts + 1, "
+                    "visible_at = ?, updated_at = ? WHERE id = ?",
+                    (worker, now + visibility_timeout, now, row["id"])
+                )
+                return {**json.loads(row["payload"]), "id": row["id"], "attempts": row["attempts"] + 1}
+
+    def extend(self, job_id: str, worker: str,
+               visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> bool:
+        """Push back a held lease's expiry; False if the lease was lost."""
+        now = time.time()
+        return self._update_held(job_id, worker, "visible_at = ?, updated_at = ?",
+                                 (now + visibility_timeout, now))
+
+    def ack(self, job_id: str, worker: str, result: dict = None) -> bool:
+        """Mark a held job done and store its result; False if the lease was lost."""
+        return self._update_held(job_id, worker,
+                                 "status = 'done', lease_owner = NULL, updated_at = ?, result = ?, error = NULL",
+                                 (time.time(), json.dumps(result or {})))
+
+    def fail(self, job_id: str, worker: str, error: str,
+             retry_delay: float = DEFAULT_RETRY_DELAY) -> bool:
+        """
+        Release a held job after a failed attempt.
+
+        The job is queued again after retry_delay seconds, or marked failed if
+        it has used max_attempts.
+
+        Returns:
+            False if the lease was lost
+        """
+        now = time.time()
+        return self._update_held(
+            job_id, worker,
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+            "lease_owner = NULL, visible_at = ?, updated_at = ?, error = ?",
+            (self.max_attempts, now + retry_delay, now, error)
+        )
+
+    def release(self, job_id: str, worker: str, delay: float = DEFAULT_RETRY_DELAY) -> bool:
+        """
+        Put a held job back in the queue without using up an attempt.
+
+        The job is visible again after delay seconds.
+
+        Returns:
+            False if the lease was lost
+        """
+        now = time.time()
+        return self._update_held(
+            job_id, worker,
+            "status = 'queued', attempts = attempts - 1, lease_owner = NULL, visible_at = ?, updated_at = ?",
+            (now + delay, now)
+        )
+
+    def requeue_failed(self) -> int:
+        """Give every failed job a fresh set of attempts; returns how many."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, visible_at = ?, updated_at = ? "
+                "WHERE status = 'failed'",
+                (now, now)
+            )
+        return cursor.rowcount
+
+    def _update_held(self, job_id: str, worker: str, assignments: str, params: tuple) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (*params, job_id, worker)
+            )
+        return cursor.rowcount == 1
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def stats(self) -> dict:
+        """Job counts by status (leased jobs with an expired lease count as leased)."""
+        counts = {status: 0 for status in JOB_STATUSES}
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        for status, count in rows:
+            counts[status] = count
+        return counts
+
+    def jobs(self, status: str = None) -> list:
+        """Jobs in queue order, optionally only those with a status."""
+        query = "SELECT id, status, attempts, lease_owner, updated_at, result, error FROM jobs"
+        params = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY seq", params).fetchall()
+        return [{**dict(row), "result": json.loads(row["result"]) if row["result"] else None}
+                for row in rows]
+
+    def close(self):
+        self._conn.close()
+
+
+def checkpoint_path_for(queue_path: str) -> str:
+    """Checkpoint database of a queue's runs, next to the queue database."""
+    return os.path.splitext(queue_path)[0] + "_checkpoints.sqlite"
+
+
+def _is_completed(key: str) -> bool:
+    """Whether the duplicate index holds a completed record under a key."""
+    from dedup import get_duplicate_index
+
+    duplicates = get_duplicate_index()
+    record = duplicates.get(key) if duplicates is not None else None
+    return record is not None and record["completed"]
+
+
+async def run_worker(queue_path: str, output_dir: str, concurrency: int = 1,
+                     context_mode: str = DEFAULT_CONTEXT_MODE,
+                     visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT,
+                     poll_interval: float = DEFAULT_POLL_INTERVAL, follow: bool = False,
+                     allow_duplicates: bool = False, progress=print) -> dict:
+    """
+    Lease and run jobs until the queue is drained (or forever with follow).
+
+    Up to `concurrency` jobs run at once on this event loop. Each held lease
+    is extended every visibility_timeout / 3 seconds while its job runs.
+    Runs are checkpointed by job id in checkpoint_path_for(queue_path), so a
+    re-leased job resumes where its last attempt stopped.
+
+    Args:
+        queue_path: Queue database file
+        output_dir: Directory for outputs (one subdirectory per job id)
+        concurrency: Jobs running at once in this process
+        context_mode: "tools" or "prefetch"
+        visibility_timeout: Lease length in seconds
+        poll_interval: Seconds between polls when no job is visible
+        follow: Keep polling for new jobs instead of exiting when drained
+        allow_duplicates: Run near-duplicates of processed postings instead
+            of acking them with the original's outputs
+        progress: Function called with one line per finished job
+
+    Returns:
+        Counts of jobs this worker completed, skipped as duplicates and failed
+    """
+    from batch import run_job
+    from main import aclose_checkpointed_agents
+    from web_operations import sanitize_filename
+
+    queue = JobQueue(queue_path)
+    checkpoint_path = checkpoint_path_for(queue_path)
+    counts = {"done": 0, "duplicate": 0, "failed": 0}
+    worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def keep_leased(job_id: str, worker: str):
+        while True:
+            await asyncio.sleep(visibility_timeout / 3)
+            if not await asyncio.to_thread(queue.extend, job_id, worker, visibility_timeout):
+                progress(f"⚠ Lost the lease on {job_id}; another worker may run it again")
+                return
+
+    async def slot(index: int):
+        worker = f"{worker_prefix}:{index}"
+        while True:
+            job = await asyncio.to_thread(queue.lease, worker, visibility_timeout)
+            if job is None:
+                stats = await asyncio.to_thread(queue.stats)
+                if not follow and stats["queued"] == 0 and stats["leased"] == 0:
+                    return
+                await asyncio.sleep(poll_interval)
+                continue
+
+            job_id = job["id"]
+            heartbeat = asyncio.create_task(keep_leased(job_id, worker))
+            try:
+                result = await run_job(job, os.path.join(output_dir, sanitize_filename(job_id)),
+                                       context_mode, allow_duplicates, checkpoint_path)
+            finally:
+                heartbeat.cancel()
+            result.pop("telemetry", None)
+
+            if result["status"] == "duplicate" and not await asyncio.to_thread(
+                    _is_completed, result["duplicate_of"]):
+                # The original hasn't finished (or failed): try this job again later
+                await asyncio.to_thread(queue.release, job_id, worker, poll_interval)
+                progress(f"↻ {job_id} waits for {result['duplicate_of']} to finish")
+                continue
+            if result["status"] in ("ok", "duplicate"):
+                if not await asyncio.to_thread(queue.ack, job_id, worker, result):
+                    progress(f"⚠ {job_id} finished after its lease expired; kept the other worker's result")
+                    continue
+                if result["status"] == "duplicate":
+                    counts["duplicate"] += 1
+                    progress(f"≈ {job_id} is a duplicate of {result['duplicate_of']}")
+                else:
+                    counts["done"] += 1
+                    progress(f"✓ {job_id} ({result['seconds']:.1f}s, attempt {job['attempts']})")
+            else:
+                await asyncio.to_thread(queue.fail, job_id, worker, result["error"])
+                counts["failed"] += 1
+                progress(f"✗ {job_id} (attempt {job['attempts']}): {result['error']}")
+
+    try:
+        await asyncio.gather(*(slot(i) for i in range(concurrency)))
+    finally:
+        queue.close()
+        await aclose_checkpointed_agents()
+    return counts
+
+
+def _worker_process(queue_path: str, output_dir: str, concurrency: int, context_mode: str,
+                    profile: str, visibility_timeout: float, follow: bool, allow_duplicates: bool,
+                    verbose: bool):
+    """Entry point of one worker process."""
+    set_model_profile(profile)
+    pid = os.getpid()
+    progress = lambda line: print(f"[{pid}] {line}", file=sys.__stdout__, flush=True)
+    with open(os.devnull, "w") as devnull, \
+            (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)):
+        try:
+            asyncio.run(run_worker(queue_path, output_dir, concurrency, context_mode,
+                                   visibility_timeout=visibility_timeout, follow=follow,
+                                   allow_duplicates=allow_duplicates, progress=progress))
+        except KeyboardInterrupt:
+            pass
+
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(
+        description="Durable job queue for tailoring many job descriptions across worker processes."
+    )
+    parser.add_argument("--db", default=DEFAULT_QUEUE_PATH, help="Queue database (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add jobs from a directory, .csv or .jsonl file")
+    enqueue.add_argument("input", help="Same inputs as batch.py")
+
+    work = commands.add_parser("work", help="Run worker processes until the queue is drained")
+    work.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                      help="Worker processes (default: number of CPUs)")
+    work.add_argument("--concurrency", type=int, default=2,
+                      help="Jobs running at once per process (default: %(default)s)")
+    work.add_argument("--output-dir", help="Where to write job outputs (default: outputs/queue)")
+    work.add_argument("--context-mode", choices=CONTEXT_MODES, default=DEFAULT_CONTEXT_MODE,
+                      help="How nodes get CV/guide content (default: %(default)s)")
+    work.add_argument("--profile", choices=get_model_profiles(), default=get_model_profile(),
+                      help="Model routing profile from model_routing.json (default: %(default)s)")
+    work.add_argument("--visibility-timeout", type=float, default=DEFAULT_VISIBILITY_TIMEOUT,
+                      help="Seconds before a crashed worker's job is re-leased (default: %(default)s)")
+    work.add_argument("--follow", action="store_true",
+                      help="Keep waiting for new jobs instead of exiting when the queue is drained")
+    work.add_argument("--allow-duplicates", action="store_true",
+                      help="Run postings that are near-duplicates of ones already processed "
+                           "(they are acked with the original's outputs by default)")
+    work.add_argument("--verbose", action="store_true",
+                      help="Show every step of every job instead of one line per finished job")
+
+    status = commands.add_parser("status", help="Show job counts and failed jobs")
+    status.add_argument("--all", action="store_true", help="List every job, not just failed ones")
+
+    commands.add_parser("requeue", help="Queue failed jobs again with fresh attempts")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run a queue command from the command line."""
+    args = parse_args(argv)
+
+    if args.command == "enqueue":
+        from batch import load_jobs
+
+        jobs = load_jobs(args.input)
+        added = JobQueue(args.db).enqueue(jobs)
+        print(f"✓ Enqueued {added} of {len(jobs)} jobs ({len(jobs) - added} already in the queue)")
+
+    elif args.command == "work":
+        output_dir = args.output_dir or os.path.join(DEFAULT_OUTPUT_DIR, "queue")
+        print("="*80)
+        print(f"QUEUE WORKERS: {args.processes} processes x {args.concurrency} jobs, "
+              f"context mode {args.context_mode}, model profile {args.profile}")
+        print(f"Queue: {args.db} - outputs in {output_dir}")
+        print("="*80)
+
+        start = time.perf_counter()
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=_worker_process, args=(
+                args.db, output_dir, args.concurrency, args.context_mode, args.profile,
+                args.visibility_timeout, args.follow, args.allow_duplicates, args.verbose
+            ))
+            for _ in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            print("\n⚠ Stopping workers; their leased jobs will be re-leased after the visibility timeout.")
+            for process in processes:
+                process.join()
+
+        stats = JobQueue(args.db).stats()
+        print("\n" + "="*80)
+        print(f"QUEUE DRAINED in {time.perf_counter() - start:.1f}s: {stats['done']} done, "
+              f"{stats['failed']} failed, {stats['queued'] + stats['leased']} remaining")
+        print("="*80)
+
+    elif args.command == "status":
+        queue = JobQueue(args.db)
+        stats = queue.stats()
+        print(", ".join(f"{count} {status}" for status, count in stats.items()))
+        for job in queue.jobs(None if args.all else "failed"):
+            result = job["result"] or {}
+            detail = job["error"] or ((result.get("output_files") or {}).get("text_file") or "")
+            if result.get("duplicate_of"):
+                detail = f"duplicate of {result['duplicate_of']}: {detail}"
+            print(f"  {job['status']:<7} {job['id']} (attempts {job['attempts']}) {detail}")
+
+    elif args.command == "requeue":
+        print(f"✓ Requeued {JobQueue(args.db).requeue_failed()} failed jobs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Persistent on-disk cache for LLM responses.
+
+Registered as LangChain's global LLM cache, so every chat model call in the
+process (the graph nodes in main.py and the company extractor in
+web_operations.py) checks it before going to the network. The cache key is a
+SHA-256 hash of LangChain's llm_string (model name, temperature and any bound
+tools / tool_choice) and of the canonical JSON serialization of the message
+list, so a node is only served from cache when all of its inputs are identical.
+"""
+from dotenv import load_dotenv
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from langchain_core.caches import BaseCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, Generation
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, ".cache", "llm_cache.sqlite")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600  # One week
+DEFAULT_MAX_ENTRIES = 5000
+
+# Classes allowed when deserializing cached generations
+_CACHED_OBJECTS = [Generation, ChatGeneration, ChatGenerationChunk, AIMessage, AIMessageChunk]
+
+
+class PersistentLLMCache(BaseCache):
+    """SQLite-backed LLM response cache with a TTL and an LRU size cap."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            path: SQLite database file
+            ttl_seconds: Entries older than this are treated as misses and dropped
+            max_entries: Least recently used entries are evicted beyond this size
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Parallel graph nodes share one connection, guarded by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        """Hash the model configuration and serialized messages into a cache key."""
+        digest = hashlib.sha256()
+        digest.update(llm_string.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str):
+        """Return the cached generations for a prompt, or None on a miss."""
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return loads(value, allowed_objects=_CACHED_OBJECTS)
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        """Store the generations for a prompt and evict beyond the size cap."""
+        key = self.make_key(prompt, llm_string)
+        value = dumps(list(return_val))
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop the least recently used entries beyond max_entries (lock held)."""
+        if self.max_entries is None:
+            return
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            )
+
+    def clear(self, **kwargs) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process and the number of stored entries."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries
+        }
+
+
+# Cache registered with LangChain (None when disabled)
+_llm_cache = None
+
+
+def enable_llm_cache(path: str = None, ttl_seconds: float = None,
+                     max_entries: int = None) -> PersistentLLMCache:
+    """
+    Register a persistent cache for every LLM call in the process.
+
+    Unset arguments fall back to LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS and
+    LLM_CACHE_MAX_ENTRIES, then to the module defaults.
+
+    Returns:
+        The registered cache
+    """
+    global _llm_cache
+    _llm_cache = PersistentLLMCache(
+        path=path or os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+        ttl_seconds=ttl_seconds if ttl_seconds is not None
+        else float(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+        max_entries=max_entries if max_entries is not None
+        else int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+    )
+    set_llm_cache(_llm_cache)
+    return _llm_cache
+
+
+def disable_llm_cache():
+    """Stop caching LLM responses in this process."""
+    global _llm_cache
+    _llm_cache = None
+    set_llm_cache(None)
+
+
+def configure_llm_cache_from_env():
+    """Enable the cache unless LLM_CACHE_ENABLED is set to a false value."""
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        disable_llm_cache()
+        return None
+    return enable_llm_cache()
+
+
+def get_llm_cache():
+    """Get the registered cache, or None if caching is disabled."""
+    return _llm_cache
@@ -1,15 +1,28 @@
 from dotenv import load_dotenv
+import asyncio
+import operator
 import os
-from typing import TypedDict, Annotated, List
+import sqlite3
+import threading
+import uuid
+from typing import Annotated, Callable, List, NamedTuple, TypedDict
 from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph.message import add_messages
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 
-from rag_setup import get_retriever_tools
+from rag_setup import (
+    get_retriever_tools,
+    retrieve_context,
+    aretrieve_context,
+    CV_SEARCH_KWARGS,
+    GUIDE_SEARCH_KWARGS
+)
 from web_operations import (
     fetch_job_description_from_url,
-    extract_company_name_from_text
+    extract_company_name_from_text,
+    aextract_company_name_from_text
 )
 from prompts import (
     get_keywords_analysis_messages,
@@ -17,31 +30,90 @@ from prompts import (
     get_tailor_skills_messages,
     get_tailor_experience_messages,
     get_tailor_name_desc_messages,
-    get_check_length_messages,
+    get_condense_section_messages,
     get_cover_letter_messages,
     get_interest_answer_messages
 )
-from pdf_operations import save_all_outputs
+from jd_compressor import compress_job_description
+from tool_executor import run_tool_loop, arun_tool_loop
+from llm_cache import configure_llm_cache_from_env
+from model_routing import get_llm
+from settings import (
+    CHECKPOINT_PATH,
+    CONTEXT_MODES,
+    DEFAULT_CONTEXT_MODE,
+    DEFAULT_OUTPUT_DIR
+)
+from dedup import configure_duplicate_index_from_env
+from embedding_cache import configure_embedding_cache_from_env
+from semantic_cache import (
+    configure_semantic_cache_from_env,
+    get_semantic_cache,
+    reusable_outputs
+)
 
 load_dotenv()
 
-# Initialize LLM with GPT-5 (using gpt-4o as latest available model)
-# Update to "gpt-5" when available through OpenAI API
-llm = ChatOpenAI(model="gpt-5", temperature=0.4)
-#llm = ChatOpenAI(model="o3")
+# The LLM, semantic, duplicate and embedding caches are configured from the
+# environment by configure_caches(), called by the entry points and the graph
+# factories rather than at import, so importing this module opens no cache files.
+
+# Each node's model, temperature, output limit and timeout come from
+# model_routing.json (profile set with RESUME_AGENT_MODEL_PROFILE or --profile)
+
+# The retriever tools, vector store, chat models and compiled graph are all
+# created on first use (get_retriever_tools, get_llm, get_resume_agent), so
+# importing this module doesn't open Chroma or build API clients. The PDF
+# code (ReportLab) is imported by the nodes that need it.
+
+# Context modes (CONTEXT_MODES, DEFAULT_CONTEXT_MODE) and the default output
+# and checkpoint paths are defined in settings.py
+
+# Queries always run against the CV in prefetch mode; JD-specific queries are added per run
+CV_PREFETCH_QUERIES = [
+    "professional summary and background",
+    "technical skills, tools and programming languages",
+    "work experience, achievements and metrics",
+    "education, publications and awards",
+]
+
+# The questions the cover letter prompt asks the model to put to the guide
+GUIDE_PREFETCH_QUERIES = [
+    "What is the recommended structure for an excellent cover letter?",
+    "What are the key principles and best practices for cover letter writing?",
+    "How should I open and close a cover letter effectively?",
+    "What makes a cover letter stand out and be memorable?",
+]
 
-# Get retriever tools
-retriever_tools = get_retriever_tools()
-llm_with_tools = llm.bind_tools(retriever_tools)
+# Maximum number of JD requirement lines turned into extra CV queries
+MAX_REQUIREMENT_QUERIES = 4
 
-# Create tools dictionary
-tools_dict = {tool.name: tool for tool in retriever_tools}
+# Prompts per run that inline the job description (company extractor, keywords,
+# four tailoring steps, cover letter, interest answer)
+JD_PROMPT_COUNT = 8
+
+# Condense-and-remeasure rounds before accepting a CV longer than one page
+MAX_CONDENSE_ROUNDS = 2
+
+# Condensed sections aim a little below the measured budget, and never below 30%
+CONDENSE_SAFETY_MARGIN = 0.9
+MIN_CONDENSE_RATIO = 0.3
+
+# Section names used in condense prompts and messages
+CV_SECTION_TITLES = {
+    "tailored_name_desc": "Professional Title & Specialization",
+    "tailored_summary": "Professional Summary",
+    "tailored_skills": "Skills",
+    "tailored_experience": "Experience Bullets",
+}
 
 
 class AgentState(TypedDict):
     """State for the resume tailoring agent."""
     messages: Annotated[List, add_messages]
     job_description: str | None
+    compressed_job_description: str | None  # Job description without boilerplate, used in prompts
+    jd_tokens_saved: int | None  # Estimated tokens the compression removes from each prompt
     input_method: str | None  # "text" or "url"
     job_url: str | None  # Original URL if provided
     keywords_analysis: str | None  # Step A
@@ -54,13 +126,201 @@ class AgentState(TypedDict):
     interest_answer: str | None
     company_name: str | None
     output_files: dict | None
+    context_mode: str | None  # "tools" or "prefetch"
+    cv_context: str | None  # Prefetched CV content (prefetch mode)
+    cover_letter_guide_context: str | None  # Prefetched guide content (prefetch mode)
+    reused_outputs: dict | None  # Outputs reused from a similar past posting
+    job_description_embedding: list | None  # From the semantic cache lookup, reused when the run is stored
+    output_dir: str | None  # Where save_outputs writes files (defaults to outputs/)
+    tool_runs: Annotated[List, operator.add]  # Timing record per tool call
 
 
-def get_job_description(state: AgentState) -> AgentState:
-    """Node 1: Get job description from user input (text or URL)."""
+def create_initial_state(job_description: str, input_method: str = "text",
+                         job_url: str = None, company_name: str = None,
+                         context_mode: str = None, output_dir: str = None) -> dict:
+    """
+    Build the initial graph state for one job description.
+    
+    Args:
+        job_description: The job description text
+        input_method: "text" or "url"
+        job_url: Original URL if provided
+        company_name: Company name, or None to auto-detect
+        context_mode: "tools" or "prefetch" (defaults to DEFAULT_CONTEXT_MODE)
+        output_dir: Directory for saved outputs (defaults to outputs/)
+        
+    Returns:
+        State dict ready for resume_agent.invoke / ainvoke
+    """
+    return {
+        "messages": [],
+        "job_description": job_description,
+        "input_method": input_method,
+        "job_url": job_url,
+        "company_name": company_name,
+        "keywords_analysis": None,
+        "tailored_summary": None,
+        "tailored_skills": None,
+        "tailored_experience": None,
+        "tailored_name_desc": None,
+        "length_check_result": None,
+        "cover_letter": None,
+        "interest_answer": None,
+        "output_files": None,
+        "context_mode": context_mode or DEFAULT_CONTEXT_MODE,
+        "output_dir": output_dir
+    }
+
+
+def _print_step(step, title: str):
+    """Print the banner for a graph step."""
     print("\n" + "="*80)
-    print("STEP 1: Getting Job Description")
+    print(f"STEP {step}: {title}")
     print("="*80)
+
+
+def _context_mode(state: AgentState) -> str:
+    """Get the context mode for this run."""
+    context_mode = state.get("context_mode") or DEFAULT_CONTEXT_MODE
+    if context_mode not in CONTEXT_MODES:
+        raise ValueError(f"Unknown context mode: {context_mode} (expected one of {CONTEXT_MODES})")
+    return context_mode
+
+
+def _call_llm(state: AgentState, messages: list, node: str):
+    """
+    Run a node's LLM call in the run's context mode, on the node's routed model.
+    
+    Returns:
+        Tuple of (final LLM response, tool timing records)
+    """
+    llm = get_llm(node)
+    if _context_mode(state) == "prefetch":
+        # Context is already inlined in the messages - one call, no tools
+        return llm.invoke(messages), []
+    return run_tool_loop(llm, get_retriever_tools(), messages)
+
+
+async def _acall_llm(state: AgentState, messages: list, node: str):
+    """Async version of _call_llm."""
+    llm = get_llm(node)
+    if _context_mode(state) == "prefetch":
+        return await llm.ainvoke(messages), []
+    return await arun_tool_loop(llm, get_retriever_tools(), messages)
+
+
+# Output written by each LLM node, used to decide what a semantic cache hit covers
+LLM_NODE_OUTPUT_KEYS = [
+    "keywords_analysis",
+    "tailored_summary",
+    "tailored_skills",
+    "tailored_experience",
+    "tailored_name_desc",
+    "length_check_result",
+    "cover_letter",
+    "interest_answer",
+]
+
+
+def _reused_output(state: AgentState, key: str):
+    """Get an output reused from a similar past posting, if any."""
+    return (state.get("reused_outputs") or {}).get(key)
+
+
+def _reuse_update(match, similarity: float, company_name: str, embedding) -> dict:
+    """Build the state update for a semantic cache lookup."""
+    # Kept so save_outputs doesn't embed the job description again
+    update = {"job_description_embedding": embedding.tolist()}
+    if match is None:
+        return update
+    
+    reused = reusable_outputs(match, company_name)
+    print(f"  ✓ Similar posting found (similarity {similarity:.3f}) - reusing {len(reused)} outputs")
+    return {**update, "reused_outputs": reused}
+
+
+def _lookup_similar_run(job_description: str, company_name: str, context_mode: str) -> dict:
+    """Look up a near-identical past posting in the semantic cache."""
+    cache = get_semantic_cache()
+    if cache is None:
+        return {}
+    
+    try:
+        embedding = cache.embed(job_description)
+        match, similarity = cache.search(embedding, context_mode)
+    except Exception as e:
+        print(f"  Semantic cache lookup failed: {e}")
+        return {}
+    return _reuse_update(match, similarity, company_name, embedding)
+
+
+async def _alookup_similar_run(job_description: str, company_name: str, context_mode: str) -> dict:
+    """Async version of _lookup_similar_run."""
+    cache = get_semantic_cache()
+    if cache is None:
+        return {}
+    
+    try:
+        embedding = await cache.aembed(job_description)
+        match, similarity = cache.search(embedding, context_mode)
+    except Exception as e:
+        print(f"  Semantic cache lookup failed: {e}")
+        return {}
+    return _reuse_update(match, similarity, company_name, embedding)
+
+
+def _store_run(state: AgentState):
+    """Store a freshly generated run in the semantic cache."""
+    cache = get_semantic_cache()
+    if cache is None or state.get("reused_outputs"):
+        return
+    
+    try:
+        cache.store(state["job_description"], state["company_name"], state,
+                    embedding=state.get("job_description_embedding"), context_mode=_context_mode(state))
+    except Exception as e:
+        print(f"  Semantic cache update failed: {e}")
+
+
+def build_cv_prefetch_queries(job_description: str) -> list:
+    """
+    Build the CV retrieval queries for a job description.
+    
+    Args:
+        job_description: The job description text
+        
+    Returns:
+        The standard section queries plus queries for the position title
+        and the first few requirement bullets of the JD
+    """
+    from pdf_operations import extract_position_title
+    
+    queries = list(CV_PREFETCH_QUERIES)
+    
+    position = extract_position_title(job_description)
+    if position != "Position":
+        queries.append(f"experience relevant to {position}")
+    
+    requirement_queries = []
+    for line in job_description.split('\n'):
+        line_stripped = line.strip()
+        if line_stripped[:1] in ('-', '•', '*') and 15 < len(line_stripped) < 200:
+            requirement_queries.append(line_stripped.lstrip('-•* '))
+        if len(requirement_queries) >= MAX_REQUIREMENT_QUERIES:
+            break
+    
+    return queries + requirement_queries
+
+
+def _receive_job_description(state: AgentState) -> str:
+    """
+    Validate and report the job description provided by the CLI.
+    
+    Returns:
+        The job description to extract the company name from (boilerplate
+        stripped - memoized, shared with compress_job_description)
+    """
+    _print_step(1, "Getting Job Description")
     
     # This will be populated by the CLI before invoking the graph
     # Just verify it exists
@@ -69,313 +329,498 @@ def get_job_description(state: AgentState) -> AgentState:
     
     print(f"✓ Job description received ({len(state['job_description'])} characters)")
     print(f"  Input method: {state.get('input_method', 'text')}")
+    print(f"  Context mode: {_context_mode(state)}")
+    
+    return compress_job_description(state["job_description"]).text
+
+
+def _job_description_update(state: AgentState, company_name: str, similar_run: dict) -> dict:
+    """Build the state update for the company name and semantic cache lookup."""
+    if not state.get("company_name"):
+        print(f"  Extracted company name: {company_name}")
+    return {"company_name": company_name, **similar_run}
+
+
+def get_job_description(state: AgentState) -> AgentState:
+    """Node 1: Get job description from user input (text or URL)."""
+    job_description = _receive_job_description(state)
     
-    # Extract company name
+    # Extract company name (passing the URL, if available, for better extraction)
     company_name = state.get("company_name")
     if not company_name:
-        # Pass URL if available for better extraction
-        job_url = state.get("job_url")
-        company_name = extract_company_name_from_text(state["job_description"], url=job_url)
-        print(f"  Extracted company name: {company_name}")
+        company_name = extract_company_name_from_text(job_description, url=state.get("job_url"))
     
-    return {"company_name": company_name}
+    return _job_description_update(state, company_name, _lookup_similar_run(state["job_description"], company_name, _context_mode(state)))
 
 
-def analyze_keywords(state: AgentState) -> AgentState:
-    """Node 2: Analyze keywords, tools, verbs, methods from JD."""
-    print("\n" + "="*80)
-    print("STEP 2: Analyzing Keywords and Key Terms")
-    print("="*80)
+async def aget_job_description(state: AgentState) -> AgentState:
+    """Async version of get_job_description."""
+    job_description = _receive_job_description(state)
     
-    messages = get_keywords_analysis_messages(state["job_description"])
-    
-    # Call LLM with tools
-    response = llm_with_tools.invoke(messages)
-    
-    # Check if tools were called
-    if hasattr(response, 'tool_calls') and response.tool_calls:
-        # Execute tool calls
-        tool_results = []
-        for tool_call in response.tool_calls:
-            tool_name = tool_call['name']
-            tool_args = tool_call['args']
-            print(f"  Using tool: {tool_name}")
-            
-            if tool_name in tools_dict:
-                result = tools_dict[tool_name].invoke(tool_args)
-                tool_results.append(str(result))
-        
-        # Call LLM again with tool results
-        messages.append({"role": "assistant", "content": str(response.content)})
-        messages.append({"role": "user", "content": "\n\n".join(tool_results)})
-        response = llm.invoke(messages)
-    
-    keywords_analysis = response.content
-    print(f"✓ Keywords analysis complete ({len(keywords_analysis)} characters)")
+    company_name = state.get("company_name")
+    if not company_name:
+        company_name = await aextract_company_name_from_text(job_description, url=state.get("job_url"))
     
-    return {"keywords_analysis": keywords_analysis}
+    return _job_description_update(state, company_name, await _alookup_similar_run(state["job_description"], company_name, _context_mode(state)))
 
 
-def tailor_summary(state: AgentState) -> AgentState:
-    """Node 3: Tailor professional summary."""
-    print("\n" + "="*80)
-    print("STEP 3: Tailoring Professional Summary")
-    print("="*80)
+def _prompt_job_description(state: AgentState) -> str:
+    """Job description inlined into prompts (boilerplate removed when available)."""
+    return state.get("compressed_job_description") or state["job_description"]
+
+
+def _compression_update(job_description: str) -> dict:
+    """Compress the job description and report the tokens saved."""
+    compressed = compress_job_description(job_description)
     
-    messages = get_tailor_summary_messages(
-        state["job_description"],
-        state["keywords_analysis"]
-    )
+    print(f"✓ Job description compressed: ~{compressed.original_tokens} → "
+          f"~{compressed.compressed_tokens} tokens ({compressed.tokens_saved} saved per prompt, "
+          f"~{compressed.tokens_saved * JD_PROMPT_COUNT} per run)")
+    if compressed.dropped_sections:
+        print(f"  Dropped: {', '.join(compressed.dropped_sections)}")
     
-    response = llm_with_tools.invoke(messages)
-    
-    # Handle tool calls
-    if hasattr(response, 'tool_calls') and response.tool_calls:
-        tool_results = []
-        for tool_call in response.tool_calls:
-            tool_name = tool_call['name']
-            tool_args = tool_call['args']
-            print(f"  Using tool: {tool_name}")
-            
-            if tool_name in tools_dict:
-                result = tools_dict[tool_name].invoke(tool_args)
-                tool_results.append(str(result))
-        
-        messages.append({"role": "assistant", "content": str(response.content)})
-        messages.append({"role": "user", "content": "\n\n".join(tool_results)})
-        response = llm.invoke(messages)
+    return {
+        "compressed_job_description": compressed.text,
+        "jd_tokens_saved": compressed.tokens_saved
+    }
+
+
+def compress_job_description_node(state: AgentState) -> AgentState:
+    """Node 1a: Strip boilerplate (benefits, EEO/legal text, repeated lines) from the job description."""
+    _print_step("1a", "Compressing Job Description")
+    return _compression_update(state["job_description"])
+
+
+async def acompress_job_description_node(state: AgentState) -> AgentState:
+    """Async version of compress_job_description_node (pure CPU work, no I/O)."""
+    _print_step("1a", "Compressing Job Description")
+    return _compression_update(state["job_description"])
+
+
+def _prefetch_queries(state: AgentState):
+    """
+    Decide whether prefetch_context has work to do.
     
-    tailored_summary = response.content
-    print(f"✓ Summary tailored ({len(tailored_summary)} characters)")
+    Returns:
+        The CV queries to run, or None when nothing has to be prefetched
+    """
+    if _context_mode(state) != "prefetch":
+        return None
+    if all(_reused_output(state, key) for key in LLM_NODE_OUTPUT_KEYS):
+        return None
+    if state.get("cv_context") and state.get("cover_letter_guide_context"):
+        # Already prefetched while the CLI waited for confirmation
+        return None
     
-    return {"tailored_summary": tailored_summary}
+    _print_step("1b", "Prefetching CV and Cover Letter Guide Context")
+    return build_cv_prefetch_queries(_prompt_job_description(state))
 
 
-def tailor_skills(state: AgentState) -> AgentState:
-    """Node 4: Tailor skills section."""
-    print("\n" + "="*80)
-    print("STEP 4: Tailoring Skills Section")
-    print("="*80)
+def _prefetch_update(cv_queries: list, cv_context: str, guide_context: str) -> dict:
+    """Build the state update for the prefetched context."""
+    print(f"✓ Context prefetched ({len(cv_queries)} CV queries, {len(GUIDE_PREFETCH_QUERIES)} guide queries)")
+    return {"cv_context": cv_context, "cover_letter_guide_context": guide_context}
+
+
+def prefetch_context(state: AgentState) -> AgentState:
+    """Node 1b: Retrieve CV and guide context once for the whole run (prefetch mode)."""
+    cv_queries = _prefetch_queries(state)
+    if cv_queries is None:
+        return {}
     
-    messages = get_tailor_skills_messages(
-        state["job_description"],
-        state["keywords_analysis"]
+    cv_context = retrieve_context(cv_queries, CV_SEARCH_KWARGS, "CV Section")
+    guide_context = retrieve_context(GUIDE_PREFETCH_QUERIES, GUIDE_SEARCH_KWARGS, "Guide Section")
+    return _prefetch_update(cv_queries, cv_context, guide_context)
+
+
+async def aprefetch_context(state: AgentState) -> AgentState:
+    """Async version of prefetch_context."""
+    cv_queries = _prefetch_queries(state)
+    if cv_queries is None:
+        return {}
+    
+    cv_context, guide_context = await asyncio.gather(
+        aretrieve_context(cv_queries, CV_SEARCH_KWARGS, "CV Section"),
+        aretrieve_context(GUIDE_PREFETCH_QUERIES, GUIDE_SEARCH_KWARGS, "Guide Section")
+    )
+    return _prefetch_update(cv_queries, cv_context, guide_context)
+
+
+class LLMNode(NamedTuple):
+    """How one single-call LLM node builds its prompt and reports its output."""
+    step: int
+    title: str
+    output_key: str
+    done: str  # Printed with the output length once the node is done
+    build_messages: Callable[[dict], list]
+
+
+def _keywords_messages(state: AgentState) -> list:
+    return get_keywords_analysis_messages(
+        _prompt_job_description(state),
+        cv_context=state.get("cv_context"),
+        context_mode=_context_mode(state)
     )
+
+
+def _tailoring_messages(get_messages: Callable) -> Callable[[dict], list]:
+    """Message builder for a section-tailoring node (all take the same inputs)."""
+    def build_messages(state: AgentState) -> list:
+        return get_messages(
+            _prompt_job_description(state),
+            state["keywords_analysis"],
+            cv_context=state.get("cv_context"),
+            context_mode=_context_mode(state)
+        )
+    return build_messages
+
+
+def _cover_letter_messages(state: AgentState) -> list:
+    return get_cover_letter_messages(
+        _prompt_job_description(state),
+        state["company_name"],
+        state["tailored_summary"],
+        state["tailored_skills"],
+        state["tailored_experience"],
+        cv_context=state.get("cv_context"),
+        guide_context=state.get("cover_letter_guide_context"),
+        context_mode=_context_mode(state)
+    )
+
+
+def _interest_answer_messages(state: AgentState) -> list:
+    return get_interest_answer_messages(
+        _prompt_job_description(state),
+        state["company_name"],
+        cv_context=state.get("cv_context"),
+        context_mode=_context_mode(state)
+    )
+
+
+# The nodes that make a single LLM call (or tool loop), by node name. Each has
+# a sync and an async twin that differ only in the awaited call.
+LLM_NODES = {
+    "analyze_keywords": LLMNode(
+        2, "Analyzing Keywords and Key Terms", "keywords_analysis",
+        "Keywords analysis complete", _keywords_messages),
+    "tailor_summary": LLMNode(
+        3, "Tailoring Professional Summary", "tailored_summary",
+        "Summary tailored", _tailoring_messages(get_tailor_summary_messages)),
+    "tailor_skills": LLMNode(
+        4, "Tailoring Skills Section", "tailored_skills",
+        "Skills tailored", _tailoring_messages(get_tailor_skills_messages)),
+    "tailor_experience": LLMNode(
+        5, "Tailoring Experience Bullets", "tailored_experience",
+        "Experience tailored", _tailoring_messages(get_tailor_experience_messages)),
+    "tailor_name_desc": LLMNode(
+        6, "Tailoring Professional Title & Specialization", "tailored_name_desc",
+        "Title/Specialization tailored", _tailoring_messages(get_tailor_name_desc_messages)),
+    "generate_cover_letter": LLMNode(
+        8, "Generating Cover Letter", "cover_letter",
+        "Cover letter generated", _cover_letter_messages),
+    "generate_interest_answer": LLMNode(
+        9, "Generating Interest Answer", "interest_answer",
+        "Interest answer generated", _interest_answer_messages),
+}
+
+
+def _start_llm_node(state: AgentState, node: str) -> tuple:
+    """
+    Print a node's banner and build its prompt, unless its output already exists.
     
-    response = llm_with_tools.invoke(messages)
-    
-    # Handle tool calls
-    if hasattr(response, 'tool_calls') and response.tool_calls:
-        tool_results = []
-        for tool_call in response.tool_calls:
-            tool_name = tool_call['name']
-            tool_args = tool_call['args']
-            print(f"  Using tool: {tool_name}")
-            
-            if tool_name in tools_dict:
-                result = tools_dict[tool_name].invoke(tool_args)
-                tool_results.append(str(result))
-        
-        messages.append({"role": "assistant", "content": str(response.content)})
-        messages.append({"role": "user", "content": "\n\n".join(tool_results)})
-        response = llm.invoke(messages)
+    Returns:
+        Tuple of (state update, None) when the output is already known, or
+        (None, messages) when the LLM has to be called
+    """
+    spec = LLM_NODES[node]
+    _print_step(spec.step, spec.title)
     
-    tailored_skills = response.content
-    print(f"✓ Skills tailored ({len(tailored_skills)} characters)")
+    if node == "analyze_keywords" and state.get("keywords_analysis"):
+        print("✓ Already analyzed while waiting for confirmation")
+        return {}, None
     
-    return {"tailored_skills": tailored_skills}
+    reused = _reused_output(state, spec.output_key)
+    if reused is not None:
+        print("✓ Reused from a similar posting")
+        return {spec.output_key: reused}, None
+    
+    return None, spec.build_messages(state)
+
+
+def _finish_llm_node(node: str, response, tool_runs: list) -> dict:
+    """Report a node's LLM output and build its state update."""
+    spec = LLM_NODES[node]
+    output = response.content
+    print(f"✓ {spec.done} ({len(output)} characters)")
+    return {spec.output_key: output, "tool_runs": tool_runs}
+
+
+def _run_llm_node(state: AgentState, node: str) -> dict:
+    """Run one of LLM_NODES."""
+    update, messages = _start_llm_node(state, node)
+    if update is not None:
+        return update
+    return _finish_llm_node(node, *_call_llm(state, messages, node))
+
+
+async def _arun_llm_node(state: AgentState, node: str) -> dict:
+    """Async version of _run_llm_node."""
+    update, messages = _start_llm_node(state, node)
+    if update is not None:
+        return update
+    return _finish_llm_node(node, *await _acall_llm(state, messages, node))
+
+
+def analyze_keywords(state: AgentState) -> AgentState:
+    """Node 2: Analyze keywords, tools, verbs, methods from JD."""
+    return _run_llm_node(state, "analyze_keywords")
+
+
+async def aanalyze_keywords(state: AgentState) -> AgentState:
+    """Async version of analyze_keywords."""
+    return await _arun_llm_node(state, "analyze_keywords")
+
+
+def tailor_summary(state: AgentState) -> AgentState:
+    """Node 3: Tailor professional summary."""
+    return _run_llm_node(state, "tailor_summary")
+
+
+async def atailor_summary(state: AgentState) -> AgentState:
+    """Async version of tailor_summary."""
+    return await _arun_llm_node(state, "tailor_summary")
+
+
+def tailor_skills(state: AgentState) -> AgentState:
+    """Node 4: Tailor skills section."""
+    return _run_llm_node(state, "tailor_skills")
+
+
+async def atailor_skills(state: AgentState) -> AgentState:
+    """Async version of tailor_skills."""
+    return await _arun_llm_node(state, "tailor_skills")
 
 
 def tailor_experience(state: AgentState) -> AgentState:
     """Node 5: Tailor experience bullets."""
-    print("\n" + "="*80)
-    print("STEP 5: Tailoring Experience Bullets")
-    print("="*80)
+    return _run_llm_node(state, "tailor_experience")
+
+
+async def atailor_experience(state: AgentState) -> AgentState:
+    """Async version of tailor_experience."""
+    return await _arun_llm_node(state, "tailor_experience")
+
+
+def tailor_name_desc(state: AgentState) -> AgentState:
+    """Node 6: Tailor professional title and specialization."""
+    return _run_llm_node(state, "tailor_name_desc")
+
+
+async def atailor_name_desc(state: AgentState) -> AgentState:
+    """Async version of tailor_name_desc."""
+    return await _arun_llm_node(state, "tailor_name_desc")
+
+
+def _cv_texts(state: AgentState) -> dict:
+    """Current text of each CV section, by state key."""
+    from pdf_operations import CV_SECTIONS
+    return {key: state.get(key) or "" for key, _ in CV_SECTIONS}
+
+
+def _condense_targets(layout: dict, texts: dict) -> dict:
+    """
+    Character budget for each section that runs past the end of the page.
     
-    messages = get_tailor_experience_messages(
-        state["job_description"],
-        state["keywords_analysis"]
+    The overflow is split between the overflowing sections in proportion to
+    their rendered height.
+    """
+    overflowing = [section for section in layout["sections"]
+                   if section["key"] in layout["overflowing"]]
+    total_height = sum(section["height"] for section in overflowing)
+    
+    targets = {}
+    for section in overflowing:
+        share = layout["overflow"] * section["height"] / total_height
+        ratio = max(MIN_CONDENSE_RATIO, (section["height"] - share) / section["height"])
+        targets[section["key"]] = int(len(texts[section["key"]]) * ratio * CONDENSE_SAFETY_MARGIN)
+    return targets
+
+
+def _print_overflow(layout: dict, targets: dict):
+    """Report which sections have to be condensed."""
+    print(f"  ⚠ CV is {layout['overflow']:.0f}pt longer than one page")
+    for key, target in targets.items():
+        print(f"  Condensing {CV_SECTION_TITLES[key]} to ~{target} characters")
+
+
+def _condense_messages(state: AgentState, texts: dict, key: str, target: int) -> list:
+    """Messages asking the LLM to condense one CV section."""
+    return get_condense_section_messages(
+        CV_SECTION_TITLES[key],
+        texts[key],
+        target,
+        state.get("keywords_analysis") or ""
     )
+
+
+def _length_check_update(texts: dict, layout: dict, condensed: list) -> dict:
+    """
+    Build the state update for a measured (and possibly condensed) CV.
     
-    response = llm_with_tools.invoke(messages)
-    
-    # Handle tool calls
-    if hasattr(response, 'tool_calls') and response.tool_calls:
-        tool_results = []
-        for tool_call in response.tool_calls:
-            tool_name = tool_call['name']
-            tool_args = tool_call['args']
-            print(f"  Using tool: {tool_name}")
-            
-            if tool_name in tools_dict:
-                result = tools_dict[tool_name].invoke(tool_args)
-                tool_results.append(str(result))
-        
-        messages.append({"role": "assistant", "content": str(response.content)})
-        messages.append({"role": "user", "content": "\n\n".join(tool_results)})
-        response = llm.invoke(messages)
+    layout is None when the condensed text couldn't be laid out; the
+    condensed sections are kept, unmeasured.
+    """
+    if layout is None:
+        length_check = "UNMEASURED"
+    else:
+        used = layout["used_height"] / layout["available_height"]
+        status = "OK" if layout["fits"] else "TOO_LONG"
+        length_check = f"{status}: CV uses {used:.0%} of one page"
+    if condensed:
+        length_check += "; condensed " + ", ".join(CV_SECTION_TITLES[key] for key in condensed)
     
-    tailored_experience = response.content
-    print(f"✓ Experience tailored ({len(tailored_experience)} characters)")
+    print(f"✓ Length check complete")
+    if layout is None:
+        print("  ⚠ Condensed resume could not be measured - keeping it unmeasured")
+    elif layout["fits"]:
+        print(f"  ✓ Resume fits on one page ({used:.0%} of the page used)")
+    else:
+        print(f"  ⚠ Resume is still longer than one page after condensing ({used:.0%})")
     
-    return {"tailored_experience": tailored_experience}
+    update = {
+        "length_check_result": length_check,
+        "messages": [AIMessage(content=f"Resume length measured: {length_check}")]
+    }
+    # Condensed sections replace the tailored versions
+    update.update({key: texts[key] for key in condensed})
+    return update
 
 
-def tailor_name_desc(state: AgentState) -> AgentState:
-    """Node 6: Tailor professional title and specialization."""
-    print("\n" + "="*80)
-    print("STEP 6: Tailoring Professional Title & Specialization")
-    print("="*80)
+def _measure_cv(texts: dict):
+    """Measure the CV layout, or return None if the text can't be laid out."""
+    from pdf_operations import measure_cv_layout
+    try:
+        return measure_cv_layout(**texts)
+    except Exception as e:
+        print(f"  ⚠ Could not measure the CV layout: {e}")
+        return None
+
+
+def _start_length_check(state: AgentState) -> tuple:
+    """
+    Print the banner and measure the tailored CV.
     
-    messages = get_tailor_name_desc_messages(
-        state["job_description"],
-        state["keywords_analysis"]
-    )
+    Returns:
+        Tuple of (state update, None, None) when there is nothing to condense
+        (reused or unmeasurable), or (None, section texts, layout)
+    """
+    _print_step(7, "Checking Resume Length (One-Page Requirement)")
     
-    response = llm_with_tools.invoke(messages)
-    
-    # Handle tool calls
-    if hasattr(response, 'tool_calls') and response.tool_calls:
-        tool_results = []
-        for tool_call in response.tool_calls:
-            tool_name = tool_call['name']
-            tool_args = tool_call['args']
-            print(f"  Using tool: {tool_name}")
-            
-            if tool_name in tools_dict:
-                result = tools_dict[tool_name].invoke(tool_args)
-                tool_results.append(str(result))
-        
-        messages.append({"role": "assistant", "content": str(response.content)})
-        messages.append({"role": "user", "content": "\n\n".join(tool_results)})
-        response = llm.invoke(messages)
+    reused = _reused_output(state, "length_check_result")
+    if reused is not None:
+        print("✓ Reused from a similar posting")
+        return {"length_check_result": reused}, None, None
     
-    tailored_name_desc = response.content
-    print(f"✓ Title/Specialization tailored ({len(tailored_name_desc)} characters)")
+    texts = _cv_texts(state)
+    layout = _measure_cv(texts)
+    if layout is None:
+        return {"length_check_result": "UNMEASURED"}, None, None
+    return None, texts, layout
+
+
+def _apply_condensed(texts: dict, condensed: list, targets: dict, responses: list):
+    """
+    Replace the condensed sections' text and re-measure the CV.
     
-    return {"tailored_name_desc": tailored_name_desc}
+    Returns:
+        The new layout, or None if the condensed text can't be laid out
+    """
+    for key, response in zip(targets, responses):
+        texts[key] = response.content.strip()
+        if key not in condensed:
+            condensed.append(key)
+    return _measure_cv(texts)
 
 
 def check_resume_length(state: AgentState) -> AgentState:
-    """Node 7: Check if resume fits on one page and condense if needed."""
-    print("\n" + "="*80)
-    print("STEP 7: Checking Resume Length (One-Page Requirement)")
-    print("="*80)
+    """
+    Node 7: Check if resume fits on one page and condense if needed.
     
-    messages = get_check_length_messages(
-        state["tailored_summary"],
-        state["tailored_skills"],
-        state["tailored_experience"],
-        state["tailored_name_desc"]
-    )
+    The CV is laid out with the same ReportLab styles as the PDF and measured
+    against the page; the LLM is only called to condense the sections that
+    run past the end of the page.
+    """
+    update, texts, layout = _start_length_check(state)
+    if update is not None:
+        return update
     
-    response = llm.invoke(messages)
-    length_check = response.content
+    condensed = []
+    for _ in range(MAX_CONDENSE_ROUNDS):
+        if layout["fits"]:
+            break
+        targets = _condense_targets(layout, texts)
+        _print_overflow(layout, targets)
+        responses = [
+            get_llm("condense_section").invoke(_condense_messages(state, texts, key, target))
+            for key, target in targets.items()
+        ]
+        layout = _apply_condensed(texts, condensed, targets, responses)
+        if layout is None:
+            break
     
-    print(f"✓ Length check complete")
+    return _length_check_update(texts, layout, condensed)
+
+
+async def acheck_resume_length(state: AgentState) -> AgentState:
+    """Async version of check_resume_length."""
+    update, texts, layout = _start_length_check(state)
+    if update is not None:
+        return update
     
-    # Check if condensing was needed
-    if "TOO_LONG" in length_check.upper():
-        print("  ⚠ Resume was too long - condensed versions provided")
-        
-        # Try to extract condensed sections from the response
-        # The LLM should provide revised sections if too long
-        # We'll update the state with condensed versions if provided
-        # This is a simple heuristic - could be improved with structured output
-        
-        # For now, just store the result and let the user review
-        return {
-            "length_check_result": length_check,
-            "messages": [AIMessage(content="Resume length checked and adjusted if needed.")]
-        }
-    else:
-        print("  ✓ Resume fits on one page")
-        return {
-            "length_check_result": length_check,
-            "messages": [AIMessage(content="Resume length verified - fits on one page.")]
-        }
+    condensed = []
+    for _ in range(MAX_CONDENSE_ROUNDS):
+        if layout["fits"]:
+            break
+        targets = _condense_targets(layout, texts)
+        _print_overflow(layout, targets)
+        # Overflowing sections are condensed concurrently
+        responses = await asyncio.gather(*[
+            get_llm("condense_section").ainvoke(_condense_messages(state, texts, key, target))
+            for key, target in targets.items()
+        ])
+        layout = _apply_condensed(texts, condensed, targets, responses)
+        if layout is None:
+            break
+    
+    return _length_check_update(texts, layout, condensed)
 
 
 def generate_cover_letter(state: AgentState) -> AgentState:
     """Node 8: Generate cover letter."""
-    print("\n" + "="*80)
-    print("STEP 8: Generating Cover Letter")
-    print("="*80)
-    
-    messages = get_cover_letter_messages(
-        state["job_description"],
-        state["company_name"],
-        state["tailored_summary"],
-        state["tailored_skills"],
-        state["tailored_experience"]
-    )
-    
-    response = llm_with_tools.invoke(messages)
-    
-    # Handle tool calls
-    if hasattr(response, 'tool_calls') and response.tool_calls:
-        tool_results = []
-        for tool_call in response.tool_calls:
-            tool_name = tool_call['name']
-            tool_args = tool_call['args']
-            print(f"  Using tool: {tool_name}")
-            
-            if tool_name in tools_dict:
-                result = tools_dict[tool_name].invoke(tool_args)
-                tool_results.append(str(result))
-        
-        messages.append({"role": "assistant", "content": str(response.content)})
-        messages.append({"role": "user", "content": "\n\n".join(tool_results)})
-        response = llm.invoke(messages)
-    
-    cover_letter = response.content
-    print(f"✓ Cover letter generated ({len(cover_letter)} characters)")
-    
-    return {"cover_letter": cover_letter}
+    return _run_llm_node(state, "generate_cover_letter")
+
+
+async def agenerate_cover_letter(state: AgentState) -> AgentState:
+    """Async version of generate_cover_letter."""
+    return await _arun_llm_node(state, "generate_cover_letter")
 
 
 def generate_interest_answer(state: AgentState) -> AgentState:
     """Node 9: Generate 'why interested' answer."""
-    print("\n" + "="*80)
-    print("STEP 9: Generating Interest Answer")
-    print("="*80)
-    
-    messages = get_interest_answer_messages(
-        state["job_description"],
-        state["company_name"]
-    )
-    
-    response = llm_with_tools.invoke(messages)
-    
-    # Handle tool calls
-    if hasattr(response, 'tool_calls') and response.tool_calls:
-        tool_results = []
-        for tool_call in response.tool_calls:
-            tool_name = tool_call['name']
-            tool_args = tool_call['args']
-            print(f"  Using tool: {tool_name}")
-            
-            if tool_name in tools_dict:
-                result = tools_dict[tool_name].invoke(tool_args)
-                tool_results.append(str(result))
-        
-        messages.append({"role": "assistant", "content": str(response.content)})
-        messages.append({"role": "user", "content": "\n\n".join(tool_results)})
-        response = llm.invoke(messages)
-    
-    interest_answer = response.content
-    print(f"✓ Interest answer generated ({len(interest_answer)} characters)")
-    
-    return {"interest_answer": interest_answer}
+    return _run_llm_node(state, "generate_interest_answer")
+
+
+async def agenerate_interest_answer(state: AgentState) -> AgentState:
+    """Async version of generate_interest_answer."""
+    return await _arun_llm_node(state, "generate_interest_answer")
 
 
 def save_outputs(state: AgentState) -> AgentState:
     """Node 10: Save all outputs to files."""
-    print("\n" + "="*80)
-    print("STEP 10: Saving Outputs")
-    print("="*80)
+    _print_step(10, "Saving Outputs")
+    from pdf_operations import save_all_outputs
     
-    output_dir = os.path.join(os.path.dirname(__file__), "outputs")
+    output_dir = state.get("output_dir") or DEFAULT_OUTPUT_DIR
     
     output_files = save_all_outputs(
         output_dir=output_dir,
@@ -398,39 +843,231 @@ def save_outputs(state: AgentState) -> AgentState:
         print(f"PDF file:  {output_files['pdf_file']}")
     print("="*80)
     
+    _store_run(state)
+    
     return {"output_files": output_files}
 
 
-# Build the graph
-graph_builder = StateGraph(AgentState)
-
-# Add nodes
-graph_builder.add_node("get_job_description", get_job_description)
-graph_builder.add_node("analyze_keywords", analyze_keywords)
-graph_builder.add_node("tailor_summary", tailor_summary)
-graph_builder.add_node("tailor_skills", tailor_skills)
-graph_builder.add_node("tailor_experience", tailor_experience)
-graph_builder.add_node("tailor_name_desc", tailor_name_desc)
-graph_builder.add_node("check_resume_length", check_resume_length)
-graph_builder.add_node("generate_cover_letter", generate_cover_letter)
-graph_builder.add_node("generate_interest_answer", generate_interest_answer)
-graph_builder.add_node("save_outputs", save_outputs)
-
-# Add edges (linear flow)
-graph_builder.add_edge(START, "get_job_description")
-graph_builder.add_edge("get_job_description", "analyze_keywords")
-graph_builder.add_edge("analyze_keywords", "tailor_summary")
-graph_builder.add_edge("tailor_summary", "tailor_skills")
-graph_builder.add_edge("tailor_skills", "tailor_experience")
-graph_builder.add_edge("tailor_experience", "tailor_name_desc")
-graph_builder.add_edge("tailor_name_desc", "check_resume_length")
-graph_builder.add_edge("check_resume_length", "generate_cover_letter")
-graph_builder.add_edge("generate_cover_letter", "generate_interest_answer")
-graph_builder.add_edge("generate_interest_answer", "save_outputs")
-graph_builder.add_edge("save_outputs", END)
-
-# Compile the graph
-resume_agent = graph_builder.compile()
+async def asave_outputs(state: AgentState) -> AgentState:
+    """Async version of save_outputs (file and PDF writing run off the event loop)."""
+    return await asyncio.to_thread(save_outputs, state)
+
+
+# Edges follow data dependencies rather than step numbers:
+# - generate_interest_answer only needs job_description and company_name,
+#   so it starts on its own branch as soon as the job description is in
+#   (after compress_job_description and prefetch_context, which is a no-op
+#   unless the run is in prefetch mode).
+# - The four section-tailoring nodes only read job_description and
+#   keywords_analysis, so they fan out in parallel after analyze_keywords
+#   and join again at check_resume_length.
+# - generate_cover_letter starts once the summary, skills and experience
+#   sections exist, alongside the length check.
+# - save_outputs waits for every branch.
+TAILORING_NODES = [
+    "tailor_summary",
+    "tailor_skills",
+    "tailor_experience",
+    "tailor_name_desc",
+]
+COVER_LETTER_INPUT_NODES = [
+    "tailor_summary",
+    "tailor_skills",
+    "tailor_experience",
+]
+SAVE_OUTPUTS_INPUT_NODES = [
+    "check_resume_length",
+    "generate_cover_letter",
+    "generate_interest_answer",
+]
+
+
+def build_graph() -> StateGraph:
+    """Build the (uncompiled) graph of the resume tailoring workflow."""
+    graph_builder = StateGraph(AgentState)
+    
+    # Add nodes (each node has a sync and an async implementation, so the compiled
+    # graph supports both resume_agent.invoke and resume_agent.ainvoke)
+    graph_builder.add_node("get_job_description", RunnableLambda(get_job_description, afunc=aget_job_description))
+    graph_builder.add_node("compress_job_description", RunnableLambda(compress_job_description_node, afunc=acompress_job_description_node))
+    graph_builder.add_node("prefetch_context", RunnableLambda(prefetch_context, afunc=aprefetch_context))
+    graph_builder.add_node("analyze_keywords", RunnableLambda(analyze_keywords, afunc=aanalyze_keywords))
+    graph_builder.add_node("tailor_summary", RunnableLambda(tailor_summary, afunc=atailor_summary))
+    graph_builder.add_node("tailor_skills", RunnableLambda(tailor_skills, afunc=atailor_skills))
+    graph_builder.add_node("tailor_experience", RunnableLambda(tailor_experience, afunc=atailor_experience))
+    graph_builder.add_node("tailor_name_desc", RunnableLambda(tailor_name_desc, afunc=atailor_name_desc))
+    graph_builder.add_node("check_resume_length", RunnableLambda(check_resume_length, afunc=acheck_resume_length))
+    graph_builder.add_node("generate_cover_letter", RunnableLambda(generate_cover_letter, afunc=agenerate_cover_letter))
+    graph_builder.add_node("generate_interest_answer", RunnableLambda(generate_interest_answer, afunc=agenerate_interest_answer))
+    graph_builder.add_node("save_outputs", RunnableLambda(save_outputs, afunc=asave_outputs))
+    
+    # Add edges
+    graph_builder.add_edge(START, "get_job_description")
+    graph_builder.add_edge("get_job_description", "compress_job_description")
+    graph_builder.add_edge("compress_job_description", "prefetch_context")
+    graph_builder.add_edge("prefetch_context", "analyze_keywords")
+    graph_builder.add_edge("prefetch_context", "generate_interest_answer")
+    for node_name in TAILORING_NODES:
+        graph_builder.add_edge("analyze_keywords", node_name)
+    graph_builder.add_edge(TAILORING_NODES, "check_resume_length")
+    graph_builder.add_edge(COVER_LETTER_INPUT_NODES, "generate_cover_letter")
+    graph_builder.add_edge(SAVE_OUTPUTS_INPUT_NODES, "save_outputs")
+    graph_builder.add_edge("save_outputs", END)
+    
+    return graph_builder
+
+
+# Compiled graph without checkpointing (lazy loaded)
+_resume_agent = None
+_graph_lock = threading.Lock()
+
+
+_caches_configured = False
+_caches_lock = threading.Lock()
+
+
+def configure_caches():
+    """
+    Configure the caches from the environment (once per process).
+    
+    - Persistent LLM response cache (disable with LLM_CACHE_ENABLED=false)
+    - Reuse of outputs from near-identical past postings (SEMANTIC_CACHE_ENABLED=false)
+    - Near-duplicate posting detection in the CLI, batch, queue and server (DEDUP_ENABLED=false)
+    - Disk cache of embeddings by model and text hash (EMBEDDING_CACHE_ENABLED=false)
+    
+    Entry points call this before applying their own options (e.g. --no-cache),
+    which later calls then leave alone; the graph factories call it so library
+    use gets the same defaults.
+    """
+    global _caches_configured
+    with _caches_lock:
+        if _caches_configured:
+            return
+        configure_llm_cache_from_env()
+        configure_semantic_cache_from_env()
+        configure_duplicate_index_from_env()
+        configure_embedding_cache_from_env()
+        _caches_configured = True
+
+
+def get_resume_agent():
+    """
+    Get the compiled graph (built on first use).
+    
+    `main.resume_agent` and `from main import resume_agent` also resolve to
+    this graph.
+    """
+    global _resume_agent
+    configure_caches()
+    with _graph_lock:
+        if _resume_agent is None:
+            _resume_agent = build_graph().compile()
+        return _resume_agent
+
+
+def __getattr__(name: str):
+    if name == "resume_agent":
+        return get_resume_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Checkpointed graphs by database path, and async ones by (event loop, path) with
+# their connections (lazy loaded)
+_checkpointed_agents = {}
+_async_checkpointed_agents = {}
+_checkpoint_lock = threading.Lock()
+
+
+def get_checkpointed_agent(path: str = None):
+    """
+    Get the graph compiled with a SQLite checkpointer.
+    
+    Args:
+        path: Checkpoint database file (defaults to CHECKPOINT_PATH)
+        
+    Returns:
+        Compiled graph; invoke it with run_config(thread_id)
+    """
+    configure_caches()
+    path = path or CHECKPOINT_PATH
+    with _checkpoint_lock:
+        if path not in _checkpointed_agents:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            _checkpointed_agents[path] = build_graph().compile(checkpointer=SqliteSaver(conn))
+        return _checkpointed_agents[path]
+
+
+def _stop_closed_loop_connections():
+    """Stop the async connections of event loops that have closed (lock held)."""
+    for key in [key for key in _async_checkpointed_agents if key[0].is_closed()]:
+        _, conn = _async_checkpointed_agents.pop(key)
+        conn.stop()
+
+
+async def aget_checkpointed_agent(path: str = None):
+    """
+    Async version of get_checkpointed_agent for use with ainvoke.
+    
+    The async SQLite connection belongs to the running event loop, so one
+    graph is kept per loop and path. Connections of loops that have closed
+    are stopped on the next call; aclose_checkpointed_agents closes the
+    running loop's.
+    """
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    
+    configure_caches()
+    path = path or CHECKPOINT_PATH
+    key = (asyncio.get_running_loop(), path)
+    with _checkpoint_lock:
+        _stop_closed_loop_connections()
+        if key in _async_checkpointed_agents:
+            return _async_checkpointed_agents[key][0]
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = await aiosqlite.connect(path)
+    with _checkpoint_lock:
+        existing = _async_checkpointed_agents.get(key)
+        if existing is None:
+            agent = build_graph().compile(checkpointer=AsyncSqliteSaver(conn))
+            _async_checkpointed_agents[key] = (agent, conn)
+            return agent
+    # Another coroutine on this loop connected first
+    await conn.close()
+    return existing[0]
+
+
+async def aclose_checkpointed_agents():
+    """Close the async checkpoint connections opened on the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _checkpoint_lock:
+        conns = [_async_checkpointed_agents.pop(key)[1]
+                 for key in list(_async_checkpointed_agents) if key[0] is loop]
+    for conn in conns:
+        await conn.close()
+
+
+def new_thread_id() -> str:
+    """Create an ID for a new checkpointed run."""
+    return uuid.uuid4().hex[:12]
+
+
+def run_config(thread_id: str, callbacks: list = None) -> dict:
+    """Build the graph config that checkpoints (or resumes) a run by thread ID."""
+    config = {"configurable": {"thread_id": thread_id}}
+    if callbacks:
+        config["callbacks"] = callbacks
+    return config
+
+
+def get_pending_nodes(agent, thread_id: str) -> tuple:
+    """
+    Get the nodes a checkpointed run still has to execute.
+    
+    Returns:
+        Node names; empty if the run finished or was never started
+    """
+    return agent.get_state(run_config(thread_id)).next
 
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+"""
+Per-node model routing.
+
+model_routing.json maps each LLM step to a model, temperature, maximum output
+tokens and request timeout, under named profiles:
+  - "quality": the large model everywhere (the previous behavior)
+  - "fast": a small model on lightweight steps, the large model kept for the
+    experience bullets and the cover letter
+
+Settings are resolved as profile default < profile node entry < overrides
+from RESUME_AGENT_ROUTING_OVERRIDES (JSON, e.g.
+'{"tailor_name_desc": {"model": "gpt-4o-mini"}}', or "default" for every node).
+The profile comes from RESUME_AGENT_MODEL_PROFILE unless set with
+set_model_profile, and the file from RESUME_AGENT_ROUTING_PATH.
+"""
+from dotenv import load_dotenv
+import json
+import os
+import threading
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROUTING_PATH = os.path.join(BASE_DIR, "model_routing.json")
+
+# Steps that call an LLM (graph nodes, plus the company extractor and the
+# condense calls of the length check)
+ROUTED_NODES = [
+    "extract_company",
+    "analyze_keywords",
+    "tailor_summary",
+    "tailor_skills",
+    "tailor_experience",
+    "tailor_name_desc",
+    "condense_section",
+    "generate_cover_letter",
+    "generate_interest_answer",
+]
+
+ROUTE_SETTINGS = ("model", "temperature", "max_tokens", "timeout")
+
+# Routing file contents, loaded on first use
+_routing = None
+_profile = None
+_llms = {}
+_llms_lock = threading.Lock()
+
+# Builds the chat model for resolved route settings (None: RateLimitedChatOpenAI)
+_chat_model_factory = None
+
+
+def load_routing(path: str = None) -> dict:
+    """
+    Load and validate a routing file.
+
+    Args:
+        path: JSON routing file (defaults to RESUME_AGENT_ROUTING_PATH or model_routing.json)
+
+    Returns:
+        Parsed routing configuration
+    """
+    path = path or os.getenv("RESUME_AGENT_ROUTING_PATH", DEFAULT_ROUTING_PATH)
+    with open(path, encoding="utf-8") as f:
+        routing = json.load(f)
+
+    for name, profile in routing["profiles"].items():
+        _check_settings(f"profile '{name}' default", profile.get("default", {}))
+        for node, settings in profile.get("nodes", {}).items():
+            if node not in ROUTED_NODES:
+                raise ValueError(f"Unknown node '{node}' in profile '{name}' "
+                                 f"(expected one of {ROUTED_NODES})")
+            _check_settings(f"profile '{name}' node '{node}'", settings)
+    if routing.get("default_profile") not in routing["profiles"]:
+        raise ValueError(f"default_profile must be one of {list(routing['profiles'])}")
+    return routing
+
+
+def _check_settings(where: str, settings: dict):
+    unknown = set(settings) - set(ROUTE_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown settings {sorted(unknown)} in {where} "
+                         f"(expected {list(ROUTE_SETTINGS)})")
+
+
+def _get_routing() -> dict:
+    global _routing
+    if _routing is None:
+        _routing = load_routing()
+    return _routing
+
+
+def get_model_profiles() -> list:
+    """Names of the profiles in the routing file."""
+    return list(_get_routing()["profiles"])
+
+
+def get_model_profile() -> str:
+    """Profile currently used for routing."""
+    return _profile or os.getenv("RESUME_AGENT_MODEL_PROFILE") or _get_routing()["default_profile"]
+
+
+def set_model_profile(profile: str):
+    """Use a different profile for the rest of the process."""
+    global _profile
+    if profile not in get_model_profiles():
+        raise ValueError(f"Unknown model profile '{profile}' (expected one of {get_model_profiles()})")
+    _profile = profile
+
+
+def get_route(node: str) -> dict:
+    """
+    Resolve the model settings for a step.
+
+    Args:
+        node: One of ROUTED_NODES
+
+    Returns:
+        Dictionary with model, temperature, max_tokens and timeout
+    """
+    if node not in ROUTED_NODES:
+        raise ValueError(f"Unknown node '{node}' (expected one of {ROUTED_NODES})")
+
+    profile_name = get_model_profile()
+    profiles = _get_routing()["profiles"]
+    if profile_name not in profiles:
+        raise ValueError(f"Unknown model profile '{profile_name}' (expected one of {list(profiles)})")
+    profile = profiles[profile_name]
+    overrides = json.loads(os.getenv("RESUME_AGENT_ROUTING_OVERRIDES", "{}"))
+
+    route = dict.fromkeys(ROUTE_SETTINGS)
+    route.update(profile.get("default", {}))
+    route.update(profile.get("nodes", {}).get(node, {}))
+    route.update(overrides.get("default", {}))
+    route.update(overrides.get(node, {}))
+    return route
+
+
+def get_llm(node: str):
+    """
+    Get the chat model for a step (a RateLimitedChatOpenAI unless another
+    factory was set).
+
+    Clients are created on first use; steps that resolve to the same
+    settings share one client.
+    """
+    route = get_route(node)
+    key = tuple(route[setting] for setting in ROUTE_SETTINGS)
+    with _llms_lock:
+        llm = _llms.get(key)
+        if llm is None:
+            settings = {k: v for k, v in route.items() if v is not None}
+            llm = (_chat_model_factory or _openai_chat_model)(settings)
+            _llms[key] = llm
+        return llm
+
+
+def _openai_chat_model(settings: dict):
+    # Imported here: the OpenAI client libraries take a while to load
+    from rate_limiter import RateLimitedChatOpenAI
+    return RateLimitedChatOpenAI(**settings)
+
+
+def set_chat_model_factory(factory):
+    """
+    Build chat models with factory(settings) instead of RateLimitedChatOpenAI.
+
+    settings holds the route's non-empty model settings. Used by the offline
+    benchmarks to plug in a fake model; pass None to restore the default.
+    Clients created before the call are discarded.
+    """
+    global _chat_model_factory
+    with _llms_lock:
+        _chat_model_factory = factory
+        _llms.clear()
+
+
+def describe_routing() -> list:
+    """(node, model) pairs for the current profile, for display."""
+    return [(node, get_route(node)["model"]) for node in ROUTED_NODES]
@@ -96,6 +96,162 @@ END OF DOCUMENT
     print(f"\n✓ Text output saved: {filepath}")
     return filepath
 
+# CV page layout shared by the PDF and the length check
+CV_PAGE_SIZE = letter
+CV_MARGIN = 0.5*inch
+
+# Padding of the frame SimpleDocTemplate lays the story into (platypus default)
+FRAME_PADDING = 6
+
+# CV sections in page order: (state key, heading or None for the title block)
+CV_SECTIONS = [
+    ("tailored_name_desc", None),
+    ("tailored_summary", "PROFESSIONAL SUMMARY"),
+    ("tailored_skills", "SKILLS"),
+    ("tailored_experience", "EXPERIENCE"),
+]
+
+
+def _cv_document(target) -> SimpleDocTemplate:
+    """Create the CV document template (target is a path or file-like object)."""
+    return SimpleDocTemplate(
+        target,
+        pagesize=CV_PAGE_SIZE,
+        rightMargin=CV_MARGIN,
+        leftMargin=CV_MARGIN,
+        topMargin=CV_MARGIN,
+        bottomMargin=CV_MARGIN
+    )
+
+
+def _cv_styles() -> dict:
+    """Paragraph styles used in the CV."""
+    styles = getSampleStyleSheet()
+    
+    return {
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=14,
+            textColor='#000000',
+            spaceAfter=6,
+            alignment=1  # Center
+        ),
+        "heading": ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=11,
+            textColor='#000000',
+            spaceAfter=6,
+            spaceBefore=8
+        ),
+        "body": ParagraphStyle(
+            'CustomBody',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor='#000000',
+            spaceAfter=6
+        )
+    }
+
+
+def build_cv_sections(tailored_name_desc: str, tailored_summary: str,
+                      tailored_skills: str, tailored_experience: str) -> list:
+    """
+    Build the CV flowables, grouped by section.
+    
+    Returns:
+        List of (state key, flowables) in page order
+    """
+    styles = _cv_styles()
+    texts = {
+        "tailored_name_desc": tailored_name_desc,
+        "tailored_summary": tailored_summary,
+        "tailored_skills": tailored_skills,
+        "tailored_experience": tailored_experience
+    }
+    
+    sections = []
+    for i, (key, heading) in enumerate(CV_SECTIONS):
+        text = texts[key].replace('\n', '<br/>')
+        if heading is None:
+            flowables = [Paragraph(text, styles["title"])]
+        else:
+            flowables = [
+                Paragraph(f"<b>{heading}</b>", styles["heading"]),
+                Paragraph(text, styles["body"])
+            ]
+        # Spacer between sections
+        if i < len(CV_SECTIONS) - 1:
+            flowables.append(Spacer(1, 0.1*inch))
+        sections.append((key, flowables))
+    
+    return sections
+
+
+def build_cv_story(tailored_name_desc: str, tailored_summary: str,
+                   tailored_skills: str, tailored_experience: str) -> list:
+    """Build the list of flowables for the CV PDF."""
+    sections = build_cv_sections(tailored_name_desc, tailored_summary,
+                                 tailored_skills, tailored_experience)
+    return [flowable for _, flowables in sections for flowable in flowables]
+
+
+def measure_cv_layout(tailored_name_desc: str, tailored_summary: str,
+                      tailored_skills: str, tailored_experience: str) -> dict:
+    """
+    Measure the rendered height of the CV against one page, without building a PDF.
+    
+    Flowables are wrapped to the page frame exactly as SimpleDocTemplate lays
+    them out (frame padding, and spaceBefore collapsing into the previous
+    flowable's spaceAfter), so the result matches the generated PDF.
+    
+    Returns:
+        Dictionary with:
+            fits: Whether everything fits on one page
+            available_height: Usable frame height in points
+            used_height: Height of the whole CV in points
+            overflow: Points beyond the page (0 if it fits)
+            sections: Per-section dicts with key, height, top and bottom (points from the frame top)
+            overflowing: Keys of sections that extend past the bottom of the page
+    """
+    doc = _cv_document(BytesIO())
+    available_width = doc.width - 2*FRAME_PADDING
+    available_height = doc.height - 2*FRAME_PADDING
+    
+    sections = []
+    used = 0.0
+    previous_space_after = 0.0
+    at_top = True
+    for key, flowables in build_cv_sections(tailored_name_desc, tailored_summary,
+                                            tailored_skills, tailored_experience):
+        top = used
+        for flowable in flowables:
+            _, height = flowable.wrap(available_width, available_height)
+            space_before = 0.0 if at_top else max(flowable.getSpaceBefore() - previous_space_after, 0)
+            used += space_before + height
+            previous_space_after = flowable.getSpaceAfter()
+            used += previous_space_after
+            at_top = False
+        sections.append({"key": key, "height": used - top, "top": top, "bottom": used})
+    
+    # Trailing space after the last flowable doesn't need to fit on the page
+    used -= previous_space_after
+    sections[-1]["bottom"] = used
+    sections[-1]["height"] = used - sections[-1]["top"]
+    
+    overflow = max(0.0, used - available_height)
+    return {
+        "fits": overflow == 0,
+        "available_height": available_height,
+        "used_height": used,
+        "overflow": overflow,
+        "sections": sections,
+        "overflowing": [section["key"] for section in sections
+                        if section["bottom"] > available_height]
+    }
+
+
 def create_tailored_cv_pdf(output_dir: str, company_name: str, position: str,
                            tailored_name_desc: str, tailored_summary: str,
                            tailored_skills: str, tailored_experience: str) -> str:
@@ -128,65 +284,9 @@ def create_tailored_cv_pdf(output_dir: str, company_name: str, position: str,
         filepath = os.path.join(output_dir, filename)
         
         # Create PDF
-        doc = SimpleDocTemplate(
-            filepath,
-            pagesize=letter,
-            rightMargin=0.5*inch,
-            leftMargin=0.5*inch,
-            topMargin=0.5*inch,
-            bottomMargin=0.5*inch
-        )
-        
-        # Container for the 'Flowable' objects
-        story = []
-        
-        # Define styles
-        styles = getSampleStyleSheet()
-        
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=14,
-            textColor='#000000',
-            spaceAfter=6,
-            alignment=1  # Center
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=11,
-            textColor='#000000',
-            spaceAfter=6,
-            spaceBefore=8
-        )
-        
-        body_style = ParagraphStyle(
-            'CustomBody',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor='#000000',
-            spaceAfter=6
-        )
-        
-        # Add content
-        # Title
-        story.append(Paragraph(tailored_name_desc.replace('\n', '<br/>'), title_style))
-        story.append(Spacer(1, 0.1*inch))
-        
-        # Summary
-        story.append(Paragraph("<b>PROFESSIONAL SUMMARY</b>", heading_style))
-        story.append(Paragraph(tailored_summary.replace('\n', '<br/>'), body_style))
-        story.append(Spacer(1, 0.1*inch))
-        
-        # Skills
-        story.append(Paragraph("<b>SKILLS</b>", heading_style))
-        story.append(Paragraph(tailored_skills.replace('\n', '<br/>'), body_style))
-        story.append(Spacer(1, 0.1*inch))
-        
-        # Experience
-        story.append(Paragraph("<b>EXPERIENCE</b>", heading_style))
-        story.append(Paragraph(tailored_experience.replace('\n', '<br/>'), body_style))
+        doc = _cv_document(filepath)
+        story = build_cv_story(tailored_name_desc, tailored_summary,
+                               tailored_skills, tailored_experience)
         
         # Build PDF
         doc.build(story)
@@ -1,21 +1,20 @@
 """
 System prompts for each stage of the resume and cover letter tailoring process.
 """
+import hashlib
+import json
 
 # Step A: Keywords Analysis
 KEYWORDS_ANALYSIS_PROMPT = """You are an expert resume analyst and career coach.
 
-Your task is to analyze the provided job description and extract:
+Your task is to analyze the job description provided above and extract:
 1. Key technical skills and tools mentioned
 2. Important action verbs and competencies
 3. Specific methodologies or frameworks
 4. Required qualifications and certifications
 5. Industry-specific terminology
 
-Use the retrieve_cv_content tool to understand the candidate's background and see which keywords are most relevant.
-
-Job Description:
-{job_description}
+{use_cv} to understand the candidate's background and see which keywords are most relevant.
 
 Provide a comprehensive analysis organized by categories:
 - Technical Skills & Tools
@@ -31,13 +30,9 @@ TAILOR_SUMMARY_PROMPT = """You are an expert resume writer specializing in creat
 
 Your task is to rewrite the candidate's professional summary to achieve 100% alignment with the job description while sounding HUMAN and DISTINCTIVE.
 
-Use the retrieve_cv_content tool to get the current summary and background information.
-
-Job Description:
-{job_description}
+{use_cv} to get the current summary and background information.
 
-Keywords Analysis:
-{keywords_analysis}
+Use the job description and keywords analysis provided above.
 
 Instructions:
 1. Review the candidate's current summary and experience
@@ -73,13 +68,9 @@ TAILOR_SKILLS_PROMPT = """You are an expert at optimizing resume skills sections
 
 Your task is to rewrite the skills section to perfectly align with the job description in a COMPACT but comprehensive format.
 
-Use the retrieve_cv_content tool to understand the candidate's existing skills and experience.
-
-Job Description:
-{job_description}
+{use_cv} to understand the candidate's existing skills and experience.
 
-Keywords Analysis:
-{keywords_analysis}
+Use the job description and keywords analysis provided above.
 
 Instructions:
 1. Prioritize skills mentioned in the job description
@@ -109,13 +100,9 @@ TAILOR_EXPERIENCE_PROMPT = """You are an expert resume writer specializing in cr
 
 Your task is to rewrite the candidate's experience bullets to super-align with the job description, emphasizing QUANTIFIABLE achievements.
 
-Use the retrieve_cv_content tool to understand the candidate's work history and accomplishments.
+{use_cv} to understand the candidate's work history and accomplishments.
 
-Job Description:
-{job_description}
-
-Keywords Analysis:
-{keywords_analysis}
+Use the job description and keywords analysis provided above.
 
 Instructions:
 1. Use the STAR method (Situation, Task, Action, Result)
@@ -146,13 +133,9 @@ TAILOR_NAME_DESC_PROMPT = """You are an expert at crafting targeted professional
 
 Your task is to rewrite the candidate's professional title/headline and specialization to align perfectly with the job description.
 
-Use the retrieve_cv_content tool to understand the candidate's background and expertise.
-
-Job Description:
-{job_description}
+{use_cv} to understand the candidate's background and expertise.
 
-Keywords Analysis:
-{keywords_analysis}
+Use the job description and keywords analysis provided above.
 
 Instructions:
 1. Create a professional title that matches the target role
@@ -166,39 +149,25 @@ Provide:
 - Professional Title/Headline
 - Specialization Description (brief, impactful)"""
 
-# Step F: Check Resume Length
-CHECK_RESUME_LENGTH_PROMPT = """You are an expert resume formatter focused on ensuring resumes fit on one page.
-
-Your task is to verify that all tailored CV sections together will fit on a standard one-page resume format.
-
-Current CV sections:
-- Summary: {tailored_summary}
-- Skills: {tailored_skills}
-- Experience: {tailored_experience}
-- Name/Title: {tailored_name_desc}
+# Step F: Condense Overflowing Resume Section
+CONDENSE_SECTION_PROMPT = """You are an expert resume editor making a resume fit on one page.
 
-Instructions:
-1. Estimate total character count and line count
-2. Standard one-page resume fits approximately:
-   - 3500-4500 characters (including spaces)
-   - 40-55 lines of text
-   - Assuming standard formatting with 10-11pt font, reasonable margins
+The rendered resume is too long, and this section runs past the end of the page. Shorten it to at most {target_characters} characters (it is currently {current_characters}).
 
-3. If content is too long:
-   - Condense experience bullets (prioritize most relevant)
-   - Reduce skills list to most critical items
-   - Tighten summary language
-   - Remove less relevant details
+Section: {section_title}
+{section_text}
 
-4. Maintain quality - don't sacrifice impact for brevity
-5. Ensure the most important information remains
+Keywords from the job description analysis (keep the most important ones):
+{keywords_analysis}
 
-Provide:
-- Length assessment (OK/TOO_LONG)
-- If too long: revised, condensed versions of each section
-- If OK: confirmation that current content fits
+Instructions:
+1. Keep the same format, structure and voice as the current section
+2. Prioritize the content most relevant to the job description keywords
+3. Cut less relevant items and tighten wording rather than making every line vague
+4. Keep concrete metrics and achievements
+5. Do not add new information
 
-Be practical and realistic about resume formatting constraints."""
+Output ONLY the condensed section text, with no heading or commentary."""
 
 # Step G: Generate Cover Letter
 GENERATE_COVER_LETTER_PROMPT = """You are an expert cover letter writer who creates compelling, personalized cover letters with a unique, authentic voice.
@@ -209,22 +178,17 @@ Your task is to write a strong cover letter that sounds HUMAN, UNIQUE, and genui
 🎯 HIGHEST PRIORITY: USE THE COVER LETTER GUIDE PDF
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-**CRITICAL INSTRUCTION #1**: You MUST use the retrieve_cover_letter_guide tool FIRST before writing anything.
+{guide_first}
 
 **CRITICAL INSTRUCTION #2**: The guide "How to write an excellent Cover Letter.pdf" contains the DEFINITIVE structure, best practices, and writing principles. Follow it PRECISELY.
 
 **CRITICAL INSTRUCTION #3**: If there's ANY conflict between the guide's recommendations and the instructions below, the GUIDE ALWAYS TAKES PRIORITY.
 
-**ACTION REQUIRED**: Call retrieve_cover_letter_guide tool multiple times with different queries to extract:
-1. "What is the recommended structure for an excellent cover letter?"
-2. "What are the key principles and best practices for cover letter writing?"
-3. "How should I open and close a cover letter effectively?"
-4. "What makes a cover letter stand out and be memorable?"
+{guide_queries}
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-Job Description:
-{job_description}
+The job description is provided above.
 
 Company Name:
 {company_name}
@@ -240,11 +204,7 @@ Tailored Experience:
 
 Instructions (APPLY THESE WHILE FOLLOWING THE GUIDE):
 
-1. **PRIMARY SOURCE**: Use retrieve_cover_letter_guide extensively
-   - Query the guide for structure recommendations
-   - Query the guide for tone and style guidance
-   - Query the guide for opening and closing strategies
-   - Apply the guide's principles throughout
+{guide_source}
 
 2. **Structure** (adapt based on what the guide recommends):
    - Length: 600-900 words (approximately 1 to 1.5 pages)
@@ -298,7 +258,7 @@ Instructions (APPLY THESE WHILE FOLLOWING THE GUIDE):
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 REMINDER: The cover letter guide PDF is your PRIMARY resource.
-Use retrieve_cover_letter_guide tool extensively. When in doubt, 
+{guide_reminder} When in doubt, 
 prioritize the guide's recommendations over everything else.
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
@@ -309,10 +269,9 @@ GENERATE_INTEREST_PROMPT = """You are a career coach helping candidates prepare
 
 Your task is to craft a thoughtful answer to the question: "Why are you interested in this position at {company_name}?"
 
-Use the retrieve_cv_content tool to understand the candidate's background and career goals.
+{use_cv} to understand the candidate's background and career goals.
 
-Job Description:
-{job_description}
+The job description is provided above.
 
 Company Name:
 {company_name}
@@ -329,80 +288,180 @@ Instructions:
 
 Provide a polished, thoughtful response that the candidate can use in interviews or applications."""
 
-def get_keywords_analysis_messages(job_description: str):
-    """Get messages for keywords analysis."""
-    return [
-        {"role": "system", "content": KEYWORDS_ANALYSIS_PROMPT.format(job_description=job_description)}
-    ]
+# How each step is told to get the CV and guide content, by context mode:
+# with the retriever tools, or from the context prefetched into the prompt
+CV_INSTRUCTIONS = {
+    "tools": "Use the retrieve_cv_content tool",
+    "prefetch": "Use the candidate CV content provided above",
+}
+
+GUIDE_INSTRUCTIONS = {
+    "tools": {
+        "guide_first": "**CRITICAL INSTRUCTION #1**: You MUST use the retrieve_cover_letter_guide tool FIRST before writing anything.",
+        "guide_queries": """**ACTION REQUIRED**: Call retrieve_cover_letter_guide tool multiple times with different queries to extract:
+1. "What is the recommended structure for an excellent cover letter?"
+2. "What are the key principles and best practices for cover letter writing?"
+3. "How should I open and close a cover letter effectively?"
+4. "What makes a cover letter stand out and be memorable?\"""",
+        "guide_source": """1. **PRIMARY SOURCE**: Use retrieve_cover_letter_guide extensively
+   - Query the guide for structure recommendations
+   - Query the guide for tone and style guidance
+   - Query the guide for opening and closing strategies
+   - Apply the guide's principles throughout""",
+        "guide_reminder": "Use retrieve_cover_letter_guide tool extensively.",
+    },
+    "prefetch": {
+        "guide_first": "**CRITICAL INSTRUCTION #1**: You MUST read the cover letter guide content provided above FIRST before writing anything.",
+        "guide_queries": """**ACTION REQUIRED**: The guide content above was retrieved for these questions - extract the answers before writing:
+1. "What is the recommended structure for an excellent cover letter?"
+2. "What are the key principles and best practices for cover letter writing?"
+3. "How should I open and close a cover letter effectively?"
+4. "What makes a cover letter stand out and be memorable?\"""",
+        "guide_source": """1. **PRIMARY SOURCE**: Use the cover letter guide content provided above extensively
+   - Take the structure recommendations from the guide
+   - Take tone and style guidance from the guide
+   - Take opening and closing strategies from the guide
+   - Apply the guide's principles throughout""",
+        "guide_reminder": "Use the guide content provided above extensively.",
+    },
+}
+
+# Shared leading block of every step's prompt. It is identical for all steps
+# of a run (and the keywords analysis block for the four tailoring steps), so
+# the provider's prompt-prefix cache can reuse it; the step-specific
+# instructions come last.
+SHARED_CONTEXT_PROMPT = """You are helping a candidate tailor their resume and cover letter to one job. Every step of this process shares the context below; the instructions for the current step follow after it.
 
-def get_tailor_summary_messages(job_description: str, keywords_analysis: str):
+Job Description:
+{job_description}"""
+
+# Prefetched context: used instead of the retriever tools when the relevant
+# CV and guide content has been retrieved up front for the whole run
+CV_CONTEXT_PROMPT = """Candidate CV content (already retrieved for you - do not call any tools, base your answer on this context):
+
+{cv_context}"""
+
+GUIDE_CONTEXT_PROMPT = """Cover letter guide content (already retrieved for you - do not call any tools, base your answer on this context):
+
+{guide_context}"""
+
+KEYWORDS_CONTEXT_PROMPT = """Keywords Analysis:
+{keywords_analysis}"""
+
+def prompt_version() -> str:
+    """Hash of the prompt templates, identifying the outputs they produce."""
+    templates = {name: value for name, value in globals().items() if name.isupper()}
+    return hashlib.sha256(json.dumps(templates, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def _infer_context_mode(context_mode: str, context: str = None) -> str:
+    """The context mode to word the instructions for (prefetch when context was inlined)."""
+    if context_mode:
+        return context_mode
+    return "prefetch" if context else "tools"
+
+def _use_cv(context_mode: str, cv_context: str = None) -> dict:
+    """Format arguments telling a step how to get the CV content."""
+    return {"use_cv": CV_INSTRUCTIONS[_infer_context_mode(context_mode, cv_context)]}
+
+def _shared_messages(job_description: str, cv_context: str = None):
+    """Leading system message shared by every step of a run."""
+    content = SHARED_CONTEXT_PROMPT.format(job_description=job_description)
+    if cv_context:
+        content += "\n\n" + CV_CONTEXT_PROMPT.format(cv_context=cv_context)
+    return [{"role": "system", "content": content}]
+
+def _step_messages(shared: list, instructions: str):
+    """Shared context messages followed by a step's instructions."""
+    return shared + [{"role": "user", "content": instructions}]
+
+def _with_keywords(shared: list, keywords_analysis: str):
+    """Add the keywords analysis after the shared block (tailoring steps)."""
+    return shared + [{"role": "system", "content": KEYWORDS_CONTEXT_PROMPT.format(
+        keywords_analysis=keywords_analysis
+    )}]
+
+def get_keywords_analysis_messages(job_description: str, cv_context: str = None,
+                                   context_mode: str = None):
+    """
+    Get messages for keywords analysis.
+    
+    Like every step builder, the instructions are worded for context_mode
+    ("tools" or "prefetch"); when it isn't given, prefetch is assumed if
+    context was passed in.
+    """
+    return _step_messages(
+        _shared_messages(job_description, cv_context),
+        KEYWORDS_ANALYSIS_PROMPT.format(**_use_cv(context_mode, cv_context))
+    )
+
+def get_tailor_summary_messages(job_description: str, keywords_analysis: str,
+                                cv_context: str = None, context_mode: str = None):
     """Get messages for summary tailoring."""
-    return [
-        {"role": "system", "content": TAILOR_SUMMARY_PROMPT.format(
-            job_description=job_description,
-            keywords_analysis=keywords_analysis
-        )}
-    ]
+    return _step_messages(
+        _with_keywords(_shared_messages(job_description, cv_context), keywords_analysis),
+        TAILOR_SUMMARY_PROMPT.format(**_use_cv(context_mode, cv_context))
+    )
 
-def get_tailor_skills_messages(job_description: str, keywords_analysis: str):
+def get_tailor_skills_messages(job_description: str, keywords_analysis: str,
+                               cv_context: str = None, context_mode: str = None):
     """Get messages for skills tailoring."""
-    return [
-        {"role": "system", "content": TAILOR_SKILLS_PROMPT.format(
-            job_description=job_description,
-            keywords_analysis=keywords_analysis
-        )}
-    ]
+    return _step_messages(
+        _with_keywords(_shared_messages(job_description, cv_context), keywords_analysis),
+        TAILOR_SKILLS_PROMPT.format(**_use_cv(context_mode, cv_context))
+    )
 
-def get_tailor_experience_messages(job_description: str, keywords_analysis: str):
+def get_tailor_experience_messages(job_description: str, keywords_analysis: str,
+                                   cv_context: str = None, context_mode: str = None):
     """Get messages for experience tailoring."""
-    return [
-        {"role": "system", "content": TAILOR_EXPERIENCE_PROMPT.format(
-            job_description=job_description,
-            keywords_analysis=keywords_analysis
-        )}
-    ]
+    return _step_messages(
+        _with_keywords(_shared_messages(job_description, cv_context), keywords_analysis),
+        TAILOR_EXPERIENCE_PROMPT.format(**_use_cv(context_mode, cv_context))
+    )
 
-def get_tailor_name_desc_messages(job_description: str, keywords_analysis: str):
+def get_tailor_name_desc_messages(job_description: str, keywords_analysis: str,
+                                  cv_context: str = None, context_mode: str = None):
     """Get messages for name/description tailoring."""
+    return _step_messages(
+        _with_keywords(_shared_messages(job_description, cv_context), keywords_analysis),
+        TAILOR_NAME_DESC_PROMPT.format(**_use_cv(context_mode, cv_context))
+    )
+
+def get_condense_section_messages(section_title: str, section_text: str,
+                                  target_characters: int, keywords_analysis: str):
+    """Get messages for condensing one resume section to a character budget."""
     return [
-        {"role": "system", "content": TAILOR_NAME_DESC_PROMPT.format(
-            job_description=job_description,
+        {"role": "system", "content": CONDENSE_SECTION_PROMPT.format(
+            section_title=section_title,
+            section_text=section_text,
+            target_characters=target_characters,
+            current_characters=len(section_text),
             keywords_analysis=keywords_analysis
         )}
     ]
 
-def get_check_length_messages(tailored_summary: str, tailored_skills: str, 
-                              tailored_experience: str, tailored_name_desc: str):
-    """Get messages for resume length checking."""
-    return [
-        {"role": "system", "content": CHECK_RESUME_LENGTH_PROMPT.format(
-            tailored_summary=tailored_summary,
-            tailored_skills=tailored_skills,
-            tailored_experience=tailored_experience,
-            tailored_name_desc=tailored_name_desc
-        )}
-    ]
-
 def get_cover_letter_messages(job_description: str, company_name: str,
                               tailored_summary: str, tailored_skills: str,
-                              tailored_experience: str):
+                              tailored_experience: str, cv_context: str = None,
+                              guide_context: str = None, context_mode: str = None):
     """Get messages for cover letter generation."""
-    return [
-        {"role": "system", "content": GENERATE_COVER_LETTER_PROMPT.format(
-            job_description=job_description,
-            company_name=company_name,
-            tailored_summary=tailored_summary,
-            tailored_skills=tailored_skills,
-            tailored_experience=tailored_experience
-        )}
-    ]
-
-def get_interest_answer_messages(job_description: str, company_name: str):
+    context_mode = _infer_context_mode(context_mode, guide_context or cv_context)
+    shared = _shared_messages(job_description, cv_context)
+    if guide_context:
+        shared.append({"role": "system", "content": GUIDE_CONTEXT_PROMPT.format(
+            guide_context=guide_context
+        )})
+    return _step_messages(shared, GENERATE_COVER_LETTER_PROMPT.format(
+        company_name=company_name,
+        tailored_summary=tailored_summary,
+        tailored_skills=tailored_skills,
+        tailored_experience=tailored_experience,
+        **GUIDE_INSTRUCTIONS[context_mode]
+    ))
+
+def get_interest_answer_messages(job_description: str, company_name: str,
+                                 cv_context: str = None, context_mode: str = None):
     """Get messages for interest answer generation."""
-    return [
-        {"role": "system", "content": GENERATE_INTEREST_PROMPT.format(
-            job_description=job_description,
-            company_name=company_name
-        )}
-    ]
-
+    return _step_messages(
+        _shared_messages(job_description, cv_context),
+        GENERATE_INTEREST_PROMPT.format(company_name=company_name, **_use_cv(context_mode, cv_context))
+    )
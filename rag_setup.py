@@ -1,17 +1,47 @@
 from dotenv import load_dotenv
+import asyncio
+import hashlib
+import json
 import os
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_core.tools import tool
+import threading
+
+# Chroma, the PDF loader, the text splitter and the OpenAI client are imported
+# on first use, so importing this module (and main) stays fast
 
 load_dotenv()
 
-# Embedding Model
-embeddings = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-)
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Embedding model, vector store and retriever tools (lazy loaded)
+_embeddings = None
+_vectorstore = None
+_retriever_tools = None
+# Identifies the indexed chunks and embedding model; part of the retrieval cache keys
+_index_version = None
+_init_lock = threading.RLock()
+
+
+def get_embeddings():
+    """
+    Get the embedding model.
+    
+    Texts embedded before are served from the embedding cache (when
+    enabled); requests go through the shared rate limiter.
+    """
+    global _embeddings
+    with _init_lock:
+        if _embeddings is None:
+            from embedding_cache import CachedEmbeddings
+            from rate_limiter import RateLimitedOpenAIEmbeddings
+            _embeddings = CachedEmbeddings(RateLimitedOpenAIEmbeddings(model=EMBEDDING_MODEL))
+        return _embeddings
+
+
+def __getattr__(name: str):
+    # rag_setup.embeddings is still available, created on first access
+    if name == "embeddings":
+        return get_embeddings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Paths to PDFs
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -19,131 +49,427 @@ CV_PATH = os.path.join(BASE_DIR, "literature", "CV.pdf")
 COVER_LETTER_GUIDE_PATH = os.path.join(BASE_DIR, "literature", "How to write an excellent Cover Letter.pdf")
 PERSIST_DIRECTORY = os.path.join(BASE_DIR, "chroma_db")
 
-def initialize_rag_system():
-    """Initialize the RAG system with CV and Cover Letter guide."""
+# Chunking of the CV and guide pages
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+
+def chunk_pages(pages, source_type: str) -> list:
+    """
+    Split loaded PDF pages into chunks for the vector store.
     
-    print("Initializing RAG system...")
+    Args:
+        pages: Documents from PyPDFLoader
+        source_type: "cv" or "cover_letter_guide", stored in each chunk's metadata
+        
+    Returns:
+        List of chunk Documents
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
     
-    # Check if PDFs exist
-    if not os.path.exists(CV_PATH):
-        raise FileNotFoundError(f"CV not found: {CV_PATH}")
-    if not os.path.exists(COVER_LETTER_GUIDE_PATH):
-        raise FileNotFoundError(f"Cover Letter guide not found: {COVER_LETTER_GUIDE_PATH}")
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
+    )
+    chunks = text_splitter.split_documents(pages)
+    for chunk in chunks:
+        chunk.metadata["source_type"] = source_type
+    return chunks
+
+
+# Manifest of indexed sources and chunks, kept next to the Chroma files
+MANIFEST_FILE = "index_manifest.json"
+COLLECTION_NAME = "resume_assistant"
+
+
+def index_sources() -> list:
+    """(path, source_type) of every PDF in the vector store."""
+    return [(CV_PATH, "cv"), (COVER_LETTER_GUIDE_PATH, "cover_letter_guide")]
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(chunk) -> str:
+    """Content-hash ID of a chunk: identical text from the same source type gets the same ID."""
+    key = f"{chunk.metadata.get('source_type', '')}\0{chunk.page_content}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _embedding_model_id(embedding_model) -> str:
+    """Identify an embedding model; vectors from different models can't be mixed."""
+    from embedding_cache import CachedEmbeddings, model_key
+    
+    if isinstance(embedding_model, CachedEmbeddings):
+        embedding_model = embedding_model.embeddings
+    model, dimensions = model_key(embedding_model)
+    return f"{model}:{dimensions}" if dimensions else model
+
+
+def load_manifest(persist_directory: str = None) -> dict:
+    """Read the ingestion manifest ({} if the store has none yet)."""
+    path = os.path.join(persist_directory or PERSIST_DIRECTORY, MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(manifest: dict, persist_directory: str):
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def _load_chunks(path: str, source_type: str) -> dict:
+    """Load and chunk one PDF, keyed by chunk ID (repeated chunks are kept once)."""
+    from langchain_community.document_loaders import PyPDFLoader
     
-    # Load CV PDF
-    print("Loading CV...")
-    cv_loader = PyPDFLoader(CV_PATH)
-    cv_pages = cv_loader.load()
-    print(f"CV loaded: {len(cv_pages)} pages")
+    print(f"Loading {os.path.basename(path)}...")
+    chunks = {}
+    for chunk in chunk_pages(PyPDFLoader(path).load(), source_type):
+        chunks.setdefault(chunk_id(chunk), chunk)
+    return chunks
+
+
+def sync_vectorstore(vectorstore, sources: list = None, persist_directory: str = None) -> dict:
+    """
+    Bring the vector store in line with the source PDFs.
     
-    # Load Cover Letter Guide PDF
-    print("Loading Cover Letter Guide...")
-    guide_loader = PyPDFLoader(COVER_LETTER_GUIDE_PATH)
-    guide_pages = guide_loader.load()
-    print(f"Cover Letter Guide loaded: {len(guide_pages)} pages")
+    The manifest records each source file's SHA-256 and the IDs (content
+    hashes) of its chunks. Unchanged files are not even loaded; for changed
+    ones only chunks whose ID isn't in the store are embedded, and chunks no
+    source produces anymore are deleted. Changing the embedding model or the
+    chunking settings re-processes every file.
     
-    # Text splitting
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
-    )
+    Args:
+        vectorstore: The Chroma store
+        sources: (path, source_type) pairs (defaults to index_sources())
+        persist_directory: Where the manifest lives (defaults to PERSIST_DIRECTORY)
+        
+    Returns:
+        Dict with the number of chunks added, deleted and unchanged
+    """
+    persist_directory = persist_directory or PERSIST_DIRECTORY
+    manifest = load_manifest(persist_directory)
+    previous = manifest.get("sources", {})
+    model_id = _embedding_model_id(get_embeddings())
+    model_changed = bool(manifest) and manifest.get("embedding_model") != model_id
+    chunking = {"chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+    reuse = not model_changed and manifest.get("chunking") == chunking
     
-    cv_chunks = text_splitter.split_documents(cv_pages)
-    guide_chunks = text_splitter.split_documents(guide_pages)
+    sources = [(os.path.relpath(path, BASE_DIR), path, source_type)
+               for path, source_type in sources or index_sources()]
+    entries = {}
+    hashes = {}
+    loaded = {}
+    for key, path, source_type in sources:
+        if not os.path.exists(path):
+            if key not in previous or model_changed:
+                raise FileNotFoundError(f"{source_type} not found: {path}")
+            print(f"⚠ {path} is missing - keeping its indexed chunks")
+            entries[key] = previous[key]
+            continue
+        
+        hashes[key] = _file_sha256(path)
+        if reuse and key in previous and previous[key]["sha256"] == hashes[key]:
+            entries[key] = previous[key]
+        else:
+            loaded[key] = _load_chunks(path, source_type)
     
-    # Add metadata to distinguish between CV and guide
-    for chunk in cv_chunks:
-        chunk.metadata["source_type"] = "cv"
-    for chunk in guide_chunks:
-        chunk.metadata["source_type"] = "cover_letter_guide"
+    wanted = {id_ for entry in entries.values() for id_ in entry["chunks"]}
+    if manifest and not model_changed and not loaded:
+        # Nothing changed since the last sync
+        return {"added": 0, "deleted": 0, "unchanged": len(wanted)}
     
-    # Combine all chunks
-    all_chunks = cv_chunks + guide_chunks
+    existing = set() if model_changed else set(vectorstore.get(include=[])["ids"])
+    for key, path, source_type in sources:
+        # Unchanged files whose chunks are missing from the store are loaded too
+        if key in hashes and key not in loaded and not set(entries[key]["chunks"]) <= existing:
+            loaded[key] = _load_chunks(path, source_type)
     
-    # Create persist directory if it doesn't exist
-    if not os.path.exists(PERSIST_DIRECTORY):
-        os.makedirs(PERSIST_DIRECTORY)
+    chunks = {}
+    for key, path, source_type in sources:
+        if key in loaded:
+            chunks.update(loaded[key])
+            entries[key] = {"source_type": source_type, "sha256": hashes[key], "chunks": list(loaded[key])}
+    wanted = {id_ for entry in entries.values() for id_ in entry["chunks"]}
     
-    # Create or load ChromaDB vector store
-    print("Creating ChromaDB vector store...")
-    vectorstore = Chroma.from_documents(
-        documents=all_chunks,
-        embedding=embeddings,
-        persist_directory=PERSIST_DIRECTORY,
-        collection_name="resume_assistant"
-    )
-    print("ChromaDB vector store created successfully!")
+    if model_changed:
+        # The collection's vector dimension may differ too, so start over
+        stale = set(vectorstore.get(include=[])["ids"])
+        vectorstore.reset_collection()
+    else:
+        stale = existing - wanted
+        if stale:
+            vectorstore.delete(ids=list(stale))
+    new_ids = [id_ for id_ in chunks if id_ not in existing]
+    if new_ids:
+        vectorstore.add_documents([chunks[id_] for id_ in new_ids], ids=new_ids)
     
-    return vectorstore
+    _write_manifest({"embedding_model": model_id, "chunking": chunking, "sources": entries},
+                    persist_directory)
+    stats = {"added": len(new_ids), "deleted": len(stale), "unchanged": len(wanted) - len(new_ids)}
+    print(f"✓ Vector store updated: {stats['added']} chunks embedded, "
+          f"{stats['deleted']} removed, {stats['unchanged']} unchanged")
+    return stats
 
-def get_vectorstore():
-    """Get existing vectorstore or create new one."""
+
+def initialize_rag_system():
+    """Open the vector store for the CV and cover letter guide, syncing it with the PDFs."""
+    from langchain_chroma import Chroma
+    
     if os.path.exists(PERSIST_DIRECTORY) and os.listdir(PERSIST_DIRECTORY):
         print("Loading existing ChromaDB vector store...")
-        vectorstore = Chroma(
-            persist_directory=PERSIST_DIRECTORY,
-            embedding_function=embeddings,
-            collection_name="resume_assistant"
-        )
     else:
-        vectorstore = initialize_rag_system()
+        print("Initializing RAG system...")
+        os.makedirs(PERSIST_DIRECTORY, exist_ok=True)
     
+    vectorstore = Chroma(
+        persist_directory=PERSIST_DIRECTORY,
+        embedding_function=get_embeddings(),
+        collection_name=COLLECTION_NAME
+    )
+    sync_vectorstore(vectorstore)
+    
+    global _index_version
+    manifest = load_manifest()
+    chunk_ids = sorted(id_ for entry in manifest.get("sources", {}).values() for id_ in entry["chunks"])
+    _index_version = hashlib.sha256(
+        json.dumps([manifest.get("embedding_model"), chunk_ids]).encode("utf-8")
+    ).hexdigest()[:16]
     return vectorstore
 
+def use_embeddings(embedding_model, persist_directory: str = None):
+    """
+    Use another embedding model for the vector store and retrieval.
+    
+    Vectors from different models can't be mixed, so a separate
+    persist_directory should be given unless the store is rebuilt. Used by
+    the offline benchmarks.
+    
+    Args:
+        embedding_model: LangChain Embeddings
+        persist_directory: Chroma directory for this model's vector store
+    """
+    global _embeddings, PERSIST_DIRECTORY, _vectorstore, _retriever_tools
+    with _init_lock:
+        _embeddings = embedding_model
+        if persist_directory:
+            PERSIST_DIRECTORY = persist_directory
+        _vectorstore = None
+        _retriever_tools = None
+
+def get_vectorstore():
+    """Get the vectorstore, creating or updating it from the PDFs (once per process)."""
+    global _vectorstore
+    with _init_lock:
+        if _vectorstore is None:
+            _vectorstore = initialize_rag_system()
+        return _vectorstore
+
+def get_index_version() -> str:
+    """Version of the indexed chunks and embedding model (opens the vector store if needed)."""
+    get_vectorstore()
+    return _index_version
+
+# Search settings shared by the sync and async retriever tools
+CV_SEARCH_KWARGS = {"k": 5, "filter": {"source_type": "cv"}}
+GUIDE_SEARCH_KWARGS = {"k": 5, "filter": {"source_type": "cover_letter_guide"}}
+
+
+def _format_documents(docs, label: str, empty_message: str) -> str:
+    """Format retrieved documents as numbered sections for the LLM."""
+    if not docs:
+        return empty_message
+    
+    results = []
+    for i, doc in enumerate(docs):
+        results.append(f"{label} {i+1}:\n{doc.page_content}")
+    
+    return "\n\n".join(results)
+
+
 def get_retriever_tools():
+    """Get the retriever tools for CV and cover letter guide (created once)."""
+    global _retriever_tools
+    with _init_lock:
+        if _retriever_tools is None:
+            _retriever_tools = _create_retriever_tools()
+        return _retriever_tools
+
+
+def _create_retriever_tools():
     """Create retriever tools for CV and cover letter guide."""
+    from langchain_core.tools import StructuredTool
+    from retrieval_cache import tool_results
+    
     vectorstore = get_vectorstore()
     
-    # Create retrievers with filters
-    cv_retriever = vectorstore.as_retriever(
-        search_type="similarity",
-        search_kwargs={
-            "k": 5,
-            "filter": {"source_type": "cv"}
-        }
-    )
+    def search(tool: str, query: str, search_kwargs: dict, label: str, empty_message: str) -> str:
+        # Results are memoized per index version, tool and normalized query;
+        # the search itself embeds the query as written
+        def compute():
+            docs = vectorstore.similarity_search_by_vector(embed_query(query), **search_kwargs)
+            return _format_documents(docs, label, empty_message)
+        
+        return tool_results.get_or_compute((_index_version, tool, _normalized(query)), compute)
     
-    guide_retriever = vectorstore.as_retriever(
-        search_type="similarity",
-        search_kwargs={
-            "k": 5,
-            "filter": {"source_type": "cover_letter_guide"}
-        }
-    )
+    async def asearch(tool: str, query: str, search_kwargs: dict, label: str, empty_message: str) -> str:
+        # Embed over the network with the async client; the local Chroma
+        # lookup runs in the default executor.
+        async def compute():
+            embedding = await aembed_query(query)
+            docs = await vectorstore.asimilarity_search_by_vector(embedding, **search_kwargs)
+            return _format_documents(docs, label, empty_message)
+        
+        return await tool_results.aget_or_compute((_index_version, tool, _normalized(query)), compute)
     
-    @tool
     def retrieve_cv_content(query: str) -> str:
         """
         Retrieves relevant information from the user's CV/resume.
         Use this to understand the user's background, experience, skills, and qualifications.
         """
-        docs = cv_retriever.invoke(query)
-        
-        if not docs:
-            return "No relevant CV information found."
-        
-        results = []
-        for i, doc in enumerate(docs):
-            results.append(f"CV Section {i+1}:\n{doc.page_content}")
-        
-        return "\n\n".join(results)
+        return search("retrieve_cv_content", query, CV_SEARCH_KWARGS,
+                      "CV Section", "No relevant CV information found.")
+    
+    async def aretrieve_cv_content(query: str) -> str:
+        return await asearch("retrieve_cv_content", query, CV_SEARCH_KWARGS,
+                             "CV Section", "No relevant CV information found.")
     
-    @tool
     def retrieve_cover_letter_guide(query: str) -> str:
         """
         Retrieves guidance on writing excellent cover letters.
         Use this to understand best practices, structure, and tips for cover letter writing.
         """
-        docs = guide_retriever.invoke(query)
-        
-        if not docs:
-            return "No relevant cover letter guidance found."
-        
-        results = []
-        for i, doc in enumerate(docs):
-            results.append(f"Guide Section {i+1}:\n{doc.page_content}")
-        
-        return "\n\n".join(results)
+        return search("retrieve_cover_letter_guide", query, GUIDE_SEARCH_KWARGS,
+                      "Guide Section", "No relevant cover letter guidance found.")
+    
+    async def aretrieve_cover_letter_guide(query: str) -> str:
+        return await asearch("retrieve_cover_letter_guide", query, GUIDE_SEARCH_KWARGS,
+                             "Guide Section", "No relevant cover letter guidance found.")
+    
+    # Each tool has a sync and an async implementation so it works with
+    # both invoke() and ainvoke()
+    return [
+        StructuredTool.from_function(func=retrieve_cv_content, coroutine=aretrieve_cv_content),
+        StructuredTool.from_function(func=retrieve_cover_letter_guide, coroutine=aretrieve_cover_letter_guide),
+    ]
+
+
+def _normalized(query: str) -> str:
+    """Cache key of a query (the query itself is embedded unchanged)."""
+    from retrieval_cache import normalize_query
+    return normalize_query(query) or query
+
+
+def embed_query(query: str) -> list:
+    """
+    Embed a search query, through the process-wide LRU of query embeddings.
     
-    return [retrieve_cv_content, retrieve_cover_letter_guide]
+    The LRU is keyed by the normalized query, so "Skills" and "skills." share
+    one entry, but the text sent to the embedding model is the query as written.
+    """
+    from retrieval_cache import query_embeddings
+    
+    embeddings = get_embeddings()
+    return query_embeddings.get_or_compute(
+        (_embedding_model_id(embeddings), _normalized(query)), lambda: embeddings.embed_query(query))
+
+
+async def aembed_query(query: str) -> list:
+    """Async version of embed_query."""
+    from retrieval_cache import query_embeddings
+    
+    embeddings = get_embeddings()
+    return await query_embeddings.aget_or_compute(
+        (_embedding_model_id(embeddings), _normalized(query)), lambda: embeddings.aembed_query(query))
+
+
+def _cached_query_embeddings(queries: list) -> tuple:
+    """
+    Look up a batch of query embeddings in the LRU.
+    
+    Returns:
+        (model id, normalized key per query, cached vector per query or None,
+        dict of missing key -> first query with that key, to be embedded as written)
+    """
+    from retrieval_cache import query_embeddings
+    
+    model_id = _embedding_model_id(get_embeddings())
+    keys = [_normalized(query) for query in queries]
+    vectors = [query_embeddings.get((model_id, key)) for key in keys]
+    missing = {}
+    for query, key, vector in zip(queries, keys, vectors):
+        if vector is None:
+            missing.setdefault(key, query)
+    return model_id, keys, vectors, missing
+
 
+def _fill_query_embeddings(model_id: str, keys: list, vectors: list, missing: dict, embedded: list) -> list:
+    from retrieval_cache import query_embeddings
+    
+    new = dict(zip(missing, embedded))
+    for key, vector in new.items():
+        query_embeddings.put((model_id, key), vector)
+    return [vector if vector is not None else new[key] for key, vector in zip(keys, vectors)]
+
+
+def _dedupe_documents(doc_lists):
+    """Merge per-query results, keeping the first occurrence of each chunk."""
+    seen = set()
+    merged = []
+    for docs in doc_lists:
+        for doc in docs:
+            if doc.page_content not in seen:
+                seen.add(doc.page_content)
+                merged.append(doc)
+    return merged
+
+
+def retrieve_context(queries: list, search_kwargs: dict, label: str) -> str:
+    """
+    Run a batch of retrievals and merge the results into one context block.
+    
+    Queries whose embedding is in the process-wide LRU aren't embedded
+    again; the rest go out in a single embeddings request. The similarity
+    searches then run against the local Chroma store.
+    
+    Args:
+        queries: Search queries
+        search_kwargs: CV_SEARCH_KWARGS or GUIDE_SEARCH_KWARGS
+        label: Section label for the formatted output (e.g. "CV Section")
+        
+    Returns:
+        Deduplicated, formatted context
+    """
+    vectorstore = get_vectorstore()
+    model_id, keys, vectors, missing = _cached_query_embeddings(queries)
+    embedded = get_embeddings().embed_documents(list(missing.values())) if missing else []
+    query_embeddings = _fill_query_embeddings(model_id, keys, vectors, missing, embedded)
+    doc_lists = [
+        vectorstore.similarity_search_by_vector(embedding, **search_kwargs)
+        for embedding in query_embeddings
+    ]
+    return _format_documents(_dedupe_documents(doc_lists), label, "No relevant content found.")
+
+
+async def aretrieve_context(queries: list, search_kwargs: dict, label: str) -> str:
+    """Async version of retrieve_context."""
+    vectorstore = get_vectorstore()
+    model_id, keys, vectors, missing = _cached_query_embeddings(queries)
+    embedded = await get_embeddings().aembed_documents(list(missing.values())) if missing else []
+    query_embeddings = _fill_query_embeddings(model_id, keys, vectors, missing, embedded)
+    doc_lists = await asyncio.gather(*(
+        vectorstore.asimilarity_search_by_vector(embedding, **search_kwargs)
+        for embedding in query_embeddings
+    ))
+    return _format_documents(_dedupe_documents(doc_lists), label, "No relevant content found.")
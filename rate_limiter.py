@@ -0,0 +1,503 @@
+"""
+Process-wide rate limiting for OpenAI calls.
+
+Every model gets one limiter shared by all threads and event loops in the
+process, with two token buckets (requests per minute and tokens per minute)
+and an adaptive concurrency cap. Tokens are estimated before each call
+(characters / 4 plus the expected output) and corrected from the usage the
+API reports afterwards. When a 429 arrives the concurrency cap is halved and
+the model is paused for the Retry-After interval; every successful call
+raises the cap again by 1/cap (AIMD: additive increase, multiplicative
+decrease). Retries happen here, with the OpenAI clients' own retries turned
+off, so a burst of 429s does not turn into a retry storm.
+
+RateLimitedChatOpenAI and RateLimitedOpenAIEmbeddings are drop-in
+replacements for the langchain_openai classes that route every request
+through the limiter. Cache hits never reach the limiter because LangChain
+checks the LLM cache before calling _generate.
+"""
+from dotenv import load_dotenv
+import asyncio
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Optional
+import openai
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+load_dotenv()
+
+# (requests per minute, tokens per minute) by model; override with
+# OPENAI_RATE_LIMITS='{"gpt-5": {"rpm": 5000, "tpm": 2000000}}'
+MODEL_RATE_LIMITS = {
+    "gpt-5": (500, 500_000),
+    "gpt-4o-mini": (500, 200_000),
+    "text-embedding-3-small": (3000, 1_000_000),
+}
+DEFAULT_RATE_LIMITS = (500, 200_000)
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 6
+
+# Output tokens assumed for a chat call when max_tokens is not set
+DEFAULT_OUTPUT_TOKENS = 1000
+
+# Concurrency cap multiplier after a 429
+DECREASE_FACTOR = 0.5
+
+# Backoff after a failed attempt when the API sends no Retry-After header
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+# Longest single sleep while waiting, so freed concurrency slots are picked up quickly
+MAX_WAIT_SLICE_SECONDS = 0.25
+
+# Errors worth retrying; only RateLimitError reduces concurrency
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def estimate_message_tokens(messages: list, max_output_tokens: int = None, tools=None) -> int:
+    """
+    Estimate the tokens a chat call will count against the TPM quota.
+
+    Args:
+        messages: LangChain messages sent to the model
+        max_output_tokens: Expected output tokens (defaults to DEFAULT_OUTPUT_TOKENS)
+        tools: Tool schemas bound to the call, if any
+
+    Returns:
+        Estimated prompt plus output tokens
+    """
+    tokens = 0
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+        tokens += estimate_tokens(content) + 4
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            tokens += estimate_tokens(json.dumps(tool_call.get("args", {})))
+    if tools:
+        tokens += estimate_tokens(json.dumps(tools, default=str))
+    return tokens + (max_output_tokens or DEFAULT_OUTPUT_TOKENS)
+
+
+class TokenBucket:
+    """Bucket holding up to `per_minute` units, refilled continuously."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float = None) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill(time.monotonic() if now is None else now)
+        # A single call larger than the bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float):
+        """Take units that wait_time reported as available."""
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount: float):
+        """Charge (positive) or refund (negative) units after the fact."""
+        self.level = min(self.capacity, self.level - amount)
+
+
+class AdaptiveConcurrency:
+    """AIMD concurrency cap: +1/cap per success, halved on throttling."""
+
+    def __init__(self, initial: float, maximum: float, minimum: float = 1.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(min(max(initial, minimum), maximum))
+
+    @property
+    def allowed(self) -> int:
+        """Number of calls that may be in flight."""
+        return max(int(self.minimum), int(self.limit))
+
+    def on_success(self):
+        # Grows by about one slot per `limit` successful calls
+        self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def on_throttle(self):
+        self.limit = max(self.minimum, self.limit * DECREASE_FACTOR)
+
+
+class ModelRateLimiter:
+    """Request, token and concurrency limits for one model."""
+
+    def __init__(self, model: str, requests_per_minute: float, tokens_per_minute: float,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 initial_concurrency: int = DEFAULT_INITIAL_CONCURRENCY,
+                 max_retries: int = DEFAULT_MAX_RETRIES):
+        """
+        Args:
+            model: Model name (for stats and messages)
+            requests_per_minute: Request quota
+            tokens_per_minute: Token quota
+            max_concurrency: Upper bound of the adaptive concurrency cap
+            initial_concurrency: Starting concurrency cap
+            max_retries: Retries of a call after 429s and transient errors
+        """
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, max_concurrency)
+        self.max_retries = max_retries
+        self.in_flight = 0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "throttled": 0, "retries": 0, "errors": 0,
+                       "waited_seconds": 0.0, "estimated_tokens": 0, "actual_tokens": 0}
+
+    def _reserve(self, tokens: int, requests: int) -> float:
+        """Reserve capacity for a call; returns 0 on success or seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self.in_flight >= self.concurrency.allowed:
+                return MAX_WAIT_SLICE_SECONDS
+            wait = max(self.requests.wait_time(requests, now), self.tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            self.requests.consume(requests)
+            self.tokens.consume(tokens)
+            self.in_flight += 1
+            self._stats["calls"] += 1
+            self._stats["estimated_tokens"] += tokens
+            return 0.0
+
+    def acquire(self, tokens: int, requests: int = 1):
+        """Block until a call of `tokens` estimated tokens may start."""
+        start = time.monotonic()
+        while (wait := self._reserve(tokens, requests)) > 0:
+            time.sleep(min(wait, MAX_WAIT_SLICE_SECONDS))
+        self._record_wait(time.monotonic() - start)
+
+    async def aacquire(self, tokens: int, requests: int = 1):
+        """Async version of acquire."""
+        start = time.monotonic()
+        while (wait := self._reserve(tokens, requests)) > 0:
+            await asyncio.sleep(min(wait, MAX_WAIT_SLICE_SECONDS))
+        self._record_wait(time.monotonic() - start)
+
+    def _record_wait(self, seconds: float):
+        with self._lock:
+            self._stats["waited_seconds"] += seconds
+
+    def release(self, estimated_tokens: int, actual_tokens: int = None, outcome: str = "success",
+                retry_after: float = None):
+        """
+        Return a call's concurrency slot and feed its outcome back.
+
+        Args:
+            estimated_tokens: Tokens reserved by acquire
+            actual_tokens: Tokens reported by the API, if known
+            outcome: "success", "throttled" (429) or "error"
+            retry_after: Seconds the API asked us to wait (throttled calls)
+
+        A failed call without reported usage gets its estimated tokens back,
+        so repeated 429s don't drain the token bucket on top of the backoff.
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if actual_tokens is not None:
+                self.tokens.adjust(actual_tokens - estimated_tokens)
+                self._stats["actual_tokens"] += actual_tokens
+            elif outcome != "success":
+                self.tokens.adjust(-estimated_tokens)
+            if outcome == "success":
+                self.concurrency.on_success()
+            elif outcome == "throttled":
+                self.concurrency.on_throttle()
+                self._stats["throttled"] += 1
+                if retry_after:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            else:
+                self._stats["errors"] += 1
+
+    def _handle_failure(self, error: Exception, attempt: int, estimated_tokens: int) -> Optional[float]:
+        """Release a failed call; returns the delay before retrying, or None to give up."""
+        throttled = isinstance(error, openai.RateLimitError)
+        retry_after = _retry_after_seconds(error)
+        self.release(estimated_tokens, outcome="throttled" if throttled else "error",
+                     retry_after=retry_after)
+
+        # An exhausted quota will not recover by waiting
+        if getattr(error, "code", None) == "insufficient_quota" or attempt >= self.max_retries:
+            return None
+        with self._lock:
+            self._stats["retries"] += 1
+        if retry_after is not None:
+            return retry_after
+        backoff = min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt)
+        return backoff * random.uniform(0.5, 1.5)
+
+    def call(self, fn, estimated_tokens: int, requests: int = 1, count_tokens=None):
+        """
+        Run fn() under the limiter, retrying 429s and transient errors.
+
+        Args:
+            fn: Function making one API request
+            estimated_tokens: Estimated tokens of the request
+            requests: Number of API requests fn() makes
+            count_tokens: Optional function returning the actual tokens of fn's result
+
+        Returns:
+            fn's result
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(estimated_tokens, requests)
+            try:
+                result = fn()
+            except RETRYABLE_ERRORS as e:
+                delay = self._handle_failure(e, attempt, estimated_tokens)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self.release(estimated_tokens, outcome="error")
+                raise
+            self.release(estimated_tokens, count_tokens(result) if count_tokens else None)
+            return result
+
+    async def acall(self, fn, estimated_tokens: int, requests: int = 1, count_tokens=None):
+        """Async version of call; fn returns an awaitable."""
+        for attempt in range(self.max_retries + 1):
+            await self.aacquire(estimated_tokens, requests)
+            try:
+                result = await fn()
+            except RETRYABLE_ERRORS as e:
+                delay = self._handle_failure(e, attempt, estimated_tokens)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.release(estimated_tokens, outcome="error")
+                raise
+            self.release(estimated_tokens, count_tokens(result) if count_tokens else None)
+            return result
+
+    def stream(self, fn, estimated_tokens: int):
+        """
+        Yield the chunks of a streaming request made by fn() under the limiter.
+
+        Failures are only retried before the first chunk has been yielded.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(estimated_tokens)
+            actual_tokens = None
+            started = False
+            try:
+                for chunk in fn():
+                    started = True
+                    actual_tokens = _chunk_tokens(chunk) or actual_tokens
+                    yield chunk
+            except RETRYABLE_ERRORS as e:
+                if started:
+                    self.release(estimated_tokens, outcome="error")
+                    raise
+                delay = self._handle_failure(e, attempt, estimated_tokens)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self.release(estimated_tokens, outcome="error")
+                raise
+            self.release(estimated_tokens, actual_tokens)
+            return
+
+    async def astream(self, fn, estimated_tokens: int):
+        """Async version of stream; fn returns an async iterator."""
+        for attempt in range(self.max_retries + 1):
+            await self.aacquire(estimated_tokens)
+            actual_tokens = None
+            started = False
+            try:
+                async for chunk in fn():
+                    started = True
+                    actual_tokens = _chunk_tokens(chunk) or actual_tokens
+                    yield chunk
+            except RETRYABLE_ERRORS as e:
+                if started:
+                    self.release(estimated_tokens, outcome="error")
+                    raise
+                delay = self._handle_failure(e, attempt, estimated_tokens)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.release(estimated_tokens, outcome="error")
+                raise
+            self.release(estimated_tokens, actual_tokens)
+            return
+
+    def stats(self) -> dict:
+        """Counters and the current concurrency cap."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["concurrency_limit"] = round(self.concurrency.limit, 2)
+            stats["in_flight"] = self.in_flight
+        stats["waited_seconds"] = round(stats["waited_seconds"], 2)
+        return stats
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Retry-After header of an API error, in seconds, if present."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is not None:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return None
+
+
+def _chunk_tokens(chunk) -> Optional[int]:
+    """Total tokens reported on a streamed chunk (usually only the last one)."""
+    usage = getattr(getattr(chunk, "message", None), "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+
+def _result_tokens(result) -> Optional[int]:
+    """Total tokens reported for a ChatResult."""
+    totals = [generation.message.usage_metadata.get("total_tokens", 0)
+              for generation in result.generations
+              if getattr(generation.message, "usage_metadata", None)]
+    return sum(totals) if totals else None
+
+
+# One limiter per model, shared by the whole process
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def _configured_limits(model: str) -> tuple:
+    """(rpm, tpm) for a model from OPENAI_RATE_LIMITS, OPENAI_RPM/TPM_LIMIT or the defaults."""
+    rpm, tpm = MODEL_RATE_LIMITS.get(model, DEFAULT_RATE_LIMITS)
+    rpm = float(os.getenv("OPENAI_RPM_LIMIT", rpm))
+    tpm = float(os.getenv("OPENAI_TPM_LIMIT", tpm))
+    overrides = json.loads(os.getenv("OPENAI_RATE_LIMITS", "{}")).get(model, {})
+    return float(overrides.get("rpm", rpm)), float(overrides.get("tpm", tpm))
+
+
+def get_rate_limiter(model: str) -> ModelRateLimiter:
+    """Get (or create) the process-wide limiter for a model."""
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(model)
+        if limiter is None:
+            rpm, tpm = _configured_limits(model)
+            max_concurrency = int(os.getenv("OPENAI_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+            limiter = ModelRateLimiter(
+                model, rpm, tpm,
+                max_concurrency=max_concurrency,
+                initial_concurrency=min(max_concurrency, DEFAULT_INITIAL_CONCURRENCY)
+            )
+            _rate_limiters[model] = limiter
+        return limiter
+
+
+def rate_limiter_stats() -> dict:
+    """Stats of every limiter created in this process, by model."""
+    with _rate_limiters_lock:
+        limiters = dict(_rate_limiters)
+    return {model: limiter.stats() for model, limiter in limiters.items()}
+
+
+class RateLimitedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI whose API requests go through the shared rate limiter."""
+
+    # Retries are handled by the limiter so that 429s feed back into it
+    max_retries: Optional[int] = 0
+
+    def _estimate(self, messages, kwargs) -> int:
+        return estimate_message_tokens(messages, self.max_tokens, kwargs.get("tools"))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return get_rate_limiter(self.model_name).call(
+            lambda: super(RateLimitedChatOpenAI, self)._generate(
+                messages, stop=stop, run_manager=run_manager, **kwargs),
+            self._estimate(messages, kwargs),
+            count_tokens=_result_tokens
+        )
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return await get_rate_limiter(self.model_name).acall(
+            lambda: super(RateLimitedChatOpenAI, self)._agenerate(
+                messages, stop=stop, run_manager=run_manager, **kwargs),
+            self._estimate(messages, kwargs),
+            count_tokens=_result_tokens
+        )
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        yield from get_rate_limiter(self.model_name).stream(
+            lambda: super(RateLimitedChatOpenAI, self)._stream(
+                messages, stop=stop, run_manager=run_manager, **kwargs),
+            self._estimate(messages, kwargs)
+        )
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        async for chunk in get_rate_limiter(self.model_name).astream(
+            lambda: super(RateLimitedChatOpenAI, self)._astream(
+                messages, stop=stop, run_manager=run_manager, **kwargs),
+            self._estimate(messages, kwargs)
+        ):
+            yield chunk
+
+
+class RateLimitedOpenAIEmbeddings(OpenAIEmbeddings):
+    """OpenAIEmbeddings whose API requests go through the shared rate limiter."""
+
+    max_retries: int = 0
+
+    def _estimate(self, texts) -> tuple:
+        """(estimated tokens, number of API requests) for embedding texts."""
+        tokens = sum(estimate_tokens(text) for text in texts)
+        requests = max(1, math.ceil(len(texts) / (self.chunk_size or len(texts) or 1)))
+        return tokens, requests
+
+    def embed_documents(self, texts, chunk_size=None, **kwargs):
+        tokens, requests = self._estimate(texts)
+        return get_rate_limiter(self.model).call(
+            lambda: super(RateLimitedOpenAIEmbeddings, self).embed_documents(
+                texts, chunk_size=chunk_size, **kwargs),
+            tokens, requests
+        )
+
+    async def aembed_documents(self, texts, chunk_size=None, **kwargs):
+        tokens, requests = self._estimate(texts)
+        return await get_rate_limiter(self.model).acall(
+            lambda: super(RateLimitedOpenAIEmbeddings, self).aembed_documents(
+                texts, chunk_size=chunk_size, **kwargs),
+            tokens, requests
+        )
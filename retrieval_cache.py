@@ -0,0 +1,140 @@
+"""
+In-process caches for the retriever tools.
+
+Within a run, retrieve_cv_content is called by up to six nodes with nearly
+the same queries ("professional summary", "skills", "experience"), and a
+long-lived process (batch, server, queue worker) sees the same queries run
+after run. Two LRU caches shared by all runs in the process avoid repeating
+that work:
+
+  - query embeddings, keyed by embedding model and normalized query, save
+    the embedding round-trip;
+  - formatted tool results, keyed by vector store index version, tool and
+    normalized query, also skip the Chroma search.
+
+The index version changes whenever the vector store is re-synced, so
+results from an older index are never served.
+"""
+from dotenv import load_dotenv
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+
+load_dotenv()
+
+DEFAULT_MAX_QUERY_EMBEDDINGS = 1024
+DEFAULT_MAX_RESULTS = 512
+
+_TRAILING_PUNCTUATION = ".,;:!?"
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase a query and collapse whitespace and trailing punctuation."""
+    return " ".join(query.lower().split()).strip(_TRAILING_PUNCTUATION).strip()
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with hit and miss counters."""
+
+    def __init__(self, max_entries: int):
+        """
+        Args:
+            max_entries: Least recently used entries are evicted beyond this size
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Lookups being computed by a coroutine, by (event loop, key)
+        self._pending = {}
+
+    def get(self, key):
+        """Cached value, or None (counted as a miss)."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Cached value, or compute() stored under the key."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    async def aget_or_compute(self, key, compute):
+        """
+        Async version of get_or_compute.
+
+        Concurrent lookups of the same key on one event loop (e.g. parallel
+        graph nodes asking the same question) share a single computation.
+        """
+        pending_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            pending = self._pending.get(pending_key)
+        if pending is not None:
+            with self._lock:
+                self.hits += 1
+            return await asyncio.shield(pending)
+
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        task = asyncio.ensure_future(compute())
+        with self._lock:
+            self._pending[pending_key] = task
+        try:
+            value = await asyncio.shield(task)
+        finally:
+            with self._lock:
+                self._pending.pop(pending_key, None)
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+# Shared by every run in the process
+query_embeddings = LRUCache(int(os.getenv("RETRIEVAL_QUERY_CACHE_SIZE", DEFAULT_MAX_QUERY_EMBEDDINGS)))
+tool_results = LRUCache(int(os.getenv("RETRIEVAL_RESULT_CACHE_SIZE", DEFAULT_MAX_RESULTS)))
+
+
+def retrieval_cache_stats() -> dict:
+    """Hit-rate statistics of the query embedding and tool result caches."""
+    return {"query_embeddings": query_embeddings.stats(), "tool_results": tool_results.stats()}
+
+
+def clear_retrieval_cache():
+    """Empty both caches and reset their counters."""
+    query_embeddings.clear()
+    tool_results.clear()
@@ -0,0 +1,279 @@
+"""
+Semantic cache of past runs, keyed by job description embeddings.
+
+The same role is often posted on several job boards or reposted with small
+edits. Each completed run stores its outputs together with an embedding of the
+job description; when a new job description is close enough to a stored one,
+the graph nodes reuse the stored outputs instead of calling the LLM.
+
+Outputs also depend on the indexed CV and guide, the prompt templates, the
+model-routing profile and the run's context mode, so each run is stored with
+their versions and only runs produced under the current versions are matched.
+"""
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+from settings import DEFAULT_CONTEXT_MODE
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, ".cache", "semantic_cache.sqlite")
+
+# Cosine similarity above which a past run counts as the same posting
+DEFAULT_SIMILARITY_THRESHOLD = 0.97
+
+# Job descriptions are truncated before embedding to stay within the model's input limit
+MAX_EMBEDDED_CHARACTERS = 20000
+
+# Outputs that only depend on the job description and the CV
+REUSABLE_KEYS = [
+    "keywords_analysis",
+    "tailored_summary",
+    "tailored_skills",
+    "tailored_experience",
+    "tailored_name_desc",
+    "length_check_result",
+]
+
+# Outputs that also mention the company, only reused when it matches
+COMPANY_SPECIFIC_KEYS = [
+    "cover_letter",
+    "interest_answer",
+]
+
+# What a run's outputs depend on besides the job description
+VERSION_KEYS = ["index_version", "prompt_version", "model_profile", "context_mode"]
+
+
+def current_versions(context_mode: str = None) -> dict:
+    """
+    Versions of the inputs that outputs depend on besides the job description.
+    
+    Args:
+        context_mode: The run's context mode (defaults to DEFAULT_CONTEXT_MODE)
+    
+    Returns:
+        Dict with the vector store index version (indexed CV and guide chunks
+        and embedding model), a hash of the prompt templates, the active
+        model-routing profile and the context mode
+    """
+    from model_routing import get_model_profile
+    from prompts import prompt_version
+    from rag_setup import get_index_version
+    return {
+        "index_version": get_index_version(),
+        "prompt_version": prompt_version(),
+        "model_profile": get_model_profile(),
+        "context_mode": context_mode or DEFAULT_CONTEXT_MODE,
+    }
+
+
+class SemanticRunCache:
+    """SQLite store of past run outputs with an in-memory embedding index."""
+
+    def __init__(self, embeddings=None, path: str = DEFAULT_CACHE_PATH,
+                 threshold: float = DEFAULT_SIMILARITY_THRESHOLD, versions=None):
+        """
+        Args:
+            embeddings: LangChain Embeddings used for job descriptions
+                (defaults to the OpenAIEmbeddings model in rag_setup)
+            path: SQLite database file
+            threshold: Minimum cosine similarity for reuse
+            versions: Callable taking a context mode and returning the
+                current versions by VERSION_KEYS (defaults to current_versions)
+        """
+        self._embeddings = embeddings
+        self.path = path
+        self.threshold = threshold
+        self._versions = versions or current_versions
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                job_description_hash TEXT NOT NULL,
+                company_name TEXT,
+                embedding BLOB NOT NULL,
+                outputs TEXT NOT NULL
+            )"""
+        )
+        # Caches created before runs were versioned: their rows never match
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        for key in VERSION_KEYS:
+            if key not in columns:
+                self._conn.execute(f"ALTER TABLE runs ADD COLUMN {key} TEXT")
+        self._conn.commit()
+
+        # Ids and normalized embeddings of the stored runs, by versions, loaded on first search
+        self._indexes = {}
+
+    @property
+    def embeddings(self):
+        """Embedding model (rag_setup's, resolved on first use, unless one was given)."""
+        if self._embeddings is None:
+            from rag_setup import get_embeddings
+            self._embeddings = get_embeddings()
+        return self._embeddings
+
+    @staticmethod
+    def _text_for_embedding(job_description: str) -> str:
+        return job_description[:MAX_EMBEDDED_CHARACTERS]
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _load_index(self, versions: tuple) -> tuple:
+        """Load the embeddings of the runs stored under these versions (lock held)."""
+        if versions not in self._indexes:
+            rows = self._conn.execute(
+                "SELECT id, embedding FROM runs WHERE "
+                + " AND ".join(f"{key} = ?" for key in VERSION_KEYS) + " ORDER BY id",
+                versions
+            ).fetchall()
+            ids = [row[0] for row in rows]
+            matrix = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) if rows else None
+            self._indexes[versions] = (ids, matrix)
+        return self._indexes[versions]
+
+    def _current_versions(self, context_mode: str = None) -> tuple:
+        versions = self._versions(context_mode)
+        return tuple(versions[key] for key in VERSION_KEYS)
+
+    def embed(self, job_description: str) -> np.ndarray:
+        """Embed a job description."""
+        return self._normalize(self.embeddings.embed_query(self._text_for_embedding(job_description)))
+
+    async def aembed(self, job_description: str) -> np.ndarray:
+        """Async version of embed."""
+        vector = await self.embeddings.aembed_query(self._text_for_embedding(job_description))
+        return self._normalize(vector)
+
+    def search(self, embedding: np.ndarray, context_mode: str = None):
+        """
+        Find the most similar run stored under the current versions.
+
+        Args:
+            embedding: Normalized job description embedding
+            context_mode: The run's context mode (defaults to DEFAULT_CONTEXT_MODE)
+
+        Returns:
+            Tuple of (stored run dict or None, similarity)
+        """
+        versions = self._current_versions(context_mode)
+        with self._lock:
+            ids, matrix = self._load_index(versions)
+            if matrix is None or matrix.shape[1] != embedding.shape[0]:
+                return None, 0.0
+
+            similarities = matrix @ embedding
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                return None, similarity
+
+            company_name, outputs = self._conn.execute(
+                "SELECT company_name, outputs FROM runs WHERE id = ?", (ids[best],)
+            ).fetchone()
+
+        return {"company_name": company_name, "outputs": json.loads(outputs)}, similarity
+
+    def store(self, job_description: str, company_name: str, outputs: dict,
+              embedding=None, context_mode: str = None):
+        """
+        Store a completed run's outputs under the current versions.
+
+        Args:
+            job_description: The job description text
+            company_name: Company the outputs were written for
+            outputs: Output values by state key
+            embedding: Embedding from the lookup, if already computed
+            context_mode: The run's context mode (defaults to DEFAULT_CONTEXT_MODE)
+        """
+        embedding = self.embed(job_description) if embedding is None else self._normalize(embedding)
+        versions = self._current_versions(context_mode)
+        stored_outputs = {key: outputs.get(key)
+                          for key in REUSABLE_KEYS + COMPANY_SPECIFIC_KEYS
+                          if outputs.get(key)}
+        job_description_hash = hashlib.sha256(job_description.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (created_at, job_description_hash, company_name, embedding, outputs, "
+                + ", ".join(VERSION_KEYS) + ") VALUES (?, ?, ?, ?, ?"
+                + ", ?" * len(VERSION_KEYS) + ")",
+                (time.time(), job_description_hash, company_name,
+                 embedding.astype(np.float32).tobytes(), json.dumps(stored_outputs), *versions)
+            )
+            self._conn.commit()
+            self._indexes.clear()  # Reload on the next search
+
+
+def reusable_outputs(match: dict, company_name: str) -> dict:
+    """
+    Select the outputs of a matched run that can be reused for this run.
+
+    Company-specific outputs (cover letter, interest answer) are only reused
+    when the matched run was for the same company.
+    """
+    outputs = match["outputs"]
+    keys = list(REUSABLE_KEYS)
+    if (company_name or "").strip().lower() == (match.get("company_name") or "").strip().lower():
+        keys += COMPANY_SPECIFIC_KEYS
+    return {key: outputs[key] for key in keys if outputs.get(key)}
+
+
+# Cache used by the graph (None when disabled)
+_semantic_cache = None
+
+
+def enable_semantic_cache(embeddings=None, path: str = None,
+                          threshold: float = None) -> SemanticRunCache:
+    """
+    Enable reuse of outputs from similar past job descriptions.
+
+    Unset arguments fall back to SEMANTIC_CACHE_PATH and
+    SEMANTIC_CACHE_THRESHOLD, then to the module defaults.
+    """
+    global _semantic_cache
+    _semantic_cache = SemanticRunCache(
+        embeddings=embeddings,
+        path=path or os.getenv("SEMANTIC_CACHE_PATH", DEFAULT_CACHE_PATH),
+        threshold=threshold if threshold is not None
+        else float(os.getenv("SEMANTIC_CACHE_THRESHOLD", DEFAULT_SIMILARITY_THRESHOLD))
+    )
+    return _semantic_cache
+
+
+def disable_semantic_cache():
+    """Stop reusing outputs from similar job descriptions in this process."""
+    global _semantic_cache
+    _semantic_cache = None
+
+
+def configure_semantic_cache_from_env():
+    """Enable the cache unless SEMANTIC_CACHE_ENABLED is set to a false value."""
+    if os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        disable_semantic_cache()
+        return None
+    return enable_semantic_cache()
+
+
+def get_semantic_cache():
+    """Get the enabled cache, or None if semantic caching is disabled."""
+    return _semantic_cache
@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+HTTP service mode: one warm agent process shared by several clients.
+
+The graph, vector store, retriever tools and LLM clients are created once at
+startup and reused by every job. Submitted jobs go into a bounded queue and
+are run by a pool of workers on a single event loop (as batch.py runs them),
+so the process-wide rate limiter and connection pools are shared.
+
+Endpoints (JSON unless noted):
+    POST /jobs                          Submit {"job_description": ...} or {"url": ...}
+                                        (optional "company_name", "context_mode",
+                                        "allow_duplicates"); 202 with the job, 503
+                                        when the queue is full
+    GET  /jobs                          All jobs, newest first
+    GET  /jobs/<id>                     Status of one job (the last --max-finished-jobs
+                                        finished jobs are kept)
+    GET  /jobs/<id>/result              Outputs of a finished job (409 until then)
+    GET  /jobs/<id>/artifacts/<name>    Download a saved file (text or PDF)
+    GET  /healthz                       Queue depth and worker count
+    GET  /metrics                       Prometheus text: agent telemetry of
+                                        finished jobs plus queue gauges
+
+Usage:
+    python server.py --port 8000 --workers 4 --queue-size 32
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from settings import CONTEXT_MODES, DEFAULT_CONTEXT_MODE, DEFAULT_OUTPUT_DIR
+from model_routing import get_model_profile, get_model_profiles, set_model_profile
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 32
+# Finished jobs kept for GET /jobs/<id>; older ones are forgotten (their files stay on disk)
+DEFAULT_MAX_FINISHED_JOBS = 1000
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+def warm_up():
+    """Configure the caches and create the compiled graph, vector store, retriever tools and LLM clients."""
+    from main import configure_caches, get_resume_agent
+    from model_routing import ROUTED_NODES, get_llm
+    from rag_setup import get_retriever_tools, get_vectorstore
+
+    configure_caches()
+    get_resume_agent()
+    get_vectorstore()
+    get_retriever_tools()
+    for node in ROUTED_NODES:
+        get_llm(node)
+
+
+class JobServer:
+    """Bounded job queue and worker pool running the agent on one event loop."""
+
+    def __init__(self, output_dir: str, workers: int = DEFAULT_WORKERS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, context_mode: str = DEFAULT_CONTEXT_MODE,
+                 max_finished_jobs: int = DEFAULT_MAX_FINISHED_JOBS, progress=print):
+        """
+        Args:
+            output_dir: Directory for per-job outputs (one subdirectory per job)
+            workers: Maximum number of jobs running at once
+            queue_size: Maximum number of jobs waiting to run
+            context_mode: Default context mode for jobs that don't set one
+            max_finished_jobs: Finished jobs kept in memory; the oldest are evicted
+            progress: Function called with one line per started/finished job
+        """
+        self.output_dir = output_dir
+        self.workers = workers
+        self.queue_size = queue_size
+        self.context_mode = context_mode
+        self.max_finished_jobs = max_finished_jobs
+        self.progress = progress
+        self.jobs = {}
+        self._finished = deque()  # Ids of finished jobs still in self.jobs, oldest first
+        # Telemetry of every finished job summed into one report, so /metrics
+        # counters keep growing after the jobs themselves are evicted
+        self._reported = None
+        self._lock = threading.Lock()
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._workers = []
+        self._ready = threading.Event()
+
+    def start(self):
+        """Start the worker event loop in a background thread."""
+        self._thread = threading.Thread(target=self._run_loop, name="job-workers", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self):
+        """Stop the workers; running jobs are cancelled."""
+        if self._loop is not None and self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=10)
+            self._thread.join(timeout=10)
+
+    async def _shutdown(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._loop.call_soon(self._loop.stop)
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [self._loop.create_task(self._worker(), name=f"job-worker-{i}")
+                         for i in range(self.workers)]
+        self._loop.call_soon(self._ready.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _worker(self):
+        from batch import run_job
+        from telemetry import aggregate_reports
+
+        while True:
+            job_id = await self._queue.get()
+            try:
+                with self._lock:
+                    job = self.jobs[job_id]
+                    job.update(status="running", started_at=datetime.now().isoformat())
+                self.progress(f"▶ {job_id} started")
+
+                start = time.perf_counter()
+                try:
+                    result = await run_job(job["request"], os.path.join(self.output_dir, job_id),
+                                           job["context_mode"], job["allow_duplicates"])
+                except Exception as e:
+                    # run_job reports agent failures itself; this covers writing its report
+                    result = {"status": "failed", "error": f"{type(e).__name__}: {e}",
+                              "seconds": round(time.perf_counter() - start, 2)}
+                report = result.pop("telemetry", None)
+
+                with self._lock:
+                    if report is not None:
+                        self._reported = aggregate_reports(
+                            [self._reported, report] if self._reported else [report]
+                        )
+                    job.update(
+                        status="failed" if result["status"] == "failed" else "done",
+                        duplicate_of=result.get("duplicate_of"),
+                        finished_at=datetime.now().isoformat(),
+                        seconds=result["seconds"],
+                        company_name=result.get("company_name"),
+                        output_files=result.get("output_files"),
+                        error=result.get("error"),
+                        usage=report["totals"] if report else None
+                    )
+                    self._finished.append(job_id)
+                    while len(self._finished) > self.max_finished_jobs:
+                        del self.jobs[self._finished.popleft()]
+                mark = "✓" if job["status"] == "done" else "✗"
+                self.progress(f"{mark} {job_id} {job['status']} ({result['seconds']:.1f}s)")
+            finally:
+                self._queue.task_done()
+
+    def submit(self, request: dict) -> dict:
+        """
+        Queue a job.
+
+        Args:
+            request: Dict with job_description or url, and optionally
+                company_name, context_mode and allow_duplicates (run a
+                near-duplicate of a processed posting instead of returning
+                the original's outputs)
+
+        Returns:
+            Public view of the queued job
+
+        Raises:
+            ValueError: If the request is invalid
+            QueueFullError: If queue_size jobs are already waiting
+        """
+        job_description = (request.get("job_description") or "").strip()
+        url = (request.get("url") or "").strip()
+        if not (job_description or url):
+            raise ValueError("Provide a job_description or a url")
+        if url and not url.startswith("http"):
+            raise ValueError("url should start with http:// or https://")
+        context_mode = request.get("context_mode") or self.context_mode
+        if context_mode not in CONTEXT_MODES:
+            raise ValueError(f"Unknown context_mode: {context_mode} (expected one of {CONTEXT_MODES})")
+
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "submitted_at": datetime.now().isoformat(),
+            "context_mode": context_mode,
+            "allow_duplicates": bool(request.get("allow_duplicates")),
+            "request": {
+                "id": job_id,
+                "job_description": job_description or None,
+                "url": url or None,
+                "company_name": request.get("company_name") or None
+            }
+        }
+        with self._lock:
+            self.jobs[job_id] = job
+        try:
+            asyncio.run_coroutine_threadsafe(self._enqueue(job_id), self._loop).result()
+        except asyncio.QueueFull:
+            with self._lock:
+                del self.jobs[job_id]
+            raise QueueFullError(f"Queue is full ({self.queue_size} jobs waiting)")
+        return self.describe(job_id)
+
+    async def _enqueue(self, job_id: str):
+        self._queue.put_nowait(job_id)
+
+    def describe(self, job_id: str) -> dict:
+        """Public view of a job (None if unknown)."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            view = {key: value for key, value in job.items() if key not in ("request", "output_files")}
+            view["url"] = job["request"]["url"]
+            if job.get("output_files"):
+                view["artifacts"] = self.artifacts(job_id)
+            return view
+
+    def list_jobs(self) -> list:
+        """Public view of every job, newest first."""
+        with self._lock:
+            job_ids = list(self.jobs)
+        return [self.describe(job_id) for job_id in reversed(job_ids)]
+
+    def artifacts(self, job_id: str) -> list:
+        """File names of a finished job's saved outputs."""
+        files = self.jobs[job_id].get("output_files") or {}
+        return [os.path.basename(files[key]) for key in ("text_file", "pdf_file") if files.get(key)]
+
+    def artifact_path(self, job_id: str, name: str) -> str:
+        """Path of a saved output by file name (None unless it belongs to the job)."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            files = (job or {}).get("output_files") or {}
+            for key in ("text_file", "pdf_file"):
+                path = files.get(key)
+                if path and os.path.basename(path) == name:
+                    return path
+        return None
+
+    def result(self, job_id: str) -> dict:
+        """Status plus the tailored text of a finished job (without text if it has none)."""
+        view = self.describe(job_id)
+        if view is None or view["status"] != "done":
+            return view
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                # Evicted since it was described
+                return None
+            text_file = (job.get("output_files") or {}).get("text_file")
+        if text_file is None or not os.path.exists(text_file):
+            # No saved text, e.g. the duplicated original's files were removed
+            return view
+        with open(text_file, encoding="utf-8") as f:
+            view["text"] = f.read()
+        return view
+
+    def stats(self) -> dict:
+        """Job counts by status, queue depth and capacity, and retrieval cache hit rates."""
+        from retrieval_cache import retrieval_cache_stats
+
+        with self._lock:
+            counts = {status: 0 for status in JOB_STATUSES}
+            for job in self.jobs.values():
+                counts[job["status"]] += 1
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queued": counts["queued"],
+            "running": counts["running"],
+            "jobs": counts,
+            "retrieval_cache": retrieval_cache_stats()
+        }
+
+    def metrics(self) -> str:
+        """Prometheus text for finished jobs plus queue gauges."""
+        from telemetry import METRIC_PREFIX, prometheus_text
+
+        with self._lock:
+            reports = [self._reported] if self._reported else []
+        stats = self.stats()
+        lines = [
+            f"# HELP {METRIC_PREFIX}_server_jobs Jobs known to the server by status.",
+            f"# TYPE {METRIC_PREFIX}_server_jobs gauge",
+        ]
+        lines += [f'{METRIC_PREFIX}_server_jobs{{status="{status}"}} {count}'
+                  for status, count in stats["jobs"].items()]
+        lines += [
+            f"# HELP {METRIC_PREFIX}_server_workers Worker pool size.",
+            f"# TYPE {METRIC_PREFIX}_server_workers gauge",
+            f"{METRIC_PREFIX}_server_workers {stats['workers']}",
+            f"# HELP {METRIC_PREFIX}_server_queue_capacity Maximum number of waiting jobs.",
+            f"# TYPE {METRIC_PREFIX}_server_queue_capacity gauge",
+            f"{METRIC_PREFIX}_server_queue_capacity {stats['queue_size']}",
+        ]
+        for kind in ("hits", "misses"):
+            lines += [
+                f"# HELP {METRIC_PREFIX}_retrieval_cache_{kind}_total Retrieval cache {kind} in this process.",
+                f"# TYPE {METRIC_PREFIX}_retrieval_cache_{kind}_total counter",
+            ]
+            lines += [f'{METRIC_PREFIX}_retrieval_cache_{kind}_total{{cache="{cache}"}} {cache_stats[kind]}'
+                      for cache, cache_stats in stats["retrieval_cache"].items()]
+        return prometheus_text(reports) + "\n".join(lines) + "\n"
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """Routes HTTP requests to the server's JobServer."""
+
+    server_version = "ResumeAgent/1.0"
+
+    @property
+    def jobs(self) -> JobServer:
+        return self.server.job_server
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload, headers: dict = None):
+        self._send(status, json.dumps(payload, indent=2).encode("utf-8"), "application/json", headers)
+
+    def _send_error(self, status: int, message: str, headers: dict = None):
+        self._send_json(status, {"error": message}, headers)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path: {self.path}")
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            job = self.jobs.submit(request)
+        except (ValueError, json.JSONDecodeError) as e:
+            return self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+        except QueueFullError as e:
+            return self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, str(e), {"Retry-After": "30"})
+
+        self._send_json(HTTPStatus.ACCEPTED, job, {"Location": f"/jobs/{job['id']}"})
+
+    def do_GET(self):
+        parts = [unquote(part) for part in self.path.split("?")[0].strip("/").split("/")]
+
+        if parts == ["healthz"]:
+            return self._send_json(HTTPStatus.OK, {"status": "ok", **self.jobs.stats()})
+        if parts == ["metrics"]:
+            return self._send(HTTPStatus.OK, self.jobs.metrics().encode("utf-8"),
+                              "text/plain; version=0.0.4; charset=utf-8")
+        if parts == ["jobs"]:
+            return self._send_json(HTTPStatus.OK, {"jobs": self.jobs.list_jobs()})
+        if len(parts) < 2 or parts[0] != "jobs":
+            return self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path: {self.path}")
+
+        job_id = parts[1]
+        job = self.jobs.describe(job_id)
+        if job is None:
+            return self._send_error(HTTPStatus.NOT_FOUND, f"Unknown job: {job_id}")
+
+        if len(parts) == 2:
+            return self._send_json(HTTPStatus.OK, job)
+        if parts[2:] == ["result"]:
+            if job["status"] in ("queued", "running"):
+                return self._send_error(HTTPStatus.CONFLICT, f"Job {job_id} is {job['status']}")
+            return self._send_json(HTTPStatus.OK, self.jobs.result(job_id))
+        if len(parts) == 4 and parts[2] == "artifacts":
+            path = self.jobs.artifact_path(job_id, parts[3])
+            if path is None or not os.path.exists(path):
+                return self._send_error(HTTPStatus.NOT_FOUND, f"Unknown artifact: {parts[3]}")
+            content_type = "application/pdf" if path.endswith(".pdf") else "text/plain; charset=utf-8"
+            with open(path, "rb") as f:
+                body = f.read()
+            return self._send(HTTPStatus.OK, body, content_type, {
+                "Content-Disposition": f'attachment; filename="{os.path.basename(path)}"'
+            })
+        return self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path: {self.path}")
+
+    def log_message(self, format, *args):
+        # Request log goes to stderr, like the default, but without reverse DNS
+        sys.stderr.write(f"{self.address_string()} - {format % args}\n")
+
+
+def create_server(job_server: JobServer, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """
+    Create the HTTP server for a started JobServer.
+
+    Args:
+        job_server: JobServer to route requests to
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+
+    Returns:
+        ThreadingHTTPServer; call serve_forever() to handle requests
+    """
+    httpd = ThreadingHTTPServer((host, port), JobRequestHandler)
+    httpd.daemon_threads = True
+    httpd.job_server = job_server
+    return httpd
+
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(
+        description="Serve the tailoring agent over HTTP with a warm process and a job queue."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to bind (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port (default: %(default)s)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Maximum number of jobs running at once (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        help="Maximum number of waiting jobs; further submissions get 503 (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--max-finished-jobs",
+        type=int,
+        default=DEFAULT_MAX_FINISHED_JOBS,
+        help="Finished jobs kept for status and result requests; older ones are forgotten "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Where to write job outputs (default: outputs/server)"
+    )
+    parser.add_argument(
+        "--context-mode",
+        choices=CONTEXT_MODES,
+        default=DEFAULT_CONTEXT_MODE,
+        help="Default context mode for submitted jobs (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=get_model_profiles(),
+        default=get_model_profile(),
+        help="Model routing profile from model_routing.json (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Show every step of every job instead of one line per started/finished job"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the HTTP service from the command line."""
+    args = parse_args(argv)
+    set_model_profile(args.profile)
+    output_dir = args.output_dir or os.path.join(DEFAULT_OUTPUT_DIR, "server")
+
+    print("="*80)
+    print(f"SERVER: {args.workers} workers, queue size {args.queue_size}, "
+          f"context mode {args.context_mode}, model profile {args.profile}")
+    print("="*80)
+
+    start = time.perf_counter()
+    print("Warming up (graph, vector store, retriever tools, LLM clients)...")
+    warm_up()
+    print(f"✓ Ready in {time.perf_counter() - start:.1f}s - outputs in {output_dir}")
+
+    # Step banners from concurrent jobs would interleave, so they are
+    # suppressed unless --verbose; progress lines always go to the terminal
+    progress = lambda line: print(line, file=sys.__stdout__, flush=True)
+    job_server = JobServer(output_dir, workers=args.workers, queue_size=args.queue_size,
+                           context_mode=args.context_mode, max_finished_jobs=args.max_finished_jobs,
+                           progress=progress)
+    httpd = create_server(job_server, args.host, args.port)
+    print(f"Listening on http://{args.host}:{httpd.server_address[1]} (Ctrl+C to stop)")
+
+    with open(os.devnull, "w") as devnull, \
+            (contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)):
+        job_server.start()
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+            job_server.stop()
+    print("\nServer stopped.")
+
+
+if __name__ == "__main__":
+    main()
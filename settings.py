@@ -0,0 +1,29 @@
+"""
+Run settings shared by the graph, the CLI and batch mode.
+
+Kept free of heavy imports so `cli.py --help` and argument parsing don't
+have to load LangGraph, LangChain or the OpenAI client.
+"""
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# How nodes get CV and guide content:
+#   "tools"    - each node lets the model call the retriever tools (2+ LLM calls per node)
+#   "prefetch" - a batch of retrievals runs once per run and the results are
+#                inlined into every prompt (1 LLM call per node)
+CONTEXT_MODES = ("tools", "prefetch")
+DEFAULT_CONTEXT_MODE = os.getenv("RESUME_AGENT_CONTEXT_MODE", "tools")
+
+# Default directory for saved text and PDF outputs
+DEFAULT_OUTPUT_DIR = os.path.join(BASE_DIR, "outputs")
+
+# SQLite file holding a checkpoint of AgentState after every node, so a failed
+# run can be resumed by its thread ID without repeating finished nodes
+CHECKPOINT_PATH = os.getenv(
+    "RESUME_AGENT_CHECKPOINT_PATH",
+    os.path.join(BASE_DIR, ".cache", "checkpoints.sqlite")
+)
@@ -0,0 +1,201 @@
+"""
+Speculative start of a run while the CLI waits for the user.
+
+As soon as the job description text is available, SpeculativeRun extracts
+the company name and runs the keyword analysis (prefetching the CV and guide
+context first in prefetch mode) on a background event loop. Human think-time
+at the confirmation prompts then overlaps the first model calls:
+
+  - If the user confirms, adopt() merges the results into the initial state
+    and the graph's nodes skip that work.
+  - If the user rejects or changes the job description, cancel() stops the
+    background task (in-flight requests are abandoned).
+
+Output from the background work is buffered and printed when the results
+are adopted, so it doesn't interleave with the prompts.
+"""
+import asyncio
+import contextvars
+import io
+import sys
+import threading
+
+from langchain_core.runnables import RunnableLambda
+
+# State keys a speculative run may fill in
+SPECULATIVE_KEYS = (
+    "company_name",
+    "cv_context",
+    "cover_letter_guide_context",
+    "keywords_analysis",
+    "tool_runs",
+)
+
+# Buffer for output written in the current context (None = real stdout)
+_output_buffer = contextvars.ContextVar("speculation_output", default=None)
+
+
+class _RoutedStdout:
+    """Stdout wrapper that sends writes from speculative work to its buffer."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        buffer = _output_buffer.get()
+        return (buffer if buffer is not None else self._stream).write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _route_stdout():
+    """Install the routing stdout wrapper (once)."""
+    if not isinstance(sys.stdout, _RoutedStdout):
+        sys.stdout = _RoutedStdout(sys.stdout)
+
+
+class SpeculativeRun:
+    """Company extraction and keyword analysis running ahead of the graph."""
+
+    def __init__(self, job_description: str, job_url: str = None,
+                 context_mode: str = None, callbacks: list = None):
+        """
+        Args:
+            job_description: The job description text
+            job_url: Original URL if provided
+            context_mode: "tools" or "prefetch" (defaults to DEFAULT_CONTEXT_MODE)
+            callbacks: LangChain callbacks for the speculative calls (e.g. the
+                run's RunTelemetry, so their tokens and cost are counted)
+        """
+        self.job_description = job_description
+        self.job_url = job_url
+        self.context_mode = context_mode
+        self.callbacks = callbacks or []
+        self.updates = {}
+        self.error = None
+        self.cancelled = False
+        self._output = io.StringIO()
+        self._started = threading.Event()
+        self._thread = None
+        self._loop = None
+        self._task = None
+
+    def start(self) -> "SpeculativeRun":
+        """Start the background work and return immediately."""
+        _route_stdout()
+        self._thread = threading.Thread(target=self._run_in_thread, name="speculative-run", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run_in_thread(self):
+        loop = asyncio.new_event_loop()
+        try:
+            self._loop = loop
+            self._task = loop.create_task(self._run())
+            self._started.set()
+            loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self._started.set()
+            loop.close()
+
+    async def _step(self, node: str, afunc, state: dict) -> dict:
+        """Run one node function, reported to the callbacks under the node's name."""
+        update = await RunnableLambda(afunc, name=node).ainvoke(state, config={
+            "callbacks": self.callbacks,
+            "metadata": {"langgraph_node": node},
+            "run_name": node,
+        })
+        self.updates.update(update)
+        return update
+
+    async def _run(self):
+        _output_buffer.set(self._output)
+
+        from main import aanalyze_keywords, aprefetch_context, create_initial_state
+        from jd_compressor import compress_job_description
+        from web_operations import aextract_company_name_from_text
+
+        state = create_initial_state(self.job_description, job_url=self.job_url,
+                                     context_mode=self.context_mode)
+        # The graph compresses the JD before analysis; compression is memoized
+        state["compressed_job_description"] = compress_job_description(self.job_description).text
+
+        async def extract_company(state):
+            print("\n  Extracting company name (started while you confirmed)...")
+            # Same input as get_job_description, so the LLM cache and the result match
+            return {"company_name": await aextract_company_name_from_text(
+                state["compressed_job_description"], url=self.job_url)}
+
+        async def analyze(state):
+            state = {**state, **await self._step("prefetch_context", aprefetch_context, state)}
+            await self._step("analyze_keywords", aanalyze_keywords, state)
+
+        results = await asyncio.gather(
+            self._step("get_job_description", extract_company, state),
+            analyze(state),
+            return_exceptions=True
+        )
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            self.error = errors[0]
+
+    def cancel(self):
+        """Cancel the background work and discard its results."""
+        self.cancelled = True
+        self.updates = {}
+        self._started.wait()
+        try:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        except RuntimeError:
+            # Already finished (the loop is closed)
+            pass
+
+    def result(self, timeout: float = None) -> dict:
+        """
+        Wait for the background work.
+
+        Args:
+            timeout: Seconds to wait (None waits until it finishes)
+
+        Returns:
+            The state updates computed so far ({} if cancelled); steps that
+            failed are left for the graph to run
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.cancelled:
+            return {}
+        return {key: value for key, value in self.updates.items() if key in SPECULATIVE_KEYS}
+
+    def adopt(self, state: dict) -> dict:
+        """
+        Wait for the background work and merge its results into an initial state.
+
+        A company name already in the state (entered by the user) is kept.
+
+        Args:
+            state: State from create_initial_state
+
+        Returns:
+            The same state, updated in place
+        """
+        updates = self.result()
+
+        output = self._output.getvalue()
+        if output:
+            print(output, end="" if output.endswith("\n") else "\n")
+        if self.error is not None:
+            print(f"\n⚠ Speculative analysis failed ({self.error}) - the run will redo it")
+
+        if state.get("company_name"):
+            updates.pop("company_name", None)
+        state.update(updates)
+        return state
@@ -0,0 +1,198 @@
+"""
+Live output of sections while the agent runs.
+
+The graph is run with LangGraph's "messages" stream mode, which makes the chat
+model stream tokens tagged with the node that produced them, together with the
+"updates" mode, which reports each node's final output. One section is printed
+token by token at a time; sections generated in parallel meanwhile are
+buffered and printed in full as soon as the live one finishes. Every section is
+also written to a draft file as its tokens arrive, so a run stopped with
+Ctrl+C still leaves the partial drafts on disk. Sections that a later node
+rewrites (check_resume_length condensing the CV) replace their drafts and are
+printed again, so the drafts match the saved files.
+"""
+import contextlib
+import os
+import sys
+import time
+from langchain_core.messages import AIMessage
+
+# Graph nodes whose output is a user-facing section: node -> (state key, title)
+SECTIONS = {
+    "analyze_keywords": ("keywords_analysis", "KEYWORDS ANALYSIS"),
+    "tailor_name_desc": ("tailored_name_desc", "PROFESSIONAL TITLE & SPECIALIZATION"),
+    "tailor_summary": ("tailored_summary", "PROFESSIONAL SUMMARY"),
+    "tailor_skills": ("tailored_skills", "SKILLS"),
+    "tailor_experience": ("tailored_experience", "EXPERIENCE BULLETS"),
+    "generate_cover_letter": ("cover_letter", "COVER LETTER"),
+    "generate_interest_answer": ("interest_answer", "WHY ARE YOU INTERESTED IN THIS POSITION?"),
+}
+
+# Section node by state key, to spot sections rewritten by another node
+SECTION_NODES = {key: node for node, (key, _) in SECTIONS.items()}
+
+
+class SectionStreamer:
+    """Prints and saves sections from a graph stream of (mode, chunk) events."""
+
+    def __init__(self, drafts_dir: str, out=None):
+        """
+        Args:
+            drafts_dir: Directory for the per-section draft files
+            out: Stream to print to (defaults to sys.stdout)
+        """
+        self.drafts_dir = drafts_dir
+        self.out = out or sys.stdout
+        os.makedirs(drafts_dir, exist_ok=True)
+
+        self.texts = {}         # node -> text received so far
+        self.message_ids = {}   # node -> id of the LLM message being streamed
+        self.finished = set()   # nodes whose final output has arrived
+        self.printed = set()    # finished nodes printed in full
+        self.revised = set()    # sections rewritten by a later node
+        self.live = None        # node currently printed token by token
+        self.start = time.perf_counter()
+        self.first_output_seconds = None
+
+    def draft_path(self, node: str) -> str:
+        """Draft file of a section."""
+        return os.path.join(self.drafts_dir, f"{node}.txt")
+
+    def handle(self, mode: str, chunk):
+        """Process one event from graph.stream(..., stream_mode=["updates", "messages"])."""
+        if mode == "messages":
+            message, metadata = chunk
+            if isinstance(message, AIMessage):
+                self.on_token(metadata.get("langgraph_node"), message.id, message.text)
+        elif mode == "updates":
+            for node, update in (chunk or {}).items():
+                self.on_node_finished(node, update or {})
+
+    def on_token(self, node: str, message_id: str, text: str):
+        """Handle a streamed token of a node's LLM response."""
+        if node not in SECTIONS or node in self.finished or not text:
+            return
+
+        # A new message means an earlier call (e.g. one that ended in tool
+        # calls) is superseded, so the draft starts over
+        if self.message_ids.get(node, message_id) != message_id:
+            self.texts[node] = ""
+            self._write_draft(node, "", mode="w")
+            if self.live == node:
+                self._print("\n\n[revised]\n")
+        self.message_ids[node] = message_id
+
+        self.texts[node] = self.texts.get(node, "") + text
+        self._write_draft(node, text)
+
+        if self.live is None:
+            self._go_live(node)
+        elif self.live == node:
+            self._print(text)
+
+    def on_node_finished(self, node: str, update: dict):
+        """Handle a node's final output."""
+        if node not in SECTIONS:
+            self.on_sections_rewritten(update)
+            return
+
+        key, _ = SECTIONS[node]
+        final_text = update.get(key)
+        # The final value wins over the streamed tokens (and covers outputs
+        # that were never streamed, like cache hits and reused outputs)
+        if final_text is not None and final_text != self.texts.get(node):
+            self.texts[node] = final_text
+            self._write_draft(node, final_text, mode="w")
+        self.finished.add(node)
+
+        if self.live == node:
+            self._print("\n")
+            self.printed.add(node)
+            self.live = None
+        if self.live is None:
+            self._flush_finished()
+            self._pick_next_live()
+
+    def on_sections_rewritten(self, update: dict):
+        """Replace the drafts of sections rewritten by a non-section node."""
+        rewritten = [(SECTION_NODES[key], text) for key, text in update.items()
+                     if key in SECTION_NODES and text is not None]
+        for section, text in rewritten:
+            if text == self.texts.get(section):
+                continue
+            self.texts[section] = text
+            self._write_draft(section, text, mode="w")
+            self.revised.add(section)
+            # Printed again (after the live section, if any) in its new form
+            self.printed.discard(section)
+        if rewritten and self.live is None:
+            self._flush_finished()
+
+    def close(self):
+        """Print whatever has not been printed yet (e.g. after an interruption)."""
+        if self.live is not None:
+            self._print("\n")
+            self.printed.add(self.live)
+            self.live = None
+        self._flush_finished()
+
+    def _go_live(self, node: str):
+        self.live = node
+        self._print_header(node)
+        self._print(self.texts.get(node, ""))
+
+    def _pick_next_live(self):
+        for node in self.texts:
+            if node not in self.finished:
+                self._go_live(node)
+                return
+
+    def _flush_finished(self):
+        for node in list(self.texts):
+            if node in self.finished and node not in self.printed:
+                self._print_header(node)
+                self._print(self.texts[node] + "\n")
+                self.printed.add(node)
+
+    def _print_header(self, node: str):
+        _, title = SECTIONS[node]
+        if node in self.revised:
+            title += " (condensed)"
+        self._print(f"\n{'='*80}\n{title}\n{'='*80}\n")
+
+    def _print(self, text: str):
+        if text and self.first_output_seconds is None:
+            self.first_output_seconds = time.perf_counter() - self.start
+        self.out.write(text)
+        self.out.flush()
+
+    def _write_draft(self, node: str, text: str, mode: str = "a"):
+        with open(self.draft_path(node), mode, encoding="utf-8") as f:
+            f.write(text)
+
+
+def stream_run(agent, graph_input, config: dict, drafts_dir: str):
+    """
+    Run the agent, printing sections as their tokens arrive.
+
+    The nodes' own step banners are suppressed so they don't break up the
+    streamed text.
+
+    Args:
+        agent: Compiled (checkpointed) graph
+        graph_input: Initial state, or None to resume from a checkpoint
+        config: Run config with the thread_id
+        drafts_dir: Directory for the per-section draft files
+
+    Returns:
+        Tuple of (final state, SectionStreamer)
+    """
+    streamer = SectionStreamer(drafts_dir, out=sys.stdout)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for mode, chunk in agent.stream(graph_input, config=config,
+                                            stream_mode=["updates", "messages"]):
+                streamer.handle(mode, chunk)
+    finally:
+        streamer.close()
+    return agent.get_state(config).values, streamer
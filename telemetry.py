@@ -0,0 +1,321 @@
+"""
+Run telemetry.
+
+RunTelemetry is a LangChain callback handler (extending TokenUsageHandler)
+that records, for one agent run:
+  - wall time and executions of every graph node
+  - LLM calls and input / prompt-cached / output tokens per node and model
+  - estimated cost from PRICING
+  - tool invocations, errors and time per tool
+  - HTTP requests made by web_operations (reported with record_http while
+    the handler is active, see use_telemetry)
+
+report() returns the data as a dictionary (written as a JSON report per run),
+and prometheus_text() renders one or more reports in the Prometheus text
+exposition format.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+import json
+import os
+import time
+
+from usage_tracking import TokenUsageHandler
+
+# USD per million tokens: (input, cached input, output). Model names are
+# matched by prefix, so dated snapshots ("gpt-5-2025-08-07") are covered.
+# Override or extend with OPENAI_PRICING, e.g. '{"gpt-5": [1.25, 0.125, 10.0]}'.
+PRICING = {
+    "gpt-5-mini": (0.25, 0.025, 2.00),
+    "gpt-5": (1.25, 0.125, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+METRIC_PREFIX = "resume_agent"
+
+# Telemetry of the run executing in the current context
+_current = ContextVar("resume_agent_telemetry", default=None)
+
+
+def get_pricing(model: str):
+    """(input, cached input, output) USD per million tokens for a model, or None."""
+    pricing = dict(PRICING)
+    pricing.update({name: tuple(prices) for name, prices in
+                    json.loads(os.getenv("OPENAI_PRICING", "{}")).items()})
+    for name in sorted(pricing, key=len, reverse=True):
+        if model.startswith(name):
+            return pricing[name]
+    return None
+
+
+def estimate_cost(model: str, input_tokens: int, cached_input_tokens: int, output_tokens: int) -> float:
+    """Estimated cost in USD of one or more calls (0.0 for unknown models)."""
+    prices = get_pricing(model)
+    if prices is None:
+        return 0.0
+    input_price, cached_price, output_price = prices
+    return ((input_tokens - cached_input_tokens) * input_price
+            + cached_input_tokens * cached_price
+            + output_tokens * output_price) / 1_000_000
+
+
+def _empty_node() -> dict:
+    return {"runs": 0, "errors": 0, "seconds": 0.0, "llm_calls": 0, "input_tokens": 0,
+            "cached_input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "tool_calls": 0}
+
+
+class RunTelemetry(TokenUsageHandler):
+    """Collects latency, token, cost, tool and HTTP telemetry for one run."""
+
+    def __init__(self, run_id: str = None):
+        super().__init__()
+        self.run_id = run_id
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._node_runs = {}
+        self._tool_runs = {}
+        self.node_stats = {}
+        self.tools = {}
+        self.http = {}
+        self.costs = {}
+
+    # Graph nodes: chain runs named after the node they execute
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node is None or kwargs.get("name") != node:
+            return
+        with self._lock:
+            if parent_run_id not in self._node_runs:
+                self._node_runs[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end_node(run_id, error=False)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end_node(run_id, error=True)
+
+    def _end_node(self, run_id, error: bool):
+        with self._lock:
+            started = self._node_runs.pop(run_id, None)
+            if started is None:
+                return
+            node, start = started
+            stats = self.node_stats.setdefault(node, _empty_node())
+            stats["runs"] += 1
+            stats["errors"] += int(error)
+            stats["seconds"] += time.perf_counter() - start
+
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        node = (metadata or {}).get("langgraph_node") or "other"
+        with self._lock:
+            self._tool_runs[run_id] = (name, node, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end_tool(run_id, error=False)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id, error=True)
+
+    def _end_tool(self, run_id, error: bool):
+        with self._lock:
+            started = self._tool_runs.pop(run_id, None)
+            if started is None:
+                return
+            name, node, start = started
+            stats = self.tools.setdefault(name, {"calls": 0, "errors": 0, "seconds": 0.0})
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["seconds"] += time.perf_counter() - start
+            self.node_stats.setdefault(node, _empty_node())["tool_calls"] += 1
+
+    def _record(self, node: str, message):
+        recorded = super()._record(node, message)
+        if recorded is not None:
+            model, usage = recorded
+            cost = estimate_cost(model, usage["input_tokens"], usage["cached_input_tokens"],
+                                 usage["output_tokens"])
+            self.costs[node] = self.costs.get(node, 0.0) + cost
+            self.costs[f"model:{model}"] = self.costs.get(f"model:{model}", 0.0) + cost
+        return recorded
+
+    def record_http(self, kind: str, seconds: float, status: int = None, size: int = 0):
+        """Record one HTTP request (status None for requests that failed without a response)."""
+        with self._lock:
+            stats = self.http.setdefault(kind, {"requests": 0, "errors": 0, "seconds": 0.0, "bytes": 0})
+            stats["requests"] += 1
+            stats["errors"] += int(status is None or status >= 400)
+            stats["seconds"] += seconds
+            stats["bytes"] += size
+
+    def report(self) -> dict:
+        """
+        Telemetry collected so far.
+
+        Returns:
+            Dictionary with run_id, started_at, wall_seconds, totals and
+            per-node, per-model, per-tool and per-HTTP-kind statistics
+        """
+        usage = self.summary()
+        with self._lock:
+            nodes = {node: dict(stats) for node, stats in self.node_stats.items()}
+            for node, counts in usage["nodes"].items():
+                stats = nodes.setdefault(node, _empty_node())
+                stats["llm_calls"] = counts["calls"]
+                for key in ("input_tokens", "cached_input_tokens", "output_tokens"):
+                    stats[key] = counts[key]
+                stats["cost_usd"] = self.costs.get(node, 0.0)
+            models = {model: dict(counts, cost_usd=self.costs.get(f"model:{model}", 0.0))
+                      for model, counts in self.models.items()}
+            tools = {name: dict(stats) for name, stats in self.tools.items()}
+            http = {kind: dict(stats) for kind, stats in self.http.items()}
+
+        totals = {key: usage[key] for key in ("calls", "input_tokens", "cached_input_tokens",
+                                              "output_tokens", "cached_fraction", "local_cache_hits")}
+        totals["cost_usd"] = sum((stats["cost_usd"] for stats in models.values()), 0.0)
+        totals["tool_calls"] = sum(stats["calls"] for stats in tools.values())
+        totals["http_requests"] = sum(stats["requests"] for stats in http.values())
+        return _rounded({
+            "run_id": self.run_id,
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": time.perf_counter() - self._start,
+            "totals": totals,
+            "nodes": nodes,
+            "models": models,
+            "tools": tools,
+            "http": http,
+        })
+
+    def write_report(self, path: str) -> dict:
+        """Write report() as JSON to path; returns the report."""
+        report = self.report()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def _rounded(value):
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, dict):
+        return {key: _rounded(item) for key, item in value.items()}
+    return value
+
+
+@contextmanager
+def use_telemetry(telemetry: RunTelemetry):
+    """Send record_http calls made in this context (and tasks/threads it starts) to telemetry."""
+    token = _current.set(telemetry)
+    try:
+        yield telemetry
+    finally:
+        _current.reset(token)
+
+
+def record_http(kind: str, seconds: float, status: int = None, size: int = 0):
+    """Record an HTTP request in the active run's telemetry, if any."""
+    telemetry = _current.get()
+    if telemetry is not None:
+        telemetry.record_http(kind, seconds, status, size)
+
+
+def _sum_into(target: dict, source: dict):
+    for key, value in source.items():
+        if isinstance(value, dict):
+            _sum_into(target.setdefault(key, {}), value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            target[key] = target.get(key, 0) + value
+
+
+def aggregate_reports(reports: list) -> dict:
+    """
+    Sum the statistics of several run reports.
+
+    A report may itself be an aggregate (it then counts for its "runs"), so
+    a long-lived process can keep one running total instead of every report.
+
+    Returns:
+        A report-shaped dictionary (without run_id/started_at) plus "runs"
+    """
+    totals = dict.fromkeys(("calls", "input_tokens", "cached_input_tokens", "output_tokens",
+                            "local_cache_hits", "tool_calls", "http_requests"), 0)
+    totals["cost_usd"] = 0.0
+    total = {"runs": sum(report.get("runs", 1) for report in reports), "wall_seconds": 0.0, "totals": totals, "nodes": {},
+             "models": {}, "tools": {}, "http": {}}
+    for report in reports:
+        _sum_into(total, {key: report[key] for key in
+                          ("wall_seconds", "totals", "nodes", "models", "tools", "http")})
+    totals["cached_fraction"] = (round(totals["cached_input_tokens"] / totals["input_tokens"], 3)
+                                 if totals["input_tokens"] else 0.0)
+    return _rounded(total)
+
+
+def _labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    pairs = ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+    return "{" + pairs + "}" if pairs else ""
+
+
+def prometheus_text(reports: list) -> str:
+    """
+    Render run reports as Prometheus text exposition format.
+
+    Counters are summed over the reports, so the text can be served as-is
+    for a single run or for every run of a batch/server process.
+    """
+    total = aggregate_reports(reports)
+    lines = []
+
+    def metric(name: str, help_text: str, kind: str, samples: list):
+        full_name = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{full_name}{_labels(**labels)} {value}")
+
+    nodes, tools, http = total["nodes"], total["tools"], total["http"]
+    metric("runs_total", "Agent runs reported.", "counter", [({}, total["runs"])])
+    metric("run_seconds_total", "Wall time of agent runs.", "counter", [({}, total["wall_seconds"])])
+    metric("node_runs_total", "Graph node executions.", "counter",
+           [({"node": node}, stats.get("runs", 0)) for node, stats in nodes.items()])
+    metric("node_errors_total", "Graph node executions that raised.", "counter",
+           [({"node": node}, stats.get("errors", 0)) for node, stats in nodes.items()])
+    metric("node_seconds_total", "Wall time spent in graph nodes.", "counter",
+           [({"node": node}, stats.get("seconds", 0.0)) for node, stats in nodes.items()])
+    metric("llm_calls_total", "LLM calls (excluding local cache hits).", "counter",
+           [({"node": node}, stats.get("llm_calls", 0)) for node, stats in nodes.items()])
+    metric("llm_tokens_total", "LLM tokens by type.", "counter",
+           [({"node": node, "type": kind}, stats.get(f"{kind}_tokens", 0))
+            for node, stats in nodes.items() for kind in ("input", "cached_input", "output")])
+    metric("llm_cost_usd_total", "Estimated LLM cost in USD.", "counter",
+           [({"node": node}, stats.get("cost_usd", 0.0)) for node, stats in nodes.items()])
+    metric("llm_cache_hits_total", "Responses served by the local LLM cache.", "counter",
+           [({}, total["totals"].get("local_cache_hits", 0))])
+    metric("tool_calls_total", "Tool invocations.", "counter",
+           [({"tool": name}, stats["calls"]) for name, stats in tools.items()])
+    metric("tool_errors_total", "Tool invocations that raised.", "counter",
+           [({"tool": name}, stats["errors"]) for name, stats in tools.items()])
+    metric("tool_seconds_total", "Time spent in tools.", "counter",
+           [({"tool": name}, stats["seconds"]) for name, stats in tools.items()])
+    metric("http_requests_total", "HTTP requests made while fetching job descriptions.", "counter",
+           [({"kind": kind}, stats["requests"]) for kind, stats in http.items()])
+    metric("http_errors_total", "HTTP requests that failed or returned an error status.", "counter",
+           [({"kind": kind}, stats["errors"]) for kind, stats in http.items()])
+    metric("http_seconds_total", "Time spent in HTTP requests.", "counter",
+           [({"kind": kind}, stats["seconds"]) for kind, stats in http.items()])
+    return "\n".join(lines) + "\n"
+
+
+def print_telemetry(report: dict):
+    """Print the slowest nodes and the run's token and cost totals."""
+    totals = report["totals"]
+    print(f"\n  Telemetry:   {report['wall_seconds']:.1f}s, {totals['calls']} LLM calls, "
+          f"{totals['tool_calls']} tool calls, ~${totals['cost_usd']:.4f}")
+    slowest = sorted(report["nodes"].items(), key=lambda item: item[1]["seconds"], reverse=True)
+    for node, stats in slowest[:3]:
+        print(f"               {node}: {stats['seconds']:.1f}s")
@@ -3,7 +3,7 @@
 Test script for the Resume Tailoring Agent.
 This tests the workflow with a sample job description.
 """
-from main import resume_agent
+import main
 
 # Sample job description for testing
 SAMPLE_JOB_DESCRIPTION = """
@@ -70,7 +70,7 @@ def test_agent():
     
     try:
         # Run the agent
-        final_state = resume_agent.invoke(initial_state)
+        final_state = main.resume_agent.invoke(initial_state)
         
         # Verify outputs
         print("\n" + "="*80)
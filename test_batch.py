@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test the batch runner: loading jobs, latency statistics and failure isolation.
+Runs offline - no API key needed.
+"""
+import asyncio
+import json
+import os
+import pytest
+
+from batch import load_jobs, percentile, summarize
+
+JOB_DESCRIPTION = "Senior Data Engineer\nRequirements:\n- Python\n- Spark\n- AWS\n" * 3
+
+
+def test_load_jobs_from_directory(tmp_path):
+    (tmp_path / "b_role.txt").write_text("  Second posting\n", encoding="utf-8")
+    (tmp_path / "a_role.txt").write_text("First posting", encoding="utf-8")
+    (tmp_path / "notes.md").write_text("not a job", encoding="utf-8")
+
+    assert load_jobs(str(tmp_path)) == [
+        {"id": "a_role", "job_description": "First posting"},
+        {"id": "b_role", "job_description": "Second posting"},
+    ]
+
+
+def test_load_jobs_from_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "postings.csv"
+    csv_path.write_text("id,url,job_description,company_name\n"
+                        "acme,https://example.com/1,,Acme\n"
+                        ",,Build pipelines,\n", encoding="utf-8")
+    jsonl_path = tmp_path / "postings.jsonl"
+    jsonl_path.write_text(json.dumps({"url": "https://example.com/2"}) + "\n\n"
+                          + json.dumps({"id": "x", "job_description": "Write SQL"}) + "\n",
+                          encoding="utf-8")
+
+    assert load_jobs(str(csv_path)) == [
+        {"id": "acme", "url": "https://example.com/1", "job_description": None, "company_name": "Acme"},
+        {"id": "job_0002", "url": None, "job_description": "Build pipelines", "company_name": None},
+    ]
+    jobs = load_jobs(str(jsonl_path))
+    assert [job["id"] for job in jobs] == ["job_0001", "x"]
+    assert jobs[0]["url"] == "https://example.com/2" and jobs[1]["job_description"] == "Write SQL"
+
+
+def test_load_jobs_rejects_bad_input(tmp_path):
+    bad_row = tmp_path / "postings.jsonl"
+    bad_row.write_text(json.dumps({"id": "a", "job_description": "ok"}) + "\n"
+                       + json.dumps({"id": "b", "company_name": "Acme"}) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Row 2"):
+        load_jobs(str(bad_row))
+
+    with pytest.raises(ValueError, match="Unsupported batch input"):
+        load_jobs(str(tmp_path / "postings.xlsx"))
+
+
+def test_percentile_is_nearest_rank():
+    values = [7, 1, 3, 9, 5, 2, 8, 4, 10, 6]
+    assert percentile(values, 0.5) == 5
+    assert percentile(values, 0.95) == 10
+    assert percentile(values, 0.0) == 1
+    assert percentile([], 0.5) == 0.0
+
+
+def test_summarize_counts_only_successful_latencies():
+    results = [
+        {"status": "ok", "seconds": 1.0},
+        {"status": "ok", "seconds": 2.0},
+        {"status": "ok", "seconds": 6.0},
+        {"status": "duplicate", "seconds": 0.0},
+        {"status": "failed", "seconds": 30.0},
+    ]
+    summary = summarize(results, wall_seconds=60.0)
+
+    assert (summary["jobs"], summary["succeeded"], summary["duplicates"], summary["failed"]) == (5, 3, 1, 1)
+    assert summary["jobs_per_minute"] == 3.0
+    assert summary["latency_seconds"] == {"min": 1.0, "mean": 3.0, "p50": 2.0, "p95": 6.0, "max": 6.0}
+    assert summarize([], wall_seconds=0.0)["latency_seconds"]["p95"] == 0.0
+
+
+def test_failed_job_does_not_stop_the_batch(agent_main, tmp_path, monkeypatch):
+    import web_operations
+    from batch import run_batch
+
+    def unreachable(url):
+        raise ConnectionError(f"Could not reach {url}")
+
+    monkeypatch.setattr(web_operations, "fetch_job_description_from_url", unreachable)
+    jobs = [{"id": "a", "job_description": f"{JOB_DESCRIPTION}\na"},
+            {"id": "broken", "url": "https://example.com/gone"},
+            {"id": "b", "job_description": f"{JOB_DESCRIPTION}\nb"}]
+    lines = []
+
+    summary = asyncio.run(run_batch(jobs, str(tmp_path), concurrency=2, context_mode="prefetch",
+                                    progress=lines.append))
+
+    assert (summary["succeeded"], summary["failed"]) == (2, 1)
+    with open(tmp_path / "results.jsonl", encoding="utf-8") as f:
+        results = {result["id"]: result for result in map(json.loads, f)}
+    assert results["broken"]["status"] == "failed"
+    assert results["broken"]["error"] == "ConnectionError: Could not reach https://example.com/gone"
+    assert all(results[job_id]["output_files"]["text_file"] for job_id in ("a", "b"))
+    assert len(lines) == 3
+    assert (tmp_path / "summary.json").exists() and (tmp_path / "metrics.prom").exists()
+    assert (tmp_path / "broken" / "telemetry" / "broken.json").exists()
+
+
+def test_jobs_write_to_their_own_subdirectories(agent_main, tmp_path):
+    from batch import run_batch
+
+    # Same company and title: the file names only differ by the second they finish in
+    jobs = [{"id": f"copy/{i}", "job_description": f"{JOB_DESCRIPTION}\n{i}"} for i in range(3)]
+    summary = asyncio.run(run_batch(jobs, str(tmp_path), concurrency=3, context_mode="prefetch",
+                                    progress=lambda line: None))
+
+    assert summary["succeeded"] == 3
+    with open(tmp_path / "results.jsonl", encoding="utf-8") as f:
+        text_files = [result["output_files"]["text_file"] for result in map(json.loads, f)]
+    assert len(set(text_files)) == 3
+    assert all(os.path.dirname(path).startswith(str(tmp_path) + os.sep) for path in text_files)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test the offline benchmark fakes, including a full graph run on them.
+Runs offline - no API key needed.
+"""
+import os
+import pytest
+from langchain_core.messages import HumanMessage, ToolMessage
+
+from benchmarks.fakes import FAKE_COMPANY, FakeChatModel, FakeEmbeddings
+from benchmarks.timing import measure
+
+JOB_DESCRIPTION = "Senior Data Engineer\nRequirements:\n- Python\n- Spark\n- AWS\n" * 3
+
+
+def test_fake_chat_model_scripts_tool_calls_then_answers():
+    model = FakeChatModel().bind_tools([
+        {"type": "function", "function": {"name": "retrieve_cv_content", "description": "cv",
+                                          "parameters": {"type": "object", "properties": {}}}}
+    ])
+    config = {"metadata": {"langgraph_node": "tailor_skills"}}
+
+    first = model.invoke([HumanMessage(content="skills")], config=config)
+    assert [call["name"] for call in first.tool_calls] == ["retrieve_cv_content"]
+
+    second = model.invoke([HumanMessage(content="skills"), first,
+                           ToolMessage(content="CV", tool_call_id=first.tool_calls[0]["id"])], config=config)
+    assert not second.tool_calls
+    assert second.content.startswith("Languages:")
+    assert second.usage_metadata["input_tokens"] > 0
+
+
+def test_fake_embeddings_are_deterministic():
+    embeddings = FakeEmbeddings(size=16)
+    assert embeddings.embed_query("python") == embeddings.embed_query("python")
+    assert embeddings.embed_query("python") != embeddings.embed_query("java")
+
+
+@pytest.mark.parametrize("context_mode", ["tools", "prefetch"])
+def test_full_graph_runs_on_fakes(agent_main, context_mode, tmp_path):
+    state = agent_main.create_initial_state(JOB_DESCRIPTION, context_mode=context_mode,
+                                            output_dir=str(tmp_path))
+    final_state = agent_main.resume_agent.invoke(state)
+
+    assert final_state["company_name"] == FAKE_COMPANY
+    assert final_state["cover_letter"].startswith("Dear Hiring Team")
+    assert os.path.exists(final_state["output_files"]["text_file"])
+    assert bool(final_state["tool_runs"]) == (context_mode == "tools")
+
+
+def test_fixture_pages_parse_to_the_job_description():
+    from benchmarks.micro import load_fixtures
+    from web_operations import parse_job_description_html
+
+    fixtures = load_fixtures()
+    assert len(fixtures) == 3
+    for html in fixtures.values():
+        text = parse_job_description_html(html)
+        assert "Experience with Apache Spark" in text
+        assert "window.__STATE__" not in text
+
+
+def test_measure_scales_calls_per_sample():
+    result = measure(lambda: None, repeat=2)
+    assert result["calls_per_sample"] > 1
+    assert result["best_ms"] <= result["median_ms"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test that checkpointed graphs and their SQLite connections are shared, not reopened.
+Runs offline - no API key needed.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+def test_checkpointed_agent_is_built_once_across_threads(agent_main, tmp_path):
+    main = agent_main
+    path = str(tmp_path / "checkpoints.sqlite")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        agents = list(pool.map(lambda _: main.get_checkpointed_agent(path), range(16)))
+
+    assert all(agent is agents[0] for agent in agents)
+    main._checkpointed_agents.pop(path)
+
+
+def test_async_agent_is_reused_per_event_loop_and_closed(agent_main, tmp_path):
+    main = agent_main
+    path = str(tmp_path / "checkpoints.sqlite")
+
+    async def run():
+        agents = await asyncio.gather(*[main.aget_checkpointed_agent(path) for _ in range(4)])
+        assert all(agent is agents[0] for agent in agents)
+        assert await main.aget_checkpointed_agent(path) is agents[0]
+
+        (conn,) = [conn for (_, key_path), (_, conn) in main._async_checkpointed_agents.items()
+                   if key_path == path]
+        await main.aclose_checkpointed_agents()
+        assert not any(key_path == path for _, key_path in main._async_checkpointed_agents)
+        return agents[0], conn
+
+    first, conn = asyncio.run(run())
+    assert not conn._running
+
+    # A new loop gets its own connection; one left open is stopped once its loop has closed
+    async def leave_open():
+        return await main.aget_checkpointed_agent(path), main._async_checkpointed_agents[
+            (asyncio.get_running_loop(), path)][1]
+
+    second, leftover = asyncio.run(leave_open())
+    assert second is not first
+    _, last = asyncio.run(leave_open())
+    assert not leftover._running
+
+    with main._checkpoint_lock:
+        main._stop_closed_loop_connections()
+    assert not last._running
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
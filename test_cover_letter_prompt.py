@@ -5,7 +5,7 @@ Test the updated cover letter generation with longer format.
 import os
 os.environ['LANGCHAIN_TRACING_V2'] = 'false'
 
-from prompts import GENERATE_COVER_LETTER_PROMPT
+from prompts import GENERATE_COVER_LETTER_PROMPT, GUIDE_INSTRUCTIONS
 
 # Check the prompt
 print("="*70)
@@ -18,7 +18,10 @@ if "600-900 words" in GENERATE_COVER_LETTER_PROMPT:
 else:
     print("✗ Word count NOT updated")
 
-if "retrieve_cover_letter_guide" in GENERATE_COVER_LETTER_PROMPT:
+# The tool is named in tools mode; prefetch mode inlines the guide instead
+if "retrieve_cover_letter_guide" in GENERATE_COVER_LETTER_PROMPT.format(
+        company_name="", tailored_summary="", tailored_skills="", tailored_experience="",
+        **GUIDE_INSTRUCTIONS["tools"]):
     print("✓ RAG tool usage: retrieve_cover_letter_guide is mentioned")
 else:
     print("✗ RAG tool NOT mentioned")
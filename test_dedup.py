@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test near-duplicate posting detection and how batch jobs skip duplicates.
+Runs offline - no API key needed.
+"""
+import asyncio
+import random
+import time
+import pytest
+
+from dedup import DuplicateIndex, hamming_distance, simhash
+
+JOB_DESCRIPTION = """Senior Data Engineer - Acme Analytics
+
+Acme Analytics is hiring a Senior Data Engineer to design and operate the batch
+and streaming pipelines behind our customer analytics products.
+
+Responsibilities:
+- Design, build and operate pipelines processing terabytes of events per day
+- Partner with analysts and data scientists on data models and metrics
+- Own data quality checks, alerting and on-call for the pipelines you build
+- Mentor engineers and improve our engineering practices
+
+Requirements:
+- 5+ years of experience with Python and SQL in production
+- Apache Spark, Airflow and dbt
+- AWS (S3, Glue, EMR, Redshift) or a comparable cloud platform
+- Kafka or another streaming platform
+- Clear written communication with technical and business stakeholders
+"""
+
+# The same posting as a job board shows it
+JOB_BOARD_COPY = ("Apply now\nShare this job\n\n"
+                  + JOB_DESCRIPTION.upper().replace("- ", "• ").replace("\n", "  \n")
+                  + "\nhttps://boards.example.com/acme/12345\n")
+
+OTHER_POSTING = """Frontend Engineer - Globex
+
+Globex is looking for a Frontend Engineer to build the web app our customers
+use to manage their subscriptions and invoices.
+
+Requirements:
+- 3+ years of TypeScript and React
+- Experience with design systems, accessibility and end-to-end testing
+- Comfortable working with product designers on user research
+"""
+
+
+def test_formatting_differences_keep_fingerprint_close():
+    assert hamming_distance(simhash(JOB_DESCRIPTION), simhash(JOB_BOARD_COPY)) <= 2
+    assert hamming_distance(simhash(JOB_DESCRIPTION), simhash(OTHER_POSTING)) > 10
+
+
+def test_find_claim_complete_release(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "duplicates.sqlite"))
+    assert index.find(JOB_DESCRIPTION) is None
+
+    assert index.claim("first", JOB_DESCRIPTION) is None
+    running = index.claim("second", JOB_BOARD_COPY)
+    assert running["key"] == "first" and not running["completed"]
+    # A retry of the same job after a crash is not its own duplicate
+    assert index.claim("first", JOB_DESCRIPTION) is None
+
+    index.complete("first", "Acme Analytics", {"text_file": "first.txt"})
+    match = index.find(JOB_BOARD_COPY)
+    assert match["completed"] and match["output_files"] == {"text_file": "first.txt"}
+    assert index.claim("first", JOB_DESCRIPTION)["key"] == "first"
+    assert index.find(OTHER_POSTING) is None
+
+    index.release("first")
+    assert index.find(JOB_DESCRIPTION) is None
+
+
+def test_abandoned_claim_is_taken_over(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "duplicates.sqlite"), claim_ttl=60)
+    assert index.claim("crashed", JOB_DESCRIPTION) is None
+    assert index.claim("copy", JOB_BOARD_COPY)["key"] == "crashed"
+
+    # Once the claim is older than claim_ttl its process is assumed dead
+    index.claim_ttl = 0
+    assert index.claim("copy", JOB_BOARD_COPY) is None
+    assert index.get("crashed") is None
+    assert index.get("copy")["completed"] is False
+
+    index.complete("copy", "Acme Analytics", {"text_file": "copy.txt"})
+    # Completed records never expire
+    assert index.claim("later", JOB_DESCRIPTION)["key"] == "copy"
+
+
+def test_index_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "duplicates.sqlite")
+    reader = DuplicateIndex(path)
+    assert reader.find(JOB_DESCRIPTION) is None
+
+    DuplicateIndex(path).add("run-1", JOB_DESCRIPTION, "Acme Analytics", {"text_file": "a.txt"})
+
+    assert reader.find(JOB_BOARD_COPY)["key"] == "run-1"
+    assert len(DuplicateIndex(path)) == 1
+
+
+def test_lookup_is_fast_with_many_postings(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "duplicates.sqlite"))
+    rng = random.Random(0)
+    with index._lock:
+        index._refresh()
+        index._conn.execute("BEGIN")
+        for i in range(20000):
+            index._write(f"posting-{i}", rng.getrandbits(64), completed=True)
+        index._conn.execute("COMMIT")
+    index.add("target", JOB_DESCRIPTION)
+    fingerprint = simhash(JOB_BOARD_COPY)
+
+    start = time.perf_counter()
+    for _ in range(200):
+        match = index.find(JOB_BOARD_COPY, fingerprint=fingerprint)
+    per_lookup = (time.perf_counter() - start) / 200
+
+    assert match["key"] == "target"
+    assert per_lookup < 0.001
+
+
+@pytest.fixture
+def duplicate_index(agent_main, tmp_path):
+    import dedup
+    yield dedup.enable_duplicate_index(path=str(tmp_path / "duplicates.sqlite"))
+    dedup.disable_duplicate_index()
+
+
+def test_batch_skips_duplicates_before_any_llm_call(duplicate_index, tmp_path):
+    from batch import run_batch
+
+    jobs = [{"id": "company_site", "job_description": JOB_DESCRIPTION},
+            {"id": "job_board", "job_description": JOB_BOARD_COPY},
+            {"id": "other", "job_description": OTHER_POSTING}]
+    summary = asyncio.run(run_batch(jobs, str(tmp_path / "out"), concurrency=1,
+                                    context_mode="prefetch", progress=lambda line: None))
+
+    assert (summary["succeeded"], summary["duplicates"], summary["failed"]) == (2, 1, 0)
+    nodes = summary["telemetry"]["nodes"]
+    assert sum(stats.get("llm_calls", 0) for stats in nodes.values()) == 2 * 8
+
+    again = asyncio.run(run_batch(jobs[:1], str(tmp_path / "out2"), progress=lambda line: None,
+                                  allow_duplicates=True))
+    assert again["succeeded"] == 1
+
+
+def test_batch_copy_waits_for_running_original(duplicate_index, tmp_path, monkeypatch):
+    import batch
+
+    monkeypatch.setattr(batch, "DUPLICATE_POLL_INTERVAL", 0.05)
+    assert duplicate_index.claim("company_site", JOB_DESCRIPTION) is None
+
+    async def run():
+        copy = asyncio.create_task(batch.run_job({"id": "job_board", "job_description": JOB_BOARD_COPY},
+                                                 str(tmp_path / "out"), "prefetch"))
+        await asyncio.sleep(0.2)
+        assert not copy.done()
+        duplicate_index.complete("company_site", "Acme Analytics", {"text_file": "site.txt"})
+        return await copy
+
+    result = asyncio.run(run())
+    assert result["status"] == "duplicate" and result["output_files"] == {"text_file": "site.txt"}
+
+    # If the original fails instead, the copy runs itself
+    duplicate_index.claim("other_site", OTHER_POSTING)
+
+    async def run_after_failure():
+        copy = asyncio.create_task(batch.run_job({"id": "other_copy", "job_description": OTHER_POSTING},
+                                                 str(tmp_path / "out"), "prefetch"))
+        await asyncio.sleep(0.2)
+        duplicate_index.release("other_site")
+        return await copy
+
+    result = asyncio.run(run_after_failure())
+    assert result["status"] == "ok" and result["output_files"]["text_file"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test the disk-backed embedding cache on fake embeddings.
+Runs offline - no API key needed.
+"""
+import asyncio
+import shutil
+
+import numpy as np
+import pytest
+from pydantic import Field
+
+import rag_setup
+from benchmarks.fakes import FakeEmbeddings
+from embedding_cache import CachedEmbeddings, EmbeddingStore
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    """Fake embeddings that record every text sent to the "API"."""
+
+    embedded: list = Field(default_factory=list)
+
+    def embed_documents(self, texts: list) -> list:
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> list:
+        self.embedded.append(text)
+        return super().embed_query(text)
+
+
+def test_only_unseen_texts_are_embedded(tmp_path):
+    model = CountingEmbeddings(size=16)
+    embeddings = CachedEmbeddings(model, EmbeddingStore(str(tmp_path)))
+
+    first = embeddings.embed_documents(["alpha", "beta", "alpha"])
+    assert model.embedded == ["alpha", "beta"]
+    assert first[0] == first[2]
+    np.testing.assert_allclose(first[1], FakeEmbeddings(size=16).embed_query("beta"), rtol=1e-6)
+
+    second = embeddings.embed_documents(["beta", "gamma", "alpha"])
+    assert model.embedded == ["alpha", "beta", "gamma"]
+    assert second[0] == first[1] and second[2] == first[0]
+
+    # Queries share the cache with documents
+    assert embeddings.embed_query("gamma") == second[1]
+    assert model.embedded == ["alpha", "beta", "gamma"]
+    delta = asyncio.run(embeddings.aembed_query("delta"))
+    assert asyncio.run(embeddings.aembed_documents(["alpha", "delta"])) == [first[0], delta]
+    assert embeddings.embed_query("delta") == delta
+    assert model.embedded == ["alpha", "beta", "gamma"]
+    assert embeddings.store.stats()["entries"] == 4
+
+
+def test_cache_persists_and_is_keyed_by_model(tmp_path):
+    CachedEmbeddings(CountingEmbeddings(size=16), EmbeddingStore(str(tmp_path))).embed_documents(["alpha", "beta"])
+
+    # A new process: same model hits, another vector size misses
+    same = CountingEmbeddings(size=16)
+    CachedEmbeddings(same, EmbeddingStore(str(tmp_path))).embed_documents(["alpha", "beta"])
+    assert same.embedded == []
+
+    other = CountingEmbeddings(size=8)
+    vectors = CachedEmbeddings(other, EmbeddingStore(str(tmp_path))).embed_documents(["alpha", "beta"])
+    assert other.embedded == ["alpha", "beta"] and len(vectors[0]) == 8
+
+    stats = EmbeddingStore(str(tmp_path)).stats()
+    assert stats["entries"] == 4 and stats["bytes"] == (2 * 16 + 2 * 8) * 4
+
+
+def test_disabled_cache_passes_through(tmp_path):
+    from embedding_cache import disable_embedding_cache, enable_embedding_cache
+
+    model = CountingEmbeddings(size=16)
+    embeddings = CachedEmbeddings(model)
+    disable_embedding_cache()
+    embeddings.embed_documents(["alpha"])
+    embeddings.embed_documents(["alpha"])
+    assert model.embedded == ["alpha", "alpha"]
+
+    try:
+        enable_embedding_cache(str(tmp_path))
+        embeddings.embed_documents(["alpha"])
+        embeddings.embed_documents(["alpha"])
+        assert model.embedded == ["alpha", "alpha", "alpha"]
+    finally:
+        disable_embedding_cache()
+    # Attributes of the wrapped model stay visible (e.g. for the index manifest)
+    assert embeddings.size == 16
+
+
+def test_rebuilt_vector_store_costs_no_embedding_calls(tmp_path):
+    saved = rag_setup._embeddings, rag_setup.PERSIST_DIRECTORY
+    store = EmbeddingStore(str(tmp_path / "embeddings"))
+    persist_directory = str(tmp_path / "chroma")
+    try:
+        model = CountingEmbeddings(size=32)
+        rag_setup.use_embeddings(CachedEmbeddings(model, store), persist_directory)
+        rag_setup.get_vectorstore()
+        assert model.embedded
+
+        shutil.rmtree(persist_directory)
+        model = CountingEmbeddings(size=32)
+        rag_setup.use_embeddings(CachedEmbeddings(model, store), persist_directory)
+        vectorstore = rag_setup.get_vectorstore()
+        assert model.embedded == []
+        assert rag_setup.load_manifest()["embedding_model"] == "CountingEmbeddings:32"
+        assert vectorstore.similarity_search("Python", k=1, filter={"source_type": "cv"})
+    finally:
+        rag_setup.use_embeddings(*saved)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test the graph's fan-out and join edges and a full async run on the fake chat model.
+Runs offline - no API key needed.
+"""
+import asyncio
+import os
+import pytest
+
+JOB_DESCRIPTION = "Senior Data Engineer\nRequirements:\n- Python\n- Spark\n- AWS\n" * 3
+
+SECTION_NODES = {
+    "analyze_keywords": "keywords_analysis",
+    "tailor_summary": "tailored_summary",
+    "tailor_skills": "tailored_skills",
+    "tailor_experience": "tailored_experience",
+    "tailor_name_desc": "tailored_name_desc",
+    "check_resume_length": "length_check_result",
+    "generate_cover_letter": "cover_letter",
+    "generate_interest_answer": "interest_answer",
+}
+
+
+def test_graph_fans_out_and_joins():
+    import main
+
+    builder = main.build_graph()
+    # Joins wait for every input node, not the first one to finish
+    assert builder.waiting_edges == {
+        (tuple(main.TAILORING_NODES), "check_resume_length"),
+        (tuple(main.COVER_LETTER_INPUT_NODES), "generate_cover_letter"),
+        (tuple(main.SAVE_OUTPUTS_INPUT_NODES), "save_outputs"),
+    }
+
+    edges = {(edge.source, edge.target) for edge in builder.compile().get_graph().edges}
+    assert edges == {
+        ("__start__", "get_job_description"),
+        ("get_job_description", "compress_job_description"),
+        ("compress_job_description", "prefetch_context"),
+        ("prefetch_context", "analyze_keywords"),
+        ("prefetch_context", "generate_interest_answer"),
+        *{("analyze_keywords", node) for node in main.TAILORING_NODES},
+        *{(node, "check_resume_length") for node in main.TAILORING_NODES},
+        *{(node, "generate_cover_letter") for node in main.COVER_LETTER_INPUT_NODES},
+        *{(node, "save_outputs") for node in main.SAVE_OUTPUTS_INPUT_NODES},
+        ("save_outputs", "__end__"),
+    }
+
+
+@pytest.mark.parametrize("context_mode", ["tools", "prefetch"])
+def test_async_run_fills_every_section_once(agent_main, context_mode, tmp_path):
+    state = agent_main.create_initial_state(JOB_DESCRIPTION, context_mode=context_mode,
+                                            output_dir=str(tmp_path))
+
+    async def run():
+        updates = [update async for update in agent_main.resume_agent.astream(state, stream_mode="updates")]
+        return updates, await agent_main.resume_agent.ainvoke(state)
+
+    updates, final_state = asyncio.run(run())
+
+    nodes = [node for update in updates for node in update]
+    assert sorted(nodes) == sorted(agent_main.build_graph().nodes)
+    for node, key in SECTION_NODES.items():
+        writers = [name for update in updates for name, values in update.items() if key in (values or {})]
+        assert writers == [node], key
+        assert final_state[key], key
+    assert nodes.index("generate_interest_answer") < nodes.index("check_resume_length")
+    assert os.path.exists(final_state["output_files"]["text_file"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test the job description compressor.
+Runs offline - no API key needed.
+"""
+from jd_compressor import compress_job_description, is_drop_heading, is_heading
+
+JOB_DESCRIPTION = """Senior Python Developer
+TechCorp Solutions - Remote
+Apply now
+Share this job
+
+About TechCorp
+TechCorp builds logistics software used by 500 companies worldwide.
+
+Responsibilities:
+- Design and build scalable backend services in Python
+- Must pass a background check
+
+Requirements
+- 5+ years of Python experience
+- Experience with PostgreSQL and Kafka
+- 5+ years of Python experience
+
+Benefits
+- Unlimited PTO
+- 401(k) matching
+
+Salary: $150,000 - $180,000
+
+TechCorp is an equal opportunity employer and considers all applicants without regard to race, color, religion or sex.
+If you need a reasonable accommodation during the application process, please contact jobs@techcorp.com.
+Apply now
+"""
+
+
+def test_drops_boilerplate_and_keeps_content():
+    result = compress_job_description(JOB_DESCRIPTION)
+
+    for kept in ["Senior Python Developer", "About TechCorp", "logistics software",
+                 "Design and build scalable backend services", "Must pass a background check",
+                 "PostgreSQL and Kafka"]:
+        assert kept in result.text, kept
+    # The salary line is part of the benefits section, which runs to the end
+    for dropped in ["Unlimited PTO", "401(k)", "Salary", "equal opportunity", "reasonable accommodation",
+                    "Apply now", "Share this job"]:
+        assert dropped not in result.text, dropped
+    assert "Benefits" in result.dropped_sections
+
+
+def test_boilerplate_statement_outside_a_section():
+    text = ("Data Engineer\n\nRequirements\n- Spark and Airflow\n- Reasonable accommodation is not a skill\n"
+            "Acme is an equal opportunity employer and welcomes applicants of every national origin.\n")
+    result = compress_job_description(text)
+
+    assert "equal opportunity employer" not in result.text
+    # Bullets are never treated as boilerplate statements
+    assert "- Reasonable accommodation is not a skill" in result.text
+
+
+def test_repeated_lines_are_deduped():
+    result = compress_job_description(JOB_DESCRIPTION)
+    assert result.text.count("5+ years of Python experience") == 1
+
+
+def test_reports_tokens_saved():
+    result = compress_job_description(JOB_DESCRIPTION)
+    assert result.original_tokens > result.compressed_tokens
+    assert result.tokens_saved == result.original_tokens - result.compressed_tokens
+
+
+def test_never_drops_most_of_the_text():
+    # A posting that is nothing but a benefits list is kept (only deduplicated)
+    text = "Benefits\n" + "\n".join(f"- Perk number {i}" for i in range(20))
+    result = compress_job_description(text)
+    assert result.text == text
+    assert result.dropped_sections == ()
+
+
+def test_job_titles_are_not_dropped_headings():
+    for title, company in [("Privacy Engineer", "Acme Corp"), ("Senior Compensation Analyst", "Globex"),
+                           ("Legal Counsel", "Initech"), ("Benefits Specialist", "Umbrella Health")]:
+        text = (f"{title}\n{company} is hiring a {title.lower()} to join its growing team in Berlin.\n\n"
+                "Requirements\n- 3+ years of relevant experience\n- Strong written communication\n\n"
+                "Benefits\n- Unlimited PTO\n- Gym membership\n- Learning budget\n- Company retreats\n")
+        result = compress_job_description(text)
+        assert result.text.startswith(f"{title}\n{company} is hiring"), title
+        assert "3+ years of relevant experience" in result.text
+        assert "Unlimited PTO" not in result.text
+        assert result.dropped_sections == ("Benefits",)
+
+
+def test_drop_headings_match_whole_headings_only():
+    for heading in ["Benefits", "Perks & Benefits", "Compensation and Benefits:", "## Salary Range",
+                    "WHAT WE OFFER", "Equal Opportunity Employer", "Privacy Notice", "Why you’ll love working here"]:
+        assert is_drop_heading(heading), heading
+    for heading in ["Privacy Engineer", "Legal Counsel", "Benefits Specialist", "Senior Compensation Analyst",
+                    "About us", "Salary Negotiation Coach"]:
+        assert not is_drop_heading(heading), heading
+
+
+def test_nothing_is_dropped_before_the_first_content():
+    text = ("Compensation\nGlobex is looking for an analyst to own pay benchmarking across Europe.\n\n"
+            "Requirements\n- Excel and SQL\n- 4+ years in total rewards\n")
+    assert compress_job_description(text).text == text.strip()
+
+
+def test_heading_detection():
+    assert is_heading("Benefits")
+    assert is_heading("WHAT WE OFFER")
+    assert is_heading("## Perks & Benefits")
+    assert is_heading("Responsibilities:")
+    assert not is_heading("- Competitive salary")
+    assert not is_heading("Salary: $150,000")
+    assert not is_heading("We offer great benefits to all employees.")
+
+
+if __name__ == "__main__":
+    test_drops_boilerplate_and_keeps_content()
+    test_boilerplate_statement_outside_a_section()
+    test_repeated_lines_are_deduped()
+    test_reports_tokens_saved()
+    test_never_drops_most_of_the_text()
+    test_job_titles_are_not_dropped_headings()
+    test_drop_headings_match_whole_headings_only()
+    test_nothing_is_dropped_before_the_first_content()
+    test_heading_detection()
+    print("✓ All job description compressor tests passed")
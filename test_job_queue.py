@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test the durable job queue: leases, visibility timeouts, retries and a drained worker run.
+Runs offline - no API key needed.
+"""
+import asyncio
+import pytest
+
+from job_queue import JobQueue, run_worker
+
+JOB_DESCRIPTION = "Senior Data Engineer\nRequirements:\n- Python\n- Spark\n- AWS\n" * 3
+
+
+def _jobs(*ids):
+    return [{"id": job_id, "job_description": f"{JOB_DESCRIPTION}\n{job_id}"} for job_id in ids]
+
+
+def test_enqueue_is_idempotent_and_lease_ack(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite"))
+    assert queue.enqueue(_jobs("a", "b")) == 2
+    assert queue.enqueue(_jobs("b", "c")) == 1
+
+    job = queue.lease("worker-1")
+    assert job["id"] == "a" and job["attempts"] == 1
+    assert queue.lease("worker-2")["id"] == "b"
+
+    assert not queue.ack("a", "worker-2")
+    assert queue.ack("a", "worker-1", {"output_files": {"text_file": "a.txt"}})
+    assert queue.stats() == {"queued": 1, "leased": 1, "done": 1, "failed": 0}
+    assert queue.jobs("done")[0]["result"]["output_files"]["text_file"] == "a.txt"
+
+
+def test_expired_lease_is_released_to_another_worker(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite"), max_attempts=2)
+    queue.enqueue(_jobs("a"))
+
+    # The first worker "crashes": its lease expires immediately
+    assert queue.lease("crashed", visibility_timeout=0)["id"] == "a"
+    job = queue.lease("healthy", visibility_timeout=0)
+    assert job["id"] == "a" and job["attempts"] == 2
+    assert not queue.ack("a", "crashed")
+
+    # Out of attempts: the next lease marks it failed instead of handing it out
+    assert queue.lease("another") is None
+    failed = queue.jobs("failed")[0]
+    assert failed["error"] == "Lease expired after 2 attempts"
+
+    assert queue.requeue_failed() == 1
+    assert queue.lease("another")["attempts"] == 1
+
+
+def test_failed_attempts_are_retried_then_failed(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite"), max_attempts=2)
+    queue.enqueue(_jobs("a"))
+
+    queue.lease("w")
+    assert queue.fail("a", "w", "boom", retry_delay=0)
+    assert queue.stats()["queued"] == 1
+    queue.lease("w")
+    assert queue.extend("a", "w")
+    assert queue.fail("a", "w", "boom again", retry_delay=0)
+    assert queue.stats()["failed"] == 1
+    assert queue.lease("w") is None
+
+
+def test_worker_drains_queue(agent_main, tmp_path):
+    queue_path = str(tmp_path / "queue.sqlite")
+    queue = JobQueue(queue_path)
+    queue.enqueue(_jobs("a", "b", "c"))
+    # A job held by a "crashed" worker is picked up once its lease expires
+    queue.lease("crashed", visibility_timeout=0.5)
+
+    counts = asyncio.run(run_worker(queue_path, str(tmp_path / "out"), concurrency=2,
+                                    context_mode="prefetch", poll_interval=0.1,
+                                    progress=lambda line: None))
+
+    assert counts == {"done": 3, "duplicate": 0, "failed": 0}
+    assert queue.stats() == {"queued": 0, "leased": 0, "done": 3, "failed": 0}
+    assert all(job["result"]["output_files"]["text_file"] for job in queue.jobs())
+
+
+def test_release_does_not_use_an_attempt(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite"), max_attempts=1)
+    queue.enqueue(_jobs("a"))
+
+    queue.lease("w")
+    assert not queue.release("a", "other", delay=0)
+    assert queue.release("a", "w", delay=0)
+    assert queue.lease("w")["attempts"] == 1
+
+
+def test_duplicate_of_unfinished_posting_is_requeued(agent_main, tmp_path, monkeypatch):
+    import batch
+    import dedup
+
+    index = dedup.enable_duplicate_index(path=str(tmp_path / "duplicates.sqlite"))
+    index.claim("original", JOB_DESCRIPTION)
+    calls = []
+
+    async def fake_run_job(job, output_dir, context_mode, allow_duplicates=False, checkpoint_path=None):
+        calls.append(job["id"])
+        if len(calls) == 2:
+            index.complete("original", "Acme", {"text_file": "original.txt"})
+        return {"id": job["id"], "status": "duplicate", "duplicate_of": "original",
+                "output_files": None, "seconds": 0.0}
+
+    monkeypatch.setattr(batch, "run_job", fake_run_job)
+    queue_path = str(tmp_path / "queue.sqlite")
+    queue = JobQueue(queue_path, max_attempts=1)
+    queue.enqueue(_jobs("copy"))
+    try:
+        counts = asyncio.run(run_worker(queue_path, str(tmp_path / "out"), poll_interval=0.05,
+                                        progress=lambda line: None))
+    finally:
+        dedup.disable_duplicate_index()
+
+    # Not acked while the original was unfinished, then acked once it completed
+    assert calls == ["copy", "copy"]
+    assert counts == {"done": 0, "duplicate": 1, "failed": 0}
+    assert queue.jobs("done")[0]["attempts"] == 1
+
+
+def test_retried_job_resumes_from_its_checkpoint(agent_main, tmp_path, monkeypatch):
+    from benchmarks.fakes import FakeChatModel
+
+    calls = []
+    failures = ["generate_cover_letter"]
+    generate = FakeChatModel._agenerate
+
+    async def flaky(self, messages, stop=None, run_manager=None, **kwargs):
+        node = (run_manager.metadata or {}).get("langgraph_node")
+        calls.append(node)
+        if node in failures:
+            failures.remove(node)
+            raise RuntimeError("API unavailable")
+        return await generate(self, messages, stop, run_manager, **kwargs)
+
+    monkeypatch.setattr(FakeChatModel, "_agenerate", flaky)
+    queue_path = str(tmp_path / "queue.sqlite")
+    queue = JobQueue(queue_path)
+    queue.enqueue(_jobs("a"))
+
+    async def fail_once():
+        worker = asyncio.create_task(run_worker(queue_path, str(tmp_path / "out"), context_mode="prefetch",
+                                                poll_interval=0.05, progress=lambda line: None))
+        while not queue.jobs()[0]["error"]:
+            await asyncio.sleep(0.05)
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+    asyncio.run(fail_once())
+    assert queue.jobs()[0]["status"] == "queued"
+    assert "analyze_keywords" in calls and "tailor_summary" in calls
+
+    # Visible again now instead of after the retry delay
+    queue._conn.execute("UPDATE jobs SET visible_at = 0")
+    calls.clear()
+    counts = asyncio.run(run_worker(queue_path, str(tmp_path / "out"), context_mode="prefetch",
+                                    poll_interval=0.05, progress=lambda line: None))
+
+    assert counts == {"done": 1, "duplicate": 0, "failed": 0}
+    assert queue.jobs()[0]["attempts"] == 2
+    # Only the failed node calls the model again
+    assert calls == ["generate_cover_letter"]
+    assert queue.jobs("done")[0]["result"]["output_files"]["text_file"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
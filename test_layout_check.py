@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test the ReportLab one-page measurement of the tailored CV.
+Runs offline - no API key needed.
+"""
+from io import BytesIO
+from langchain_core.messages import AIMessage
+from pypdf import PdfReader
+
+from pdf_operations import _cv_document, build_cv_story, measure_cv_layout
+
+TITLE = "Senior Backend Engineer | Distributed Systems"
+SUMMARY = "Backend engineer with eight years of experience building data platforms. " * 4
+SKILLS = "Python, Go, SQL, AWS, Kubernetes, Kafka, PostgreSQL, Terraform\n" * 3
+
+
+def _experience(bullets: int) -> str:
+    return "\n".join(f"• Built event pipelines processing millions of records per day ({i})"
+                     for i in range(bullets))
+
+
+def _pdf_pages(*sections) -> int:
+    buffer = BytesIO()
+    _cv_document(buffer).build(build_cv_story(*sections))
+    return len(PdfReader(BytesIO(buffer.getvalue())).pages)
+
+
+def test_short_cv_fits():
+    layout = measure_cv_layout(TITLE, SUMMARY, SKILLS, _experience(10))
+
+    assert layout["fits"]
+    assert layout["overflow"] == 0
+    assert layout["overflowing"] == []
+    assert [section["key"] for section in layout["sections"]] == [
+        "tailored_name_desc", "tailored_summary", "tailored_skills", "tailored_experience"
+    ]
+
+
+def test_long_experience_overflows_only_experience():
+    layout = measure_cv_layout(TITLE, SUMMARY, SKILLS, _experience(60))
+
+    assert not layout["fits"]
+    assert layout["overflow"] > 0
+    assert layout["overflowing"] == ["tailored_experience"]
+
+
+def test_long_summary_pushes_later_sections_off_the_page():
+    layout = measure_cv_layout(TITLE, SUMMARY * 30, SKILLS, _experience(5))
+
+    assert layout["overflowing"] == ["tailored_summary", "tailored_skills", "tailored_experience"]
+
+
+def test_measurement_matches_generated_pdf():
+    # Sweep across the page boundary: the measurement must agree with the real PDF
+    for bullets in range(30, 50, 2):
+        sections = (TITLE, SUMMARY, SKILLS, _experience(bullets))
+        layout = measure_cv_layout(*sections)
+        assert layout["fits"] == (_pdf_pages(*sections) == 1), bullets
+
+
+def test_unmeasurable_condensed_cv_is_kept_unmeasured(monkeypatch):
+    import main
+
+    class BrokenMarkupLLM:
+        def invoke(self, messages):
+            return AIMessage(content="a <b>bold")
+
+    monkeypatch.setattr(main, "get_llm", lambda node: BrokenMarkupLLM())
+    state = {"tailored_name_desc": TITLE, "tailored_summary": SUMMARY,
+             "tailored_skills": SKILLS, "tailored_experience": _experience(60)}
+
+    update = main.check_resume_length(state)
+    assert update["length_check_result"] == "UNMEASURED; condensed Experience Bullets"
+    assert update["tailored_experience"] == "a <b>bold"
+
+
+if __name__ == "__main__":
+    test_short_cv_fits()
+    test_long_experience_overflows_only_experience()
+    test_long_summary_pushes_later_sections_off_the_page()
+    test_measurement_matches_generated_pdf()
+    print("✓ All layout check tests passed")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test the persistent LLM response cache.
+Runs offline - no API key needed.
+"""
+import os
+import tempfile
+import time
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from llm_cache import PersistentLLMCache
+
+
+def _cache(**kwargs):
+    path = os.path.join(tempfile.mkdtemp(), "llm_cache.sqlite")
+    return PersistentLLMCache(path=path, **kwargs)
+
+
+def _generations(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def test_roundtrip_and_counters():
+    cache = _cache()
+
+    assert cache.lookup("prompt", "gpt-5") is None
+    cache.update("prompt", "gpt-5", _generations("answer"))
+    cached = cache.lookup("prompt", "gpt-5")
+
+    assert cached[0].message.content == "answer"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_key_includes_model_configuration():
+    cache = _cache()
+    cache.update("prompt", "model=gpt-5 temperature=0.4", _generations("a"))
+
+    assert cache.lookup("prompt", "model=gpt-5 temperature=0.4") is not None
+    assert cache.lookup("prompt", "model=gpt-5 temperature=0") is None
+    assert cache.lookup("other prompt", "model=gpt-5 temperature=0.4") is None
+
+
+def test_ttl_expiry():
+    cache = _cache(ttl_seconds=0.05)
+    cache.update("prompt", "llm", _generations("stale"))
+    time.sleep(0.1)
+
+    assert cache.lookup("prompt", "llm") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction():
+    cache = _cache(max_entries=2)
+    cache.update("first", "llm", _generations("1"))
+    time.sleep(0.01)
+    cache.update("second", "llm", _generations("2"))
+    time.sleep(0.01)
+    cache.lookup("first", "llm")  # "second" is now least recently used
+    time.sleep(0.01)
+    cache.update("third", "llm", _generations("3"))
+
+    assert cache.lookup("first", "llm") is not None
+    assert cache.lookup("second", "llm") is None
+    assert cache.lookup("third", "llm") is not None
+
+
+def test_persists_across_instances():
+    path = os.path.join(tempfile.mkdtemp(), "llm_cache.sqlite")
+    PersistentLLMCache(path=path).update("prompt", "llm", _generations("kept"))
+
+    assert PersistentLLMCache(path=path).lookup("prompt", "llm")[0].message.content == "kept"
+
+
+def test_chat_model_skips_call_on_hit():
+    cache = _cache()
+    # The fake model returns the next scripted message on every real call
+    llm = GenericFakeChatModel(messages=iter(["first call", "second call"]), cache=cache)
+
+    assert llm.invoke("same prompt").content == "first call"
+    assert llm.invoke("same prompt").content == "first call"
+    assert llm.invoke("new prompt").content == "second call"
+    assert cache.stats()["hits"] == 1
+
+
+if __name__ == "__main__":
+    test_roundtrip_and_counters()
+    test_key_includes_model_configuration()
+    test_ttl_expiry()
+    test_lru_eviction()
+    test_persists_across_instances()
+    test_chat_model_skips_call_on_hit()
+    print("✓ All LLM cache tests passed")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test per-node model routing.
+Runs offline - no API key needed.
+"""
+import json
+import os
+import tempfile
+import pytest
+
+import model_routing
+from model_routing import ROUTED_NODES, get_llm, get_route, load_routing, set_model_profile
+
+
+@pytest.fixture(autouse=True)
+def _reset_routing(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", os.getenv("OPENAI_API_KEY") or "sk-test")
+    monkeypatch.delenv("RESUME_AGENT_MODEL_PROFILE", raising=False)
+    monkeypatch.delenv("RESUME_AGENT_ROUTING_OVERRIDES", raising=False)
+    monkeypatch.setattr(model_routing, "_profile", None)
+
+
+def test_quality_profile_keeps_large_model():
+    set_model_profile("quality")
+
+    assert get_route("tailor_name_desc")["model"] == "gpt-5"
+    assert get_route("tailor_name_desc")["temperature"] == 0.4
+    assert get_route("extract_company") == {
+        "model": "gpt-4o-mini", "temperature": 0, "max_tokens": 50, "timeout": 30
+    }
+
+
+def test_fast_profile_routes_lightweight_nodes():
+    set_model_profile("fast")
+
+    assert get_route("tailor_name_desc")["model"] == "gpt-4o-mini"
+    assert get_route("tailor_name_desc")["max_tokens"] == 200
+    assert get_route("tailor_experience")["model"] == "gpt-5"
+    assert get_route("generate_cover_letter")["model"] == "gpt-5"
+
+
+def test_env_overrides(monkeypatch):
+    monkeypatch.setenv("RESUME_AGENT_MODEL_PROFILE", "fast")
+    monkeypatch.setenv("RESUME_AGENT_ROUTING_OVERRIDES",
+                       json.dumps({"default": {"timeout": 10}, "tailor_skills": {"model": "gpt-5"}}))
+
+    assert get_route("tailor_skills")["model"] == "gpt-5"
+    assert get_route("tailor_summary")["timeout"] == 10
+
+
+def test_clients_are_shared_per_settings():
+    set_model_profile("quality")
+
+    assert get_llm("tailor_summary") is get_llm("tailor_skills")
+    assert get_llm("extract_company") is not get_llm("tailor_summary")
+    assert get_llm("extract_company").model_name == "gpt-4o-mini"
+
+
+def test_company_extraction_uses_its_route():
+    from langchain_core.messages import AIMessage
+    from web_operations import extract_company_name_with_llm, sanitize_filename
+
+    class Stub:
+        def invoke(self, prompt):
+            return AIMessage(content="Acme Analytics")
+
+    routes = []
+    set_model_profile("quality")
+    model_routing.set_chat_model_factory(lambda settings: routes.append(settings) or Stub())
+    try:
+        assert extract_company_name_with_llm("Acme Analytics is hiring") == sanitize_filename("Acme Analytics")
+    finally:
+        model_routing.set_chat_model_factory(None)
+    assert routes[0]["model"] == "gpt-4o-mini"
+
+
+def test_invalid_configuration_is_rejected():
+    with pytest.raises(ValueError):
+        set_model_profile("cheapest")
+    with pytest.raises(ValueError):
+        get_route("not_a_node")
+
+    path = os.path.join(tempfile.mkdtemp(), "routing.json")
+    with open(path, "w") as f:
+        json.dump({"default_profile": "p", "profiles": {
+            "p": {"default": {"model": "gpt-5", "temprature": 0.2}}
+        }}, f)
+    with pytest.raises(ValueError):
+        load_routing(path)
+
+
+def test_every_node_resolves_a_model():
+    for profile in model_routing.get_model_profiles():
+        set_model_profile(profile)
+        for node in ROUTED_NODES:
+            assert get_route(node)["model"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test that prompts share one cacheable prefix and that cached tokens are counted.
+Runs offline - no API key needed.
+"""
+import uuid
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from prompts import (
+    get_cover_letter_messages,
+    get_interest_answer_messages,
+    get_keywords_analysis_messages,
+    get_tailor_experience_messages,
+    get_tailor_name_desc_messages,
+    get_tailor_skills_messages,
+    get_tailor_summary_messages
+)
+from usage_tracking import TokenUsageHandler
+
+JOB_DESCRIPTION = "Senior Data Engineer at Acme.\nRequirements:\n- Python\n- Spark"
+KEYWORDS = "Python, Spark, data pipelines"
+CV_CONTEXT = "CV: built Spark pipelines in Python"
+
+
+def _all_step_messages(cv_context=None, guide_context=None, context_mode=None):
+    tailor = [builder(JOB_DESCRIPTION, KEYWORDS, cv_context=cv_context, context_mode=context_mode)
+              for builder in (get_tailor_summary_messages, get_tailor_skills_messages,
+                              get_tailor_experience_messages, get_tailor_name_desc_messages)]
+    others = [
+        get_keywords_analysis_messages(JOB_DESCRIPTION, cv_context=cv_context, context_mode=context_mode),
+        get_cover_letter_messages(JOB_DESCRIPTION, "Acme", "summary", "skills", "experience",
+                                  cv_context=cv_context, guide_context=guide_context,
+                                  context_mode=context_mode),
+        get_interest_answer_messages(JOB_DESCRIPTION, "Acme", cv_context=cv_context,
+                                     context_mode=context_mode),
+    ]
+    return tailor, others
+
+
+@pytest.mark.parametrize("cv_context", [None, CV_CONTEXT])
+def test_every_step_starts_with_the_same_block(cv_context):
+    tailor, others = _all_step_messages(cv_context, guide_context="guide")
+    first = tailor[0][0]
+
+    for messages in tailor + others:
+        assert messages[0] == first
+        # Step instructions come last
+        assert messages[-1]["role"] == "user"
+    assert JOB_DESCRIPTION in first["content"]
+    assert (CV_CONTEXT in first["content"]) == bool(cv_context)
+
+
+def test_tailor_steps_share_the_keywords_block():
+    tailor, _ = _all_step_messages(CV_CONTEXT)
+
+    for messages in tailor:
+        assert messages[:2] == tailor[0][:2]
+        assert KEYWORDS in messages[1]["content"]
+    # Variable content stays out of the instructions
+    for messages in tailor:
+        assert JOB_DESCRIPTION not in messages[-1]["content"]
+        assert KEYWORDS not in messages[-1]["content"]
+
+
+@pytest.mark.parametrize("cv_context", [None, CV_CONTEXT])
+def test_instructions_follow_the_context_mode(cv_context):
+    def instructions(context_mode):
+        tailor, others = _all_step_messages(cv_context, guide_context="guide", context_mode=context_mode)
+        return [messages[-1]["content"] for messages in tailor + others]
+
+    # Tool calls are only asked for when the tools are bound
+    for content in instructions("tools"):
+        assert "retrieve_cv_content tool" in content or "retrieve_cover_letter_guide tool" in content
+    for content in instructions("prefetch"):
+        assert "retrieve_" not in content
+        assert "provided above" in content
+
+
+def test_context_mode_defaults_to_prefetch_when_context_is_inlined():
+    tools, _ = _all_step_messages()
+    prefetch, _ = _all_step_messages(CV_CONTEXT)
+    assert "retrieve_cv_content" in tools[0][-1]["content"]
+    assert "retrieve_cv_content" not in prefetch[0][-1]["content"]
+
+
+def _result(usage: dict) -> LLMResult:
+    message = AIMessage(content="ok", usage_metadata=usage)
+    return LLMResult(generations=[[ChatGeneration(message=message)]])
+
+
+def test_usage_handler_counts_cached_tokens_per_node():
+    handler = TokenUsageHandler()
+    for node, cached in [("tailor_summary", 0), ("tailor_skills", 1024)]:
+        run_id = uuid.uuid4()
+        handler.on_chat_model_start({}, [], run_id=run_id, metadata={"langgraph_node": node})
+        handler.on_llm_end(_result({
+            "input_tokens": 1500, "output_tokens": 100, "total_tokens": 1600,
+            "input_token_details": {"cache_read": cached}
+        }), run_id=run_id)
+
+    # A response replayed from the local LLM cache is not counted again
+    run_id = uuid.uuid4()
+    handler.on_chat_model_start({}, [], run_id=run_id)
+    handler.on_llm_end(_result({"input_tokens": 1500, "output_tokens": 100,
+                                "total_tokens": 1600, "total_cost": 0}), run_id=run_id)
+
+    summary = handler.summary()
+    assert summary["calls"] == 2
+    assert summary["input_tokens"] == 3000
+    assert summary["cached_input_tokens"] == 1024
+    assert summary["local_cache_hits"] == 1
+    assert summary["nodes"]["tailor_skills"]["cached_input_tokens"] == 1024
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test incremental re-indexing of the source PDFs on fake embeddings.
+Runs offline - no API key needed.
+"""
+import json
+import os
+
+import pytest
+from pydantic import Field
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+import rag_setup
+from benchmarks.fakes import FakeEmbeddings
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    """Fake embeddings that record every embedded text."""
+
+    embedded: list = Field(default_factory=list)
+
+    def embed_documents(self, texts: list) -> list:
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+def write_pdf(path, pages):
+    """One line of text per page, so every page is its own chunk."""
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    for text in pages:
+        pdf.drawString(72, 760, text)
+        pdf.showPage()
+    pdf.save()
+
+
+CV_PAGES = [f"Experience {i}: built data pipeline number {i} with Python and Spark" for i in range(4)]
+GUIDE_PAGES = [f"Guide {i}: open with why this company, paragraph advice {i}" for i in range(3)]
+
+
+@pytest.fixture
+def index(tmp_path):
+    saved = (rag_setup._embeddings, rag_setup.PERSIST_DIRECTORY,
+             rag_setup.CV_PATH, rag_setup.COVER_LETTER_GUIDE_PATH)
+    rag_setup.CV_PATH = str(tmp_path / "CV.pdf")
+    rag_setup.COVER_LETTER_GUIDE_PATH = str(tmp_path / "guide.pdf")
+    write_pdf(rag_setup.CV_PATH, CV_PAGES)
+    write_pdf(rag_setup.COVER_LETTER_GUIDE_PATH, GUIDE_PAGES)
+    persist_directory = str(tmp_path / "chroma")
+
+    def reopen(size=64):
+        """Open the store as a new process would."""
+        embeddings = CountingEmbeddings(size=size)
+        rag_setup.use_embeddings(embeddings, persist_directory)
+        return rag_setup.get_vectorstore(), embeddings
+
+    yield reopen
+
+    embeddings, persist_directory, rag_setup.CV_PATH, rag_setup.COVER_LETTER_GUIDE_PATH = saved
+    rag_setup.use_embeddings(embeddings, persist_directory)
+
+
+def stored(vectorstore):
+    result = vectorstore.get(include=["documents"])
+    return dict(zip(result["ids"], result["documents"]))
+
+
+def test_unchanged_sources_are_not_reembedded(index, monkeypatch):
+    vectorstore, embeddings = index()
+    assert len(embeddings.embedded) == len(CV_PAGES) + len(GUIDE_PAGES)
+    assert len(stored(vectorstore)) == len(CV_PAGES) + len(GUIDE_PAGES)
+
+    # Unchanged files aren't even parsed
+    monkeypatch.setattr(rag_setup, "_load_chunks", lambda *args: pytest.fail("PDF reloaded"))
+    vectorstore, embeddings = index()
+    assert embeddings.embedded == []
+    assert len(stored(vectorstore)) == len(CV_PAGES) + len(GUIDE_PAGES)
+
+
+def test_changed_source_embeds_only_changed_chunks(index):
+    vectorstore, _ = index()
+    before = stored(vectorstore)
+
+    pages = CV_PAGES[:1] + ["Experience 1: led the migration to streaming with Kafka"] + CV_PAGES[2:3]
+    write_pdf(rag_setup.CV_PATH, pages)
+    vectorstore, embeddings = index()
+
+    assert [text.strip() for text in embeddings.embedded] == [pages[1]]
+    after = stored(vectorstore)
+    assert sorted(text.strip() for text in after.values()) == sorted(pages + GUIDE_PAGES)
+    # Unchanged chunks keep their IDs (and vectors)
+    assert len(set(before) & set(after)) == len(pages) - 1 + len(GUIDE_PAGES)
+
+    manifest = rag_setup.load_manifest()
+    assert set(after) == {id_ for entry in manifest["sources"].values() for id_ in entry["chunks"]}
+
+    # The retriever filters still see the new text
+    docs = vectorstore.similarity_search(pages[1], k=1, filter={"source_type": "cv"})
+    assert docs[0].page_content.strip() == pages[1]
+
+
+def test_new_embedding_model_reembeds_everything(index):
+    index(size=64)
+    vectorstore, embeddings = index(size=32)
+    assert len(embeddings.embedded) == len(CV_PAGES) + len(GUIDE_PAGES)
+    assert len(stored(vectorstore)) == len(CV_PAGES) + len(GUIDE_PAGES)
+    assert rag_setup.load_manifest()["embedding_model"] == "CountingEmbeddings:32"
+
+
+def test_store_without_manifest_is_migrated(index):
+    vectorstore, _ = index()
+    # A store built before the manifest existed: random IDs, no manifest
+    old = vectorstore.get(include=["documents", "metadatas"])
+    vectorstore.delete(ids=old["ids"])
+    legacy_ids = vectorstore.add_texts(old["documents"], metadatas=old["metadatas"])
+    os.remove(os.path.join(rag_setup.PERSIST_DIRECTORY, rag_setup.MANIFEST_FILE))
+
+    vectorstore, embeddings = index()
+    assert len(embeddings.embedded) == len(CV_PAGES) + len(GUIDE_PAGES)
+    ids = set(stored(vectorstore))
+    assert ids.isdisjoint(legacy_ids) and len(ids) == len(CV_PAGES) + len(GUIDE_PAGES)
+    with open(os.path.join(rag_setup.PERSIST_DIRECTORY, rag_setup.MANIFEST_FILE)) as f:
+        assert len(json.load(f)["sources"]) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test the shared OpenAI rate limiter.
+Runs offline - no API key needed (the chat model test uses a mock HTTP transport).
+"""
+import threading
+import time
+import httpx
+import openai
+
+from rate_limiter import (
+    AdaptiveConcurrency,
+    ModelRateLimiter,
+    RateLimitedChatOpenAI,
+    TokenBucket,
+    get_rate_limiter
+)
+
+
+def _rate_limit_error(retry_after="0", code=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response,
+                                 body={"code": code} if code else None)
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(per_minute=600)  # 10 per second
+    now = bucket.updated
+
+    assert bucket.wait_time(600, now) == 0
+    bucket.consume(600)
+    assert abs(bucket.wait_time(50, now) - 5.0) < 1e-6
+    assert bucket.wait_time(50, now + 5.0) == 0
+    # Refunds cannot overfill the bucket
+    bucket.adjust(-10_000)
+    assert bucket.level == bucket.capacity
+
+
+def test_aimd_concurrency():
+    concurrency = AdaptiveConcurrency(initial=8, maximum=10)
+
+    concurrency.on_throttle()
+    assert concurrency.allowed == 4
+    # About one extra slot per `limit` successes
+    for _ in range(5):
+        concurrency.on_success()
+    assert concurrency.allowed == 5
+    for _ in range(100):
+        concurrency.on_success()
+    assert concurrency.allowed == 10
+    for _ in range(10):
+        concurrency.on_throttle()
+    assert concurrency.allowed == 1
+
+
+def test_retries_429_and_halves_concurrency():
+    limiter = ModelRateLimiter("test", 1000, 1_000_000, max_concurrency=8, initial_concurrency=8)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _rate_limit_error()
+        return "ok"
+
+    assert limiter.call(flaky, estimated_tokens=100) == "ok"
+    stats = limiter.stats()
+    assert (stats["throttled"], stats["retries"], stats["in_flight"]) == (2, 2, 0)
+    assert limiter.concurrency.allowed == 2
+
+
+def test_failed_calls_refund_their_estimated_tokens():
+    limiter = ModelRateLimiter("test", 1000, 6000, max_concurrency=8, initial_concurrency=8)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 4:
+            raise _rate_limit_error()
+        return "ok"
+
+    assert limiter.call(flaky, estimated_tokens=2000, count_tokens=lambda result: 500) == "ok"
+    # Only the successful call is charged, at its reported usage
+    assert 5400 < limiter.tokens.level < 5600
+
+    limiter.acquire(2000)
+    limiter.release(2000, outcome="error")
+    assert limiter.tokens.level > 5400
+
+
+def test_exhausted_quota_is_not_retried():
+    limiter = ModelRateLimiter("test", 1000, 1_000_000)
+    attempts = []
+
+    def no_quota():
+        attempts.append(1)
+        raise _rate_limit_error(code="insufficient_quota")
+
+    try:
+        limiter.call(no_quota, estimated_tokens=100)
+        assert False, "expected RateLimitError"
+    except openai.RateLimitError:
+        pass
+    assert len(attempts) == 1
+
+
+def test_concurrency_cap_is_respected():
+    limiter = ModelRateLimiter("test", 10_000, 10_000_000, max_concurrency=3, initial_concurrency=3)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+
+    threads = [threading.Thread(target=limiter.call, args=(work, 10)) for _ in range(9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) <= 3
+    assert limiter.stats()["calls"] == 9
+
+
+def test_chat_model_retries_through_limiter():
+    responses = [
+        httpx.Response(429, headers={"retry-after": "0"}, json={"error": {"message": "slow down"}}),
+        httpx.Response(200, json={
+            "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "limiter-test",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "hello"}}],
+            "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6}
+        }),
+    ]
+    transport = httpx.MockTransport(lambda request: responses.pop(0))
+    llm = RateLimitedChatOpenAI(model="limiter-test", api_key="test",
+                                http_client=httpx.Client(transport=transport))
+
+    assert llm.invoke("hi").content == "hello"
+    stats = get_rate_limiter("limiter-test").stats()
+    assert (stats["throttled"], stats["calls"], stats["actual_tokens"]) == (1, 2, 6)
+
+
+if __name__ == "__main__":
+    test_token_bucket_wait_time()
+    test_aimd_concurrency()
+    test_retries_429_and_halves_concurrency()
+    test_exhausted_quota_is_not_retried()
+    test_concurrency_cap_is_respected()
+    test_chat_model_retries_through_limiter()
+    print("✓ All rate limiter tests passed")
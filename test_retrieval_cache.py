@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test the retriever tools' query embedding and result caches on fake embeddings.
+Runs offline - no API key needed.
+"""
+import asyncio
+
+import pytest
+from pydantic import Field
+
+import rag_setup
+from benchmarks.fakes import FakeEmbeddings
+from retrieval_cache import LRUCache, clear_retrieval_cache, normalize_query, retrieval_cache_stats
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    """Fake embeddings that count embedding requests."""
+
+    queries: list = Field(default_factory=list)
+
+    def embed_documents(self, texts: list) -> list:
+        self.queries.extend(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> list:
+        self.queries.append(text)
+        return super().embed_query(text)
+
+    async def aembed_documents(self, texts: list) -> list:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list:
+        await asyncio.sleep(0.01)
+        return self.embed_query(text)
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    saved = rag_setup._embeddings, rag_setup.PERSIST_DIRECTORY
+    rag_setup.use_embeddings(CountingEmbeddings(size=32), str(tmp_path_factory.mktemp("chroma")))
+    rag_setup.get_vectorstore()
+    yield
+    rag_setup.use_embeddings(*saved)
+
+
+@pytest.fixture
+def embeddings(store):
+    clear_retrieval_cache()
+    model = rag_setup.get_embeddings()
+    model.queries.clear()
+    return model
+
+
+def test_normalize_query():
+    assert normalize_query("  Professional   Summary? ") == "professional summary"
+    assert normalize_query("C++ and C#") == "c++ and c#"
+
+
+def test_repeated_queries_are_served_from_memory(embeddings):
+    cv_tool, guide_tool = rag_setup.get_retriever_tools()
+
+    first = cv_tool.invoke({"query": "Professional summary"})
+    assert cv_tool.invoke({"query": "professional  summary."}) == first
+    assert asyncio.run(cv_tool.ainvoke({"query": "PROFESSIONAL SUMMARY"})) == first
+    assert embeddings.queries == ["Professional summary"]
+
+    # Same query for the guide: new search, but the embedding is reused
+    guide_tool.invoke({"query": "professional summary"})
+    assert embeddings.queries == ["Professional summary"]
+
+    stats = retrieval_cache_stats()
+    assert stats["tool_results"]["hits"] == 2 and stats["tool_results"]["misses"] == 2
+    assert stats["query_embeddings"]["hits"] == 1 and stats["query_embeddings"]["misses"] == 1
+
+
+def test_concurrent_lookups_share_one_embedding(embeddings):
+    cv_tool, _ = rag_setup.get_retriever_tools()
+
+    async def parallel_nodes():
+        return await asyncio.gather(*(cv_tool.ainvoke({"query": "experience and skills"}) for _ in range(4)))
+
+    results = asyncio.run(parallel_nodes())
+    assert len(set(results)) == 1
+    assert embeddings.queries == ["experience and skills"]
+    assert retrieval_cache_stats()["tool_results"]["hit_rate"] == 0.75
+
+
+def test_prefetch_embeds_only_new_queries(embeddings):
+    first = rag_setup.retrieve_context(["Python", "Spark"], rag_setup.CV_SEARCH_KWARGS, "CV Section")
+    again = asyncio.run(rag_setup.aretrieve_context(["python", "Spark", "AWS"],
+                                                     rag_setup.CV_SEARCH_KWARGS, "CV Section"))
+    # Only the first spelling of each normalized query is embedded, as written
+    assert embeddings.queries == ["Python", "Spark", "AWS"]
+    assert first and again
+
+
+def test_results_follow_the_index_version(embeddings, monkeypatch):
+    cv_tool, _ = rag_setup.get_retriever_tools()
+    cv_tool.invoke({"query": "education"})
+    monkeypatch.setattr(rag_setup, "_index_version", "re-synced")
+    cv_tool.invoke({"query": "education"})
+    assert retrieval_cache_stats()["tool_results"]["misses"] == 2
+    # The query embedding doesn't depend on the index
+    assert embeddings.queries == ["education"]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"hits": 3, "misses": 1, "hit_rate": 0.75, "entries": 2}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
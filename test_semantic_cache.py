@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test the semantic cache of past runs with deterministic fake embeddings.
+Runs offline - no API key needed.
+"""
+import os
+import sqlite3
+import tempfile
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from semantic_cache import SemanticRunCache, reusable_outputs
+
+JOB_DESCRIPTION = "Senior Python Developer\nTechCorp Solutions\nBuild scalable services."
+
+OUTPUTS = {
+    "keywords_analysis": "Python, Django",
+    "tailored_summary": "summary",
+    "tailored_skills": "skills",
+    "tailored_experience": "experience",
+    "tailored_name_desc": "title",
+    "length_check_result": "OK",
+    "cover_letter": "Dear TechCorp",
+    "interest_answer": "Because TechCorp",
+    "job_description": JOB_DESCRIPTION,
+}
+
+
+VERSIONS = {"index_version": "index-1", "prompt_version": "prompts-1", "model_profile": "quality"}
+
+
+def _cache(threshold=0.97, versions=None, path=None):
+    path = path or os.path.join(tempfile.mkdtemp(), "semantic_cache.sqlite")
+    versions = versions or dict(VERSIONS)
+    return SemanticRunCache(embeddings=DeterministicFakeEmbedding(size=64), path=path, threshold=threshold,
+                            versions=lambda context_mode: {**versions, "context_mode": context_mode or "tools"})
+
+
+def test_identical_posting_is_reused():
+    cache = _cache()
+    cache.store(JOB_DESCRIPTION, "TechCorp Solutions", OUTPUTS)
+
+    match, similarity = cache.search(cache.embed(JOB_DESCRIPTION))
+
+    assert match is not None
+    assert similarity > 0.99
+    assert match["outputs"]["tailored_summary"] == "summary"
+    # Only output keys are stored, not the rest of the state
+    assert "job_description" not in match["outputs"]
+
+
+def test_different_posting_is_not_reused():
+    cache = _cache()
+    cache.store(JOB_DESCRIPTION, "TechCorp Solutions", OUTPUTS)
+
+    match, _ = cache.search(cache.embed("Data Engineer at OtherCo, Spark and Airflow."))
+
+    assert match is None
+
+
+def test_company_specific_outputs_need_same_company():
+    cache = _cache()
+    cache.store(JOB_DESCRIPTION, "TechCorp Solutions", OUTPUTS)
+    match, _ = cache.search(cache.embed(JOB_DESCRIPTION))
+
+    same_company = reusable_outputs(match, "techcorp solutions")
+    other_company = reusable_outputs(match, "Recruiting Agency")
+
+    assert same_company["cover_letter"] == "Dear TechCorp"
+    assert "cover_letter" not in other_company
+    assert "interest_answer" not in other_company
+    assert other_company["tailored_experience"] == "experience"
+
+
+def test_empty_cache_has_no_match():
+    cache = _cache()
+    assert cache.search(cache.embed(JOB_DESCRIPTION)) == (None, 0.0)
+
+
+def test_runs_are_only_matched_under_the_same_versions():
+    versions = dict(VERSIONS)
+    cache = _cache(versions=versions)
+    cache.store(JOB_DESCRIPTION, "TechCorp Solutions", OUTPUTS)
+    embedding = cache.embed(JOB_DESCRIPTION)
+
+    # A re-indexed CV, an edited prompt or another routing profile invalidates the run
+    for key, value in [("index_version", "index-2"), ("prompt_version", "prompts-2"),
+                       ("model_profile", "budget")]:
+        versions[key] = value
+        assert cache.search(embedding)[0] is None, key
+        versions[key] = VERSIONS[key]
+    assert cache.search(embedding)[0] is not None
+
+    # Runs stored under the new versions are matched again
+    versions["prompt_version"] = "prompts-2"
+    cache.store(JOB_DESCRIPTION, "TechCorp Solutions", {**OUTPUTS, "tailored_summary": "new summary"})
+    assert cache.search(embedding)[0]["outputs"]["tailored_summary"] == "new summary"
+
+
+def test_runs_are_only_matched_in_the_same_context_mode():
+    cache = _cache()
+    cache.store(JOB_DESCRIPTION, "TechCorp Solutions", OUTPUTS, context_mode="prefetch")
+    embedding = cache.embed(JOB_DESCRIPTION)
+
+    # A tools-mode run must not read sections written with prefetched context
+    assert cache.search(embedding, "tools")[0] is None
+    assert cache.search(embedding)[0] is None
+    assert cache.search(embedding, "prefetch")[0] is not None
+
+
+def test_given_embedding_is_stored_without_embedding_again():
+    cache = _cache()
+    embedding = cache.embed(JOB_DESCRIPTION)
+    cache._embeddings = None  # Would resolve the OpenAI model if used
+    cache.store(JOB_DESCRIPTION, "TechCorp Solutions", OUTPUTS, embedding=embedding.tolist())
+
+    assert cache.search(embedding)[0] is not None
+
+
+def test_unversioned_cache_is_migrated():
+    path = os.path.join(tempfile.mkdtemp(), "semantic_cache.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE runs (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, "
+                 "job_description_hash TEXT NOT NULL, company_name TEXT, embedding BLOB NOT NULL, "
+                 "outputs TEXT NOT NULL)")
+    conn.execute("INSERT INTO runs (created_at, job_description_hash, company_name, embedding, outputs) "
+                 "VALUES (0, '', 'TechCorp Solutions', ?, '{}')",
+                 (_cache().embed(JOB_DESCRIPTION).tobytes(),))
+    conn.commit()
+    conn.close()
+
+    cache = _cache(path=path)
+    # Runs from before versioning don't say what they were produced with
+    assert cache.search(cache.embed(JOB_DESCRIPTION))[0] is None
+    cache.store(JOB_DESCRIPTION, "TechCorp Solutions", OUTPUTS)
+    assert cache.search(cache.embed(JOB_DESCRIPTION))[0] is not None
+
+
+if __name__ == "__main__":
+    test_identical_posting_is_reused()
+    test_different_posting_is_not_reused()
+    test_company_specific_outputs_need_same_company()
+    test_empty_cache_has_no_match()
+    test_runs_are_only_matched_under_the_same_versions()
+    test_runs_are_only_matched_in_the_same_context_mode()
+    test_given_embedding_is_stored_without_embedding_again()
+    test_unversioned_cache_is_migrated()
+    print("✓ All semantic cache tests passed")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test the HTTP service mode end to end on the fake chat model.
+Runs offline - no API key needed.
+"""
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import pytest
+
+from benchmarks.fakes import FAKE_COMPANY
+
+JOB_DESCRIPTION = "Senior Data Engineer\nRequirements:\n- Python\n- Spark\n- AWS\n" * 3
+
+
+@pytest.fixture
+def base_url(agent_main, tmp_path):
+    from server import JobServer, create_server
+
+    job_server = JobServer(str(tmp_path), workers=2, queue_size=2, progress=lambda line: None)
+    job_server.start()
+    httpd = create_server(job_server, port=0)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", job_server
+    httpd.shutdown()
+    httpd.server_close()
+    job_server.stop()
+
+
+def _request(url, payload=None):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, response.read(), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, e.read(), e.headers
+
+
+def _wait_for(url, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status, body, _ = _request(f"{url}/jobs/{job_id}")
+        job = json.loads(body)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.1)
+    raise TimeoutError(job_id)
+
+
+def test_job_runs_and_artifacts_download(base_url):
+    url, _ = base_url
+    status, body, headers = _request(f"{url}/jobs", {"job_description": JOB_DESCRIPTION,
+                                                     "context_mode": "prefetch"})
+    assert status == 202
+    job_id = json.loads(body)["id"]
+    assert headers["Location"] == f"/jobs/{job_id}"
+
+    job = _wait_for(url, job_id)
+    assert job["status"] == "done", job.get("error")
+    assert job["company_name"] == FAKE_COMPANY
+
+    status, body, _ = _request(f"{url}/jobs/{job_id}/result")
+    result = json.loads(body)
+    assert status == 200 and result["text"]
+
+    for name in result["artifacts"]:
+        status, body, headers = _request(f"{url}/jobs/{job_id}/artifacts/{urllib.parse.quote(name)}")
+        assert status == 200 and body
+    assert _request(f"{url}/jobs/{job_id}/artifacts/..%2Fsecrets.txt")[0] == 404
+
+    status, body, _ = _request(f"{url}/metrics")
+    metrics = body.decode("utf-8")
+    assert "resume_agent_runs_total 1" in metrics
+    assert 'resume_agent_server_jobs{status="done"} 1' in metrics
+    assert 'resume_agent_retrieval_cache_hits_total{cache="query_embeddings"}' in metrics
+
+
+def test_invalid_and_unknown_requests(base_url):
+    url, _ = base_url
+    assert _request(f"{url}/jobs", {"company_name": "Acme"})[0] == 400
+    assert _request(f"{url}/jobs", {"url": "ftp://example.com"})[0] == 400
+    assert _request(f"{url}/jobs/does-not-exist")[0] == 404
+    status, body, _ = _request(f"{url}/healthz")
+    assert status == 200 and json.loads(body)["workers"] == 2
+
+
+def test_full_queue_is_rejected(base_url):
+    import model_routing
+
+    url, job_server = base_url
+    chat_model = model_routing.get_llm("analyze_keywords")
+    chat_model.latency = 0.5
+    try:
+        statuses = [_request(f"{url}/jobs", {"job_description": JOB_DESCRIPTION,
+                                             "context_mode": "prefetch"})[0] for _ in range(8)]
+        # 2 running + 2 waiting fit; the rest are turned away
+        assert statuses.count(202) <= 5
+        assert 503 in statuses
+        running = next(job for job in job_server.list_jobs() if job["status"] in ("queued", "running"))
+        assert _request(f"{url}/jobs/{running['id']}/result")[0] == 409
+    finally:
+        chat_model.latency = 0.0
+
+
+def test_finished_jobs_are_evicted_but_still_counted(agent_main, tmp_path):
+    from server import JobServer
+
+    job_server = JobServer(str(tmp_path), workers=1, queue_size=4, max_finished_jobs=2,
+                           progress=lambda line: None)
+    job_server.start()
+    try:
+        job_ids = [job_server.submit({"job_description": f"{JOB_DESCRIPTION}\n{i}",
+                                      "context_mode": "prefetch"})["id"] for i in range(4)]
+        deadline = time.time() + 60
+        while job_server.stats()["queued"] + job_server.stats()["running"]:
+            assert time.time() < deadline
+            time.sleep(0.1)
+    finally:
+        job_server.stop()
+
+    # Only the newest finished jobs are kept; the metrics still count every run
+    assert [job["id"] for job in job_server.list_jobs()] == job_ids[:1:-1]
+    assert job_server.describe(job_ids[0]) is None and job_server.result(job_ids[0]) is None
+    assert "resume_agent_runs_total 4" in job_server.metrics()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
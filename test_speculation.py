@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test speculative company extraction and keyword analysis on the fake chat model.
+Runs offline - no API key needed.
+"""
+import asyncio
+import pytest
+
+from benchmarks.fakes import DEFAULT_RESPONSES, FAKE_COMPANY
+
+JOB_DESCRIPTION = "Senior Data Engineer\nRequirements:\n- Python\n- Spark\n- AWS\n" * 3
+
+
+@pytest.mark.parametrize("context_mode", ["tools", "prefetch"])
+def test_adopted_results_skip_graph_work(agent_main, context_mode, tmp_path):
+    from speculation import SpeculativeRun
+    from telemetry import RunTelemetry
+
+    speculative_telemetry = RunTelemetry()
+    speculation = SpeculativeRun(JOB_DESCRIPTION, context_mode=context_mode,
+                                 callbacks=[speculative_telemetry]).start()
+    state = agent_main.create_initial_state(JOB_DESCRIPTION, context_mode=context_mode,
+                                            output_dir=str(tmp_path))
+    speculation.adopt(state)
+
+    assert state["company_name"] == FAKE_COMPANY
+    assert state["keywords_analysis"] == DEFAULT_RESPONSES["analyze_keywords"]
+    assert speculative_telemetry.report()["nodes"]["analyze_keywords"]["llm_calls"] >= 1
+
+    telemetry = RunTelemetry()
+    final_state = agent_main.resume_agent.invoke(state, config={"callbacks": [telemetry]})
+
+    nodes = telemetry.report()["nodes"]
+    assert nodes["analyze_keywords"].get("llm_calls", 0) == 0
+    assert nodes["get_job_description"].get("llm_calls", 0) == 0
+    assert final_state["keywords_analysis"] == DEFAULT_RESPONSES["analyze_keywords"]
+    assert final_state["output_files"]
+
+
+def test_company_is_extracted_from_the_same_text_as_the_graph(agent_main, tmp_path, monkeypatch):
+    import web_operations
+    from speculation import SpeculativeRun
+
+    job_description = "Apply now\nShare this job\n\n" + JOB_DESCRIPTION
+    texts = []
+
+    async def extract(text, url=None):
+        texts.append(text)
+        return FAKE_COMPANY
+
+    monkeypatch.setattr(web_operations, "aextract_company_name_from_text", extract)
+    monkeypatch.setattr(agent_main, "aextract_company_name_from_text", extract)
+    state = agent_main.create_initial_state(job_description, context_mode="prefetch",
+                                            output_dir=str(tmp_path))
+    SpeculativeRun(job_description, context_mode="prefetch").start().adopt(dict(state))
+    asyncio.run(agent_main.resume_agent.ainvoke(state))
+
+    speculative, graph = texts
+    assert speculative == graph
+    assert "Share this job" not in speculative
+
+
+def test_company_entered_by_user_is_kept(agent_main):
+    from speculation import SpeculativeRun
+
+    speculation = SpeculativeRun(JOB_DESCRIPTION, context_mode="prefetch").start()
+    state = agent_main.create_initial_state(JOB_DESCRIPTION, company_name="Globex",
+                                            context_mode="prefetch")
+    speculation.adopt(state)
+
+    assert state["company_name"] == "Globex"
+    assert state["keywords_analysis"]
+
+
+def test_cancel_discards_results(agent_main):
+    import model_routing
+    from speculation import SpeculativeRun
+
+    chat_model = model_routing.get_llm("analyze_keywords")
+    chat_model.latency = 5.0
+    try:
+        speculation = SpeculativeRun(JOB_DESCRIPTION, context_mode="prefetch").start()
+        speculation.cancel()
+        state = agent_main.create_initial_state(JOB_DESCRIPTION, context_mode="prefetch")
+        speculation._thread.join(timeout=2)
+
+        assert not speculation._thread.is_alive()
+        assert speculation.adopt(state)["keywords_analysis"] is None
+        assert state["company_name"] is None
+    finally:
+        chat_model.latency = 0.0
+
+
+def test_background_output_is_held_until_adopted(agent_main, capsys):
+    from speculation import SpeculativeRun
+
+    speculation = SpeculativeRun(JOB_DESCRIPTION, context_mode="prefetch").start()
+    speculation.result()
+    assert "Analyzing Keywords" not in capsys.readouterr().out
+
+    speculation.adopt(agent_main.create_initial_state(JOB_DESCRIPTION))
+    assert "Analyzing Keywords" in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test that importing the agent is cheap and the CLI starts without an API key.
+Runs offline - no API key needed.
+"""
+import os
+import subprocess
+import sys
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that should only load when a run needs them
+HEAVY_MODULES = ["chromadb", "langchain_chroma", "langchain_community", "reportlab", "openai"]
+
+
+def _run(*args):
+    env = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    return subprocess.run([sys.executable, *args], cwd=REPO_DIR, env=env,
+                          capture_output=True, text=True, timeout=120)
+
+
+def test_import_main_defers_heavy_modules():
+    result = _run("-c", "import sys, main; "
+                        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])")
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_import_main_opens_no_caches(tmp_path):
+    code = ("import dedup, embedding_cache, llm_cache, main, semantic_cache; "
+            "getters = [llm_cache.get_llm_cache, semantic_cache.get_semantic_cache, "
+            "dedup.get_duplicate_index, embedding_cache.get_embedding_cache]; "
+            "print([get() is None for get in getters]); "
+            "main.configure_caches(); "
+            "print([get() is None for get in getters])")
+    env_paths = {"LLM_CACHE_PATH": "llm.sqlite", "SEMANTIC_CACHE_PATH": "semantic.sqlite",
+                 "DEDUP_INDEX_PATH": "duplicates.sqlite", "EMBEDDING_CACHE_DIR": "embeddings"}
+    env = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    env.update({key: str(tmp_path / name) for key, name in env_paths.items()})
+    for key in ("LLM_CACHE_ENABLED", "SEMANTIC_CACHE_ENABLED", "DEDUP_ENABLED", "EMBEDDING_CACHE_ENABLED"):
+        env.pop(key, None)
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split("\n")[:2] == ["[True, True, True, True]", "[False, False, False, False]"]
+    assert sorted(os.listdir(tmp_path)) == sorted(env_paths.values())
+
+
+@pytest.mark.parametrize("script", ["cli.py", "batch.py", "server.py"])
+def test_help_needs_no_api_key(script):
+    result = _run(script, "--help")
+
+    assert result.returncode == 0, result.stderr
+    assert "--context-mode" in result.stdout
+
+
+def test_graph_is_compiled_once(agent_main):
+    main = agent_main
+
+    assert main.resume_agent is main.get_resume_agent()
+    with pytest.raises(AttributeError):
+        main.not_an_attribute
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test live section output from synthetic graph stream events.
+Runs offline - no API key needed.
+"""
+import io
+import os
+import tempfile
+from langchain_core.messages import AIMessageChunk
+
+from streaming import SectionStreamer
+
+
+def _streamer():
+    out = io.StringIO()
+    return SectionStreamer(tempfile.mkdtemp(), out=out), out
+
+
+def _token(streamer, node, text, message_id="m1"):
+    streamer.handle("messages", (AIMessageChunk(content=text, id=message_id),
+                                 {"langgraph_node": node}))
+
+
+def _draft(streamer, node):
+    with open(streamer.draft_path(node), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_live_section_and_buffered_parallel_section():
+    streamer, out = _streamer()
+
+    _token(streamer, "tailor_summary", "Backend ")
+    _token(streamer, "tailor_skills", "Python", message_id="m2")
+    _token(streamer, "tailor_summary", "engineer")
+
+    # Only the live section is printed while both are generating
+    assert "Backend engineer" in out.getvalue()
+    assert "Python" not in out.getvalue()
+    # Drafts are written as tokens arrive
+    assert _draft(streamer, "tailor_skills") == "Python"
+
+    streamer.handle("updates", {"tailor_summary": {"tailored_summary": "Backend engineer"}})
+    # The buffered section goes live once the first one finishes
+    assert "SKILLS" in out.getvalue() and "Python" in out.getvalue()
+
+    _token(streamer, "tailor_skills", ", SQL", message_id="m2")
+    streamer.handle("updates", {"tailor_skills": {"tailored_skills": "Python, SQL"}})
+    streamer.close()
+
+    assert out.getvalue().count("SKILLS") == 1
+    assert out.getvalue().index("PROFESSIONAL SUMMARY") < out.getvalue().index("SKILLS")
+    assert streamer.first_output_seconds is not None
+
+
+def test_new_message_restarts_draft():
+    streamer, out = _streamer()
+
+    _token(streamer, "generate_cover_letter", "Let me look up", message_id="first")
+    _token(streamer, "generate_cover_letter", "Dear team", message_id="second")
+
+    assert _draft(streamer, "generate_cover_letter") == "Dear team"
+    assert "[revised]" in out.getvalue()
+
+
+def test_unstreamed_output_and_other_nodes():
+    streamer, out = _streamer()
+
+    # Company extraction tokens are not a section
+    _token(streamer, "get_job_description", "ACME")
+    # Reused (cached) outputs arrive only as a node update
+    streamer.handle("updates", {"get_job_description": {"company_name": "ACME"},
+                                "analyze_keywords": {"keywords_analysis": "Python, AWS"}})
+
+    assert "ACME" not in out.getvalue()
+    assert "KEYWORDS ANALYSIS" in out.getvalue() and "Python, AWS" in out.getvalue()
+    assert _draft(streamer, "analyze_keywords") == "Python, AWS"
+    assert not os.path.exists(streamer.draft_path("get_job_description"))
+
+
+def test_condensed_sections_replace_their_drafts():
+    streamer, out = _streamer()
+
+    streamer.handle("updates", {"tailor_experience": {"tailored_experience": "• Long bullet\n• Another"}})
+    _token(streamer, "check_resume_length", "• Short")  # Condense calls are not sections
+    _token(streamer, "generate_cover_letter", "Dear ")
+    streamer.handle("updates", {"check_resume_length": {"length_check_result": "OK; condensed Experience",
+                                                        "tailored_experience": "• Short bullet"}})
+
+    assert _draft(streamer, "tailor_experience") == "• Short bullet"
+    # The live cover letter isn't interrupted; the condensed section follows it
+    assert "EXPERIENCE BULLETS (condensed)" not in out.getvalue()
+    _token(streamer, "generate_cover_letter", "team")
+    streamer.handle("updates", {"generate_cover_letter": {"cover_letter": "Dear team"}})
+    streamer.close()
+
+    text = out.getvalue()
+    assert text.index("Dear team") < text.index("EXPERIENCE BULLETS (condensed)\n")
+    assert text.endswith("• Short bullet\n")
+    assert "• Short\n" not in text
+
+
+if __name__ == "__main__":
+    test_live_section_and_buffered_parallel_section()
+    test_new_message_restarts_draft()
+    test_unstreamed_output_and_other_nodes()
+    test_condensed_sections_replace_their_drafts()
+    print("✓ All streaming tests passed")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test run telemetry: node timing, tokens, cost, tools, HTTP and exports.
+Runs offline - no API key needed.
+"""
+import json
+import os
+import tempfile
+import uuid
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.tools import tool
+
+from telemetry import (
+    RunTelemetry,
+    aggregate_reports,
+    estimate_cost,
+    prometheus_text,
+    record_http,
+    use_telemetry
+)
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look something up."""
+    return f"result for {query}"
+
+
+def _llm_call(telemetry: RunTelemetry, node: str, model: str, input_tokens: int, cached: int, output: int):
+    run_id = uuid.uuid4()
+    telemetry.on_chat_model_start({}, [], run_id=run_id, metadata={"langgraph_node": node})
+    message = AIMessage(content="ok", response_metadata={"model_name": model}, usage_metadata={
+        "input_tokens": input_tokens, "output_tokens": output,
+        "total_tokens": input_tokens + output, "input_token_details": {"cache_read": cached}
+    })
+    telemetry.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id)
+
+
+def _sample_report() -> dict:
+    telemetry = RunTelemetry(run_id="run-1")
+
+    node_run = uuid.uuid4()
+    telemetry.on_chain_start({}, {}, run_id=node_run, name="tailor_summary",
+                             metadata={"langgraph_node": "tailor_summary"})
+    _llm_call(telemetry, "tailor_summary", "gpt-5-2025-08-07", 2000, 1024, 300)
+    lookup.invoke({"query": "python"}, config={"callbacks": [telemetry],
+                                              "metadata": {"langgraph_node": "tailor_summary"}})
+    telemetry.on_chain_end({}, run_id=node_run)
+
+    with use_telemetry(telemetry):
+        record_http("job_page", 0.5, 200, 1000)
+        record_http("job_page", 0.1, 403)
+    # Outside use_telemetry nothing is recorded
+    record_http("job_page", 0.1, 200)
+    return telemetry.report()
+
+
+def test_report_collects_nodes_tokens_tools_and_http():
+    report = _sample_report()
+    node = report["nodes"]["tailor_summary"]
+
+    assert node["runs"] == 1 and node["seconds"] >= 0
+    assert (node["llm_calls"], node["input_tokens"], node["cached_input_tokens"]) == (1, 2000, 1024)
+    assert node["tool_calls"] == 1
+    assert report["tools"]["lookup"]["calls"] == 1
+    assert report["http"]["job_page"] == {"requests": 2, "errors": 1, "seconds": 0.6, "bytes": 1000}
+    assert report["totals"]["cost_usd"] == pytest.approx(estimate_cost("gpt-5", 2000, 1024, 300))
+    json.dumps(report)
+
+
+def test_cost_uses_cached_price_and_env_override(monkeypatch):
+    # 1000 uncached + 1000 cached input, 1000 output at gpt-4o-mini prices
+    assert estimate_cost("gpt-4o-mini", 2000, 1000, 1000) == pytest.approx((150 + 75 + 600) / 1e6)
+    assert estimate_cost("some-other-model", 1000, 0, 1000) == 0.0
+
+    monkeypatch.setenv("OPENAI_PRICING", json.dumps({"some-other-model": [1, 1, 1]}))
+    assert estimate_cost("some-other-model", 1000, 0, 1000) == pytest.approx(0.002)
+
+
+def test_prometheus_text_sums_reports():
+    reports = [_sample_report(), _sample_report()]
+    assert aggregate_reports(reports)["nodes"]["tailor_summary"]["runs"] == 2
+
+    text = prometheus_text(reports)
+    assert "# TYPE resume_agent_node_seconds_total counter" in text
+    assert 'resume_agent_llm_tokens_total{node="tailor_summary",type="cached_input"} 2048' in text
+    assert 'resume_agent_tool_calls_total{tool="lookup"} 2' in text
+    assert 'resume_agent_http_errors_total{kind="job_page"} 2' in text
+
+
+def test_write_report():
+    path = os.path.join(tempfile.mkdtemp(), "telemetry", "run.json")
+    telemetry = RunTelemetry(run_id="run-2")
+    telemetry.write_report(path)
+
+    with open(path) as f:
+        assert json.load(f)["run_id"] == "run-2"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test the shared tool-execution engine with a scripted fake chat model.
+Runs offline - no API key or vector store needed.
+"""
+import asyncio
+import threading
+import time
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+
+import tool_executor
+from tool_executor import run_tool_loop, arun_tool_loop
+
+TOOL_DELAY = 0.2
+
+
+class ScriptedChatModel:
+    """Returns the scripted responses in order and records every call."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def bind_tools(self, tools, tool_choice=None):
+        self.tool_choice = tool_choice
+        return self
+
+    def invoke(self, messages):
+        self.calls.append(list(messages))
+        return self.responses.pop(0)
+
+    async def ainvoke(self, messages):
+        return self.invoke(messages)
+
+
+def _slow_lookup(query: str) -> str:
+    """Look something up slowly."""
+    time.sleep(TOOL_DELAY)
+    return f"result for {query}"
+
+
+async def _aslow_lookup(query: str) -> str:
+    await asyncio.sleep(TOOL_DELAY)
+    return f"result for {query}"
+
+
+lookup = StructuredTool.from_function(func=_slow_lookup, coroutine=_aslow_lookup, name="lookup")
+
+
+def _tool_call_message(*queries):
+    return AIMessage(content="", tool_calls=[
+        {"name": "lookup", "args": {"query": q}, "id": f"call_{i}"}
+        for i, q in enumerate(queries)
+    ])
+
+
+def test_tool_calls_run_concurrently():
+    llm = ScriptedChatModel([_tool_call_message("a", "b", "c", "d"), AIMessage(content="done")])
+
+    start = time.perf_counter()
+    response, tool_runs = run_tool_loop(llm, [lookup], [{"role": "system", "content": "hi"}])
+    elapsed = time.perf_counter() - start
+
+    assert response.content == "done"
+    assert len(tool_runs) == 4
+    assert all(run["seconds"] >= TOOL_DELAY * 0.9 for run in tool_runs)
+    assert elapsed < TOOL_DELAY * 3, f"tool calls ran sequentially ({elapsed:.2f}s)"
+
+    # Results go back as ToolMessages matched to their call ids, in call order
+    tool_messages = [m for m in llm.calls[1] if isinstance(m, ToolMessage)]
+    assert [m.tool_call_id for m in tool_messages] == ["call_0", "call_1", "call_2", "call_3"]
+    assert tool_messages[2].content == "result for c"
+
+
+def test_multi_round_tool_use():
+    llm = ScriptedChatModel([
+        _tool_call_message("first"),
+        _tool_call_message("second"),
+        AIMessage(content="answer")
+    ])
+
+    response, tool_runs = run_tool_loop(llm, [lookup], [], max_rounds=3)
+
+    assert response.content == "answer"
+    assert [run["round"] for run in tool_runs] == [1, 2]
+
+
+def test_round_limit_forces_answer():
+    llm = ScriptedChatModel([
+        _tool_call_message("first"),
+        AIMessage(content="forced answer")
+    ])
+
+    response, tool_runs = run_tool_loop(llm, [lookup], [], max_rounds=1)
+
+    assert response.content == "forced answer"
+    assert llm.tool_choice == "none"
+    assert len(tool_runs) == 1
+
+
+def test_async_tool_calls_run_concurrently():
+    llm = ScriptedChatModel([_tool_call_message("a", "b", "c"), AIMessage(content="done")])
+
+    start = time.perf_counter()
+    response, tool_runs = asyncio.run(arun_tool_loop(llm, [lookup], []))
+    elapsed = time.perf_counter() - start
+
+    assert response.content == "done"
+    assert len(tool_runs) == 3
+    assert elapsed < TOOL_DELAY * 2.5
+
+
+def test_concurrent_first_calls_share_one_tool_pool():
+    created = []
+
+    class SlowPool:
+        def __init__(self, **kwargs):
+            # Widen the window between the None check and the assignment
+            time.sleep(0.05)
+            created.append(self)
+
+    original_pool, original_class = tool_executor._tool_pool, tool_executor.ContextThreadPoolExecutor
+    tool_executor._tool_pool, tool_executor.ContextThreadPoolExecutor = None, SlowPool
+    try:
+        pools = []
+        threads = [threading.Thread(target=lambda: pools.append(tool_executor.get_tool_pool()))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        tool_executor._tool_pool, tool_executor.ContextThreadPoolExecutor = original_pool, original_class
+
+    assert len(created) == 1
+    assert all(pool is created[0] for pool in pools)
+
+
+if __name__ == "__main__":
+    test_tool_calls_run_concurrently()
+    test_multi_round_tool_use()
+    test_round_limit_forces_answer()
+    test_async_tool_calls_run_concurrently()
+    test_concurrent_first_calls_share_one_tool_pool()
+    print("✓ All tool executor tests passed")
@@ -0,0 +1,182 @@
+"""
+Shared tool-execution engine used by every LLM node in the agent.
+
+The LLM is called with the retriever tools bound. All tool calls from one
+response run concurrently (thread pool for the sync path, asyncio for the
+async path), their results are sent back as ToolMessages, and the loop repeats
+until the model stops asking for tools or the round limit is reached.
+"""
+import asyncio
+import threading
+import time
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+# Maximum number of tool-calling rounds before the model must answer
+DEFAULT_MAX_TOOL_ROUNDS = 2
+
+# Worker threads shared by all sync tool calls in the process
+MAX_TOOL_WORKERS = 8
+
+_tool_pool = None
+_tool_pool_lock = threading.Lock()
+
+
+def get_tool_pool():
+    """Get the shared thread pool for sync tool calls."""
+    global _tool_pool
+    # Parallel graph nodes can get here at the same time; create one pool only
+    with _tool_pool_lock:
+        if _tool_pool is None:
+            # ContextThreadPoolExecutor copies the caller's context, so callbacks
+            # and tracing configured on the graph run reach the tools
+            _tool_pool = ContextThreadPoolExecutor(
+                max_workers=MAX_TOOL_WORKERS,
+                thread_name_prefix="tool"
+            )
+    return _tool_pool
+
+
+def _tool_record(tool_call: dict, round_number: int, seconds: float) -> dict:
+    """Build the timing record for one tool call."""
+    return {
+        "tool": tool_call["name"],
+        "args": tool_call["args"],
+        "round": round_number,
+        "seconds": round(seconds, 3)
+    }
+
+
+def _run_tool(tools_dict: dict, tool_call: dict, round_number: int):
+    """Run a single tool call and time it."""
+    start = time.perf_counter()
+    tool = tools_dict.get(tool_call["name"])
+    if tool is None:
+        content = f"Unknown tool: {tool_call['name']}"
+    else:
+        content = str(tool.invoke(tool_call["args"]))
+    seconds = time.perf_counter() - start
+
+    message = ToolMessage(content=content, tool_call_id=tool_call["id"], name=tool_call["name"])
+    return message, _tool_record(tool_call, round_number, seconds)
+
+
+async def _arun_tool(tools_dict: dict, tool_call: dict, round_number: int):
+    """Async version of _run_tool."""
+    start = time.perf_counter()
+    tool = tools_dict.get(tool_call["name"])
+    if tool is None:
+        content = f"Unknown tool: {tool_call['name']}"
+    else:
+        content = str(await tool.ainvoke(tool_call["args"]))
+    seconds = time.perf_counter() - start
+
+    message = ToolMessage(content=content, tool_call_id=tool_call["id"], name=tool_call["name"])
+    return message, _tool_record(tool_call, round_number, seconds)
+
+
+def _print_tool_calls(tool_calls: list):
+    for tool_call in tool_calls:
+        print(f"  Using tool: {tool_call['name']}")
+
+
+def _print_tool_records(records: list):
+    for record in records:
+        print(f"  ✓ {record['tool']} finished in {record['seconds']:.2f}s")
+
+
+def execute_tool_calls(tool_calls: list, tools_dict: dict, round_number: int = 1):
+    """
+    Run all tool calls from one LLM response concurrently on the thread pool.
+
+    Args:
+        tool_calls: The response's tool_calls
+        tools_dict: Tools by name
+        round_number: Tool-calling round, recorded in the timing records
+
+    Returns:
+        Tuple of (ToolMessages in call order, timing records)
+    """
+    _print_tool_calls(tool_calls)
+
+    if len(tool_calls) == 1:
+        results = [_run_tool(tools_dict, tool_calls[0], round_number)]
+    else:
+        pool = get_tool_pool()
+        futures = [pool.submit(_run_tool, tools_dict, tool_call, round_number)
+                   for tool_call in tool_calls]
+        results = [future.result() for future in futures]
+
+    messages = [message for message, _ in results]
+    records = [record for _, record in results]
+    _print_tool_records(records)
+    return messages, records
+
+
+async def aexecute_tool_calls(tool_calls: list, tools_dict: dict, round_number: int = 1):
+    """Async version of execute_tool_calls using asyncio.gather."""
+    _print_tool_calls(tool_calls)
+
+    results = await asyncio.gather(*(
+        _arun_tool(tools_dict, tool_call, round_number) for tool_call in tool_calls
+    ))
+
+    messages = [message for message, _ in results]
+    records = [record for _, record in results]
+    _print_tool_records(records)
+    return messages, records
+
+
+def run_tool_loop(llm, tools: list, messages: list, max_rounds: int = DEFAULT_MAX_TOOL_ROUNDS):
+    """
+    Call the LLM with tools bound, answering tool calls until it responds.
+
+    Args:
+        llm: Chat model (without tools bound)
+        tools: Tools the model may call
+        messages: Prompt messages for the node
+        max_rounds: Maximum number of tool-calling rounds; after the last
+            round the model is asked to answer without calling tools
+
+    Returns:
+        Tuple of (final LLM response, tool timing records)
+    """
+    tools_dict = {tool.name: tool for tool in tools}
+    llm_with_tools = llm.bind_tools(tools)
+    messages = list(messages)
+    tool_runs = []
+
+    for round_number in range(1, max_rounds + 1):
+        response = llm_with_tools.invoke(messages)
+        if not getattr(response, "tool_calls", None):
+            return response, tool_runs
+
+        tool_messages, records = execute_tool_calls(response.tool_calls, tools_dict, round_number)
+        messages.append(response)
+        messages.extend(tool_messages)
+        tool_runs.extend(records)
+
+    # Out of tool rounds: the model has to answer with what it has
+    response = llm.bind_tools(tools, tool_choice="none").invoke(messages)
+    return response, tool_runs
+
+
+async def arun_tool_loop(llm, tools: list, messages: list, max_rounds: int = DEFAULT_MAX_TOOL_ROUNDS):
+    """Async version of run_tool_loop."""
+    tools_dict = {tool.name: tool for tool in tools}
+    llm_with_tools = llm.bind_tools(tools)
+    messages = list(messages)
+    tool_runs = []
+
+    for round_number in range(1, max_rounds + 1):
+        response = await llm_with_tools.ainvoke(messages)
+        if not getattr(response, "tool_calls", None):
+            return response, tool_runs
+
+        tool_messages, records = await aexecute_tool_calls(response.tool_calls, tools_dict, round_number)
+        messages.append(response)
+        messages.extend(tool_messages)
+        tool_runs.extend(records)
+
+    response = await llm.bind_tools(tools, tool_choice="none").ainvoke(messages)
+    return response, tool_runs
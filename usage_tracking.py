@@ -0,0 +1,95 @@
+"""
+Token usage tracking.
+
+TokenUsageHandler is a LangChain callback handler that adds up the token
+usage OpenAI reports for each chat call, per graph node: input tokens, the
+part of them served from OpenAI's prompt-prefix cache
+(usage_metadata["input_token_details"]["cache_read"]) and output tokens.
+
+Responses served by the local LLM response cache (llm_cache.py) are counted
+separately, since they carry the usage of the original call.
+"""
+from langchain_core.callbacks import BaseCallbackHandler
+import threading
+
+
+def _empty_usage() -> dict:
+    return {"calls": 0, "input_tokens": 0, "cached_input_tokens": 0, "output_tokens": 0}
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Collects per-node token usage, including prompt-cache hits."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._run_nodes = {}
+        self.nodes = {}
+        self.models = {}
+        self.local_cache_hits = 0
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        with self._lock:
+            self._run_nodes[run_id] = (metadata or {}).get("langgraph_node") or "other"
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            node = self._run_nodes.pop(run_id, "other")
+            for generations in response.generations:
+                for generation in generations:
+                    self._record(node, getattr(generation, "message", None))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._run_nodes.pop(run_id, None)
+
+    def _record(self, node: str, message):
+        """Add one response's usage; returns (model, usage counted) or None."""
+        usage = getattr(message, "usage_metadata", None)
+        if not usage:
+            return None
+        # LangChain zeroes total_cost on responses replayed from the local cache
+        if "total_cost" in usage:
+            self.local_cache_hits += 1
+            return None
+
+        counted = {
+            "calls": 1,
+            "input_tokens": usage.get("input_tokens", 0),
+            "cached_input_tokens": (usage.get("input_token_details") or {}).get("cache_read", 0) or 0,
+            "output_tokens": usage.get("output_tokens", 0),
+        }
+        model = message.response_metadata.get("model_name") or "unknown"
+        for totals in (self.nodes.setdefault(node, _empty_usage()),
+                       self.models.setdefault(model, _empty_usage())):
+            for key, value in counted.items():
+                totals[key] += value
+        return model, counted
+
+    def summary(self) -> dict:
+        """
+        Totals over all calls so far.
+
+        Returns:
+            Dictionary with calls, input_tokens, cached_input_tokens,
+            output_tokens, cached_fraction, local_cache_hits and the same
+            counts per node under "nodes"
+        """
+        with self._lock:
+            totals = _empty_usage()
+            nodes = {}
+            for node, usage in self.nodes.items():
+                nodes[node] = dict(usage)
+                for key in totals:
+                    totals[key] += usage[key]
+            totals["cached_fraction"] = (round(totals["cached_input_tokens"] / totals["input_tokens"], 3)
+                                         if totals["input_tokens"] else 0.0)
+            totals["local_cache_hits"] = self.local_cache_hits
+            totals["nodes"] = nodes
+            return totals
+
+
+def format_usage(summary: dict) -> str:
+    """One-line description of a usage summary, for display."""
+    return (f"{summary['cached_input_tokens']:,} of {summary['input_tokens']:,} input tokens "
+            f"served from the prompt cache ({summary['cached_fraction']:.0%}), "
+            f"{summary['output_tokens']:,} output tokens in {summary['calls']} calls")
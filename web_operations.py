@@ -4,19 +4,15 @@ import requests
 from bs4 import BeautifulSoup
 from urllib.parse import quote_plus, urlparse
 import re
-from langchain_openai import ChatOpenAI
+import time
+from model_routing import get_llm
+from telemetry import record_http
 
 load_dotenv()
 
-# Initialize LLM for company extraction (lazy loaded)
-_company_extractor_llm = None
-
 def get_company_extractor_llm():
-    """Get LLM instance for company name extraction."""
-    global _company_extractor_llm
-    if _company_extractor_llm is None:
-        _company_extractor_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    return _company_extractor_llm
+    """Get LLM instance for company name extraction (the "extract_company" route)."""
+    return get_llm("extract_company")
 
 
 def extract_company_with_llm(job_description: str, url: str = None) -> str:
@@ -32,36 +28,112 @@ def extract_company_with_llm(job_description: str, url: str = None) -> str:
     """
     try:
         llm = get_company_extractor_llm()
+        response = llm.invoke(_company_extraction_prompt(job_description, url))
+        return _validate_extracted_company(response.content)
         
-        # Take first 1000 characters for faster processing
-        text_sample = job_description[:1000]
+    except Exception as e:
+        print(f"LLM company extraction failed: {e}")
+    
+    return None
+
+
+async def aextract_company_with_llm(job_description: str, url: str = None) -> str:
+    """Async version of extract_company_with_llm."""
+    try:
+        llm = get_company_extractor_llm()
+        response = await llm.ainvoke(_company_extraction_prompt(job_description, url))
+        return _validate_extracted_company(response.content)
         
-        prompt = f"""Extract the company name from this job posting. Return ONLY the company name, nothing else.
+    except Exception as e:
+        print(f"LLM company extraction failed: {e}")
+    
+    return None
+
+
+def _company_extraction_prompt(job_description: str, url: str = None) -> str:
+    """Build the company extraction prompt for the LLM."""
+    # Take first 1000 characters for faster processing
+    text_sample = job_description[:1000]
+    
+    prompt = f"""Extract the company name from this job posting. Return ONLY the company name, nothing else.
 If you cannot find a company name, return "NONE".
 
 Job posting:
 {text_sample}"""
-        
-        if url:
-            prompt += f"\n\nURL: {url}"
-        
-        response = llm.invoke(prompt)
-        company_name = response.content.strip()
-        
-        # Validate response
-        if (company_name and 
-            company_name.upper() != "NONE" and 
-            3 < len(company_name) < 100 and
-            not company_name.startswith("I ") and
-            not company_name.startswith("The ")):
-            return company_name
-        
-    except Exception as e:
-        print(f"LLM company extraction failed: {e}")
+    
+    if url:
+        prompt += f"\n\nURL: {url}"
+    
+    return prompt
+
+
+def _validate_extracted_company(content: str) -> str:
+    """Return the LLM's company name if it looks valid, otherwise None."""
+    company_name = content.strip()
+    
+    if (company_name and 
+        company_name.upper() != "NONE" and 
+        3 < len(company_name) < 100 and
+        not company_name.startswith("I ") and
+        not company_name.startswith("The ")):
+        return company_name
     
     return None
 
 
+def _request(kind: str, method: str, url: str, **kwargs) -> requests.Response:
+    """requests.request, timed and recorded in the active run's telemetry."""
+    start = time.perf_counter()
+    status, size = None, 0
+    try:
+        response = requests.request(method, url, **kwargs)
+        status, size = response.status_code, len(response.content)
+        return response
+    finally:
+        record_http(kind, time.perf_counter() - start, status, size)
+
+
+def parse_job_description_html(html) -> str:
+    """
+    Extract the job description text from a job posting page.
+    
+    Args:
+        html: Page HTML (bytes or str)
+        
+    Returns:
+        Text of the most specific job description container found (or of
+        the whole page), one non-empty line per text block
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Remove script and style elements
+    for script in soup(['script', 'style', 'header', 'footer', 'nav']):
+        script.decompose()
+    
+    # Try to find job description in common container classes/ids
+    job_containers = [
+        soup.find('div', {'class': lambda x: x and 'job-description' in x.lower()}),
+        soup.find('div', {'id': lambda x: x and 'job-description' in x.lower()}),
+        soup.find('div', {'class': lambda x: x and 'description' in x.lower()}),
+        soup.find('section', {'class': lambda x: x and 'job' in x.lower()}),
+        soup.find('article'),
+        soup.find('main')
+    ]
+    
+    # Use first non-None container
+    container = next((c for c in job_containers if c), None)
+    
+    if container:
+        text = container.get_text(separator='\n', strip=True)
+    else:
+        # Fallback: get all text from body
+        text = soup.get_text(separator='\n', strip=True)
+    
+    # Clean up the text
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    return '\n'.join(lines)
+
+
 def fetch_job_description_from_url(url: str) -> str:
     """
     Fetch job description from a URL using BeautifulSoup.
@@ -81,37 +153,10 @@ def fetch_job_description_from_url(url: str) -> str:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = _request("job_page", "GET", url, headers=headers, timeout=10)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(['script', 'style', 'header', 'footer', 'nav']):
-            script.decompose()
-        
-        # Try to find job description in common container classes/ids
-        job_containers = [
-            soup.find('div', {'class': lambda x: x and 'job-description' in x.lower()}),
-            soup.find('div', {'id': lambda x: x and 'job-description' in x.lower()}),
-            soup.find('div', {'class': lambda x: x and 'description' in x.lower()}),
-            soup.find('section', {'class': lambda x: x and 'job' in x.lower()}),
-            soup.find('article'),
-            soup.find('main')
-        ]
-        
-        # Use first non-None container
-        container = next((c for c in job_containers if c), None)
-        
-        if container:
-            text = container.get_text(separator='\n', strip=True)
-        else:
-            # Fallback: get all text from body
-            text = soup.get_text(separator='\n', strip=True)
-        
-        # Clean up the text
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        cleaned_text = '\n'.join(lines)
+        cleaned_text = parse_job_description_html(response.content)
         
         if len(cleaned_text) < 100:
             raise ValueError("Extracted text too short, likely failed to parse properly")
@@ -153,7 +198,7 @@ def fetch_with_brightdata(url: str) -> str:
     }
     
     try:
-        response = requests.post(api_url, headers=headers, json=payload, timeout=30)
+        response = _request("brightdata", "POST", api_url, headers=headers, json=payload, timeout=30)
         response.raise_for_status()
         data = response.json()
         
@@ -179,7 +224,7 @@ def fetch_with_brightdata(url: str) -> str:
 def extract_company_name_with_llm(job_description: str, url: str = None) -> str:
     """
     Use LLM to extract company name from job description.
-    Fast and accurate using gpt-4o-mini.
+    Fast and accurate using the "extract_company" route's model.
     
     Args:
         job_description: The job description text
@@ -189,7 +234,7 @@ def extract_company_name_with_llm(job_description: str, url: str = None) -> str:
         Extracted company name or None if extraction fails
     """
     try:
-        llm = get_llm()
+        llm = get_company_extractor_llm()
         
         # Create a concise prompt
         prompt = f"""Extract the company/organization name from this job posting. 
@@ -288,7 +333,32 @@ def extract_company_name_from_text(job_description: str, url: str = None) -> str
         return sanitize_filename(llm_company)
     
     print("  LLM extraction unsuccessful, trying pattern matching...")
+    return extract_company_name_with_patterns(job_description, url)
+
+
+async def aextract_company_name_from_text(job_description: str, url: str = None) -> str:
+    """Async version of extract_company_name_from_text."""
+    print("  Extracting company name with LLM...")
+    llm_company = await aextract_company_with_llm(job_description, url)
+    if llm_company:
+        print(f"  ✓ LLM extracted: {llm_company}")
+        return sanitize_filename(llm_company)
+    
+    print("  LLM extraction unsuccessful, trying pattern matching...")
+    return extract_company_name_with_patterns(job_description, url)
+
+
+def extract_company_name_with_patterns(job_description: str, url: str = None) -> str:
+    """
+    Extract company name from URL or job description text without an LLM.
     
+    Args:
+        job_description: The job description text
+        url: Optional URL of the job posting
+        
+    Returns:
+        Extracted company name or "Unknown_Company"
+    """
     # Method 2: Try URL extraction if provided
     if url:
         url_company = extract_company_name_from_url(url)